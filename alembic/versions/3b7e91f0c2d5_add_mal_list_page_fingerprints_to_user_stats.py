@@ -0,0 +1,38 @@
+"""add MAL list page fingerprints to user stats
+
+Revision ID: 3b7e91f0c2d5
+Revises: c4e9a7d1b2f3
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b7e91f0c2d5"
+down_revision: Union[str, Sequence[str], None] = "c4e9a7d1b2f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "user_stats",
+        sa.Column(
+            "mal_list_page_fingerprints",
+            postgresql.ARRAY(sa.String()),
+            nullable=False,
+            server_default=sa.text("'{}'::varchar[]"),
+        ),
+    )
+    op.alter_column("user_stats", "mal_list_page_fingerprints", server_default=None)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("user_stats", "mal_list_page_fingerprints")
@@ -0,0 +1,88 @@
+"""add tag counts and tag pair counts
+
+Revision ID: 5e2a9c7d4b18
+Revises: 3b7e91f0c2d5
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e2a9c7d4b18"
+down_revision: Union[str, Sequence[str], None] = "3b7e91f0c2d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Byte-order collation so "tag_a < tag_b" agrees with Python's str ordering,
+    # which is how the application keys pairs.
+    op.create_table(
+        "tag_counts",
+        sa.Column("tag", sa.String(collation="C"), nullable=False),
+        sa.Column("anime_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("tag"),
+    )
+    op.create_table(
+        "tag_pair_counts",
+        sa.Column("tag_a", sa.String(collation="C"), nullable=False),
+        sa.Column("tag_b", sa.String(collation="C"), nullable=False),
+        sa.Column("cooccurrence_count", sa.Integer(), nullable=False),
+        sa.CheckConstraint("tag_a < tag_b", name="ck_tag_pair_counts_ordered"),
+        sa.PrimaryKeyConstraint("tag_a", "tag_b"),
+    )
+    op.create_index("ix_tag_pair_counts_tag_b", "tag_pair_counts", ["tag_b"], unique=False)
+
+    op.execute(
+        sa.text(
+            """
+            WITH tag_instances AS (
+                SELECT DISTINCT
+                    a.id AS anime_id,
+                    btrim(tag_value) AS tag
+                FROM anime AS a
+                CROSS JOIN LATERAL unnest(a.tags) AS tag_value
+                WHERE tag_value IS NOT NULL
+                  AND btrim(tag_value) <> ''
+            )
+            INSERT INTO tag_counts (tag, anime_count)
+            SELECT tag, COUNT(*)::integer
+            FROM tag_instances
+            GROUP BY tag
+            """
+        )
+    )
+    op.execute(
+        sa.text(
+            """
+            WITH tag_instances AS (
+                SELECT DISTINCT
+                    a.id AS anime_id,
+                    btrim(tag_value) AS tag
+                FROM anime AS a
+                CROSS JOIN LATERAL unnest(a.tags) AS tag_value
+                WHERE tag_value IS NOT NULL
+                  AND btrim(tag_value) <> ''
+            )
+            INSERT INTO tag_pair_counts (tag_a, tag_b, cooccurrence_count)
+            SELECT ti1.tag, ti2.tag, COUNT(*)::integer
+            FROM tag_instances AS ti1
+            JOIN tag_instances AS ti2
+                ON ti1.anime_id = ti2.anime_id
+               AND ti1.tag COLLATE "C" < ti2.tag COLLATE "C"
+            GROUP BY ti1.tag, ti2.tag
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tag_pair_counts_tag_b", table_name="tag_pair_counts")
+    op.drop_table("tag_pair_counts")
+    op.drop_table("tag_counts")
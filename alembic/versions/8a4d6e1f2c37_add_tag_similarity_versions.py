@@ -0,0 +1,38 @@
+"""add tag similarity versions
+
+Revision ID: 8a4d6e1f2c37
+Revises: 5e2a9c7d4b18
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8a4d6e1f2c37"
+down_revision: Union[str, Sequence[str], None] = "5e2a9c7d4b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tag_similarity_versions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("top_k", sa.Integer(), nullable=False),
+        sa.Column("min_jaccard", sa.Float(), nullable=False),
+        sa.Column("min_cooccurrence_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("tag_similarity_versions")
@@ -0,0 +1,187 @@
+"""add tags dictionary and integer tag keys
+
+Revision ID: c7f3b2a9e610
+Revises: 8a4d6e1f2c37
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7f3b2a9e610"
+down_revision: Union[str, Sequence[str], None] = "8a4d6e1f2c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, text column, id column) for every tag-keyed column outside anime.
+_TAG_KEY_COLUMNS = (
+    ("user_tag_stats", "tag", "tag_id"),
+    ("tag_similarity", "source_tag", "source_tag_id"),
+    ("tag_similarity", "related_tag", "related_tag_id"),
+    ("tag_counts", "tag", "tag_id"),
+    ("tag_pair_counts", "tag_a", "tag_a_id"),
+    ("tag_pair_counts", "tag_b", "tag_b_id"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tags",
+        sa.Column("id", sa.SmallInteger(), sa.Identity(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO tags (name)
+            SELECT name
+            FROM (
+                SELECT btrim(tag_value) AS name
+                FROM anime AS a
+                CROSS JOIN LATERAL unnest(a.tags) AS tag_value
+                UNION
+                SELECT btrim(tag) AS name
+                FROM user_tag_stats
+            ) AS tag_names
+            WHERE name IS NOT NULL
+              AND name <> ''
+            ORDER BY name
+            """
+        )
+    )
+
+    op.add_column(
+        "anime",
+        sa.Column(
+            "tag_ids",
+            postgresql.ARRAY(sa.SmallInteger()),
+            nullable=False,
+            server_default=sa.text("'{}'::smallint[]"),
+        ),
+    )
+    op.execute(
+        sa.text(
+            """
+            UPDATE anime AS a
+            SET tag_ids = COALESCE(
+                (
+                    SELECT array_agg(resolved.tag_id ORDER BY resolved.first_position)
+                    FROM (
+                        SELECT t.id AS tag_id, MIN(u.position) AS first_position
+                        FROM unnest(a.tags) WITH ORDINALITY AS u(tag_value, position)
+                        JOIN tags AS t
+                            ON t.name = btrim(u.tag_value)
+                        GROUP BY t.id
+                    ) AS resolved
+                ),
+                '{}'::smallint[]
+            )
+            WHERE cardinality(a.tags) > 0
+            """
+        )
+    )
+    op.alter_column("anime", "tag_ids", server_default=None)
+    op.create_index("ix_anime_tag_ids_gin", "anime", ["tag_ids"], unique=False, postgresql_using="gin")
+
+    op.drop_constraint("ck_tag_similarity_no_self", "tag_similarity", type_="check")
+    op.drop_constraint("ck_tag_pair_counts_ordered", "tag_pair_counts", type_="check")
+    op.drop_index("ix_tag_similarity_related_tag", table_name="tag_similarity")
+    op.drop_index("ix_tag_pair_counts_tag_b", table_name="tag_pair_counts")
+    for table in ("user_tag_stats", "tag_similarity", "tag_counts", "tag_pair_counts"):
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
+
+    for table, text_column, id_column in _TAG_KEY_COLUMNS:
+        op.add_column(table, sa.Column(id_column, sa.SmallInteger(), nullable=True))
+        op.execute(
+            sa.text(
+                f"""
+                UPDATE {table} AS target
+                SET {id_column} = t.id
+                FROM tags AS t
+                WHERE t.name = btrim(target.{text_column})
+                """
+            )
+        )
+        op.execute(sa.text(f"DELETE FROM {table} WHERE {id_column} IS NULL"))
+        op.alter_column(table, id_column, nullable=False)
+        op.drop_column(table, text_column)
+        op.create_foreign_key(f"{table}_{id_column}_fkey", table, "tags", [id_column], ["id"])
+
+    # Pair keys were ordered by name; re-order them by id.
+    op.execute(
+        sa.text(
+            """
+            UPDATE tag_pair_counts
+            SET tag_a_id = tag_b_id, tag_b_id = tag_a_id
+            WHERE tag_a_id > tag_b_id
+            """
+        )
+    )
+
+    op.create_primary_key("user_tag_stats_pkey", "user_tag_stats", ["user_id", "tag_id"])
+    op.create_primary_key("tag_similarity_pkey", "tag_similarity", ["source_tag_id", "related_tag_id"])
+    op.create_primary_key("tag_counts_pkey", "tag_counts", ["tag_id"])
+    op.create_primary_key("tag_pair_counts_pkey", "tag_pair_counts", ["tag_a_id", "tag_b_id"])
+    op.create_check_constraint("ck_tag_similarity_no_self", "tag_similarity", "source_tag_id <> related_tag_id")
+    op.create_check_constraint("ck_tag_pair_counts_ordered", "tag_pair_counts", "tag_a_id < tag_b_id")
+    op.create_index("ix_tag_similarity_related_tag_id", "tag_similarity", ["related_tag_id"], unique=False)
+    op.create_index("ix_tag_pair_counts_tag_b_id", "tag_pair_counts", ["tag_b_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tag_pair_counts_tag_b_id", table_name="tag_pair_counts")
+    op.drop_index("ix_tag_similarity_related_tag_id", table_name="tag_similarity")
+    op.drop_constraint("ck_tag_pair_counts_ordered", "tag_pair_counts", type_="check")
+    op.drop_constraint("ck_tag_similarity_no_self", "tag_similarity", type_="check")
+    for table in ("user_tag_stats", "tag_similarity", "tag_counts", "tag_pair_counts"):
+        op.drop_constraint(f"{table}_pkey", table, type_="primary")
+
+    for table, text_column, id_column in _TAG_KEY_COLUMNS:
+        collation = "C" if table in {"tag_counts", "tag_pair_counts"} else None
+        op.add_column(table, sa.Column(text_column, sa.String(collation=collation), nullable=True))
+        op.execute(
+            sa.text(
+                f"""
+                UPDATE {table} AS target
+                SET {text_column} = t.name
+                FROM tags AS t
+                WHERE t.id = target.{id_column}
+                """
+            )
+        )
+        op.alter_column(table, text_column, nullable=False)
+        op.drop_constraint(f"{table}_{id_column}_fkey", table, type_="foreignkey")
+        op.drop_column(table, id_column)
+
+    op.execute(
+        sa.text(
+            """
+            UPDATE tag_pair_counts
+            SET tag_a = tag_b, tag_b = tag_a
+            WHERE tag_a > tag_b
+            """
+        )
+    )
+
+    op.create_primary_key("user_tag_stats_pkey", "user_tag_stats", ["user_id", "tag"])
+    op.create_primary_key("tag_similarity_pkey", "tag_similarity", ["source_tag", "related_tag"])
+    op.create_primary_key("tag_counts_pkey", "tag_counts", ["tag"])
+    op.create_primary_key("tag_pair_counts_pkey", "tag_pair_counts", ["tag_a", "tag_b"])
+    op.create_check_constraint("ck_tag_similarity_no_self", "tag_similarity", "source_tag <> related_tag")
+    op.create_check_constraint("ck_tag_pair_counts_ordered", "tag_pair_counts", "tag_a < tag_b")
+    op.create_index("ix_tag_similarity_related_tag", "tag_similarity", ["related_tag"], unique=False)
+    op.create_index("ix_tag_pair_counts_tag_b", "tag_pair_counts", ["tag_b"], unique=False)
+
+    op.drop_index("ix_anime_tag_ids_gin", table_name="anime")
+    op.drop_column("anime", "tag_ids")
+    op.drop_table("tags")
@@ -0,0 +1,140 @@
+import hmac
+import os
+import re
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import get_settings
+from app.db.query_metrics import collect_query_metrics
+from app.services.metrics import HTTP_REQUEST_DURATION
+from app.services.sampling_profiler import SamplingProfiler
+
+_PROFILE_NAME_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+
+
+def _route_template(scope: Scope) -> str | None:
+    # The router stores the matched route in the scope before the endpoint
+    # runs; there is none before that or on a 404. The route's own path
+    # excludes the prefixes of the routers it was included through, so
+    # recover them from the part of the request path it did not match.
+    path = scope["path"]
+    route = scope.get("route")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return None
+    for index in range(len(path)):
+        if path[index] == "/" and path_regex.match(path[index:]):
+            return path[:index] + route.path
+    return None
+
+
+def _route_label(scope: Scope) -> str:
+    return f'{scope["method"]} {_route_template(scope) or scope["path"]}'
+
+
+class QueryMetricsMiddleware:
+    """Collect per-request SQL metrics (see app/db/query_metrics.py) labelled with the route."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with collect_query_metrics(lambda: _route_label(scope)):
+            await self.app(scope, receive, send)
+
+
+class RequestMetricsMiddleware:
+    """Observe each HTTP request's latency in the per-route Prometheus histogram."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Unmatched paths share one series so scanners cannot blow up
+            # the label cardinality.
+            HTTP_REQUEST_DURATION.labels(
+                method=scope["method"],
+                route=_route_template(scope) or "unmatched",
+                status=status,
+            ).observe(time.perf_counter() - started)
+
+
+def _profiling_requested(scope: Scope) -> bool:
+    settings = get_settings()
+    if not settings.request_profiling_enabled:
+        return False
+    value = Headers(scope=scope).get("x-profile")
+    if value is None or not settings.request_profiling_token:
+        return False
+    return hmac.compare_digest(value.encode("utf-8"), settings.request_profiling_token.encode("utf-8"))
+
+
+class RequestProfilingMiddleware:
+    """Profile requests that ask for it with X-Profile (see Settings.request_profiling_*).
+
+    The profile is a folded-stack file (see SamplingProfiler) written to
+    REQUEST_PROFILING_DIR and named in the X-Profile-Path response header.
+    One request per worker is profiled at a time; others run unprofiled.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profiling_requested(scope) or not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        profiler = SamplingProfiler(interval_seconds=settings.request_profiling_interval_ms / 1000)
+        stopped = False
+
+        async def send_with_profile(message: Message) -> None:
+            nonlocal stopped
+            if message["type"] == "http.response.start" and not stopped:
+                profiler.stop()
+                stopped = True
+                path = await run_in_threadpool(self._write_profile, scope, profiler, settings.request_profiling_dir)
+                message["headers"] = [*message.get("headers", []), (b"x-profile-path", path.encode("utf-8"))]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if not stopped:
+                profiler.stop()
+            self._lock.release()
+
+    @staticmethod
+    def _write_profile(scope: Scope, profiler: SamplingProfiler, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        route = _PROFILE_NAME_UNSAFE_RE.sub("_", _route_template(scope) or scope["path"]).strip("_") or "root"
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{scope["method"]}-{route}.folded'
+        path = os.path.join(directory, name)
+        profiler.write_folded(path)
+        return path
@@ -4,6 +4,8 @@ from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from app.api.deps import get_db
 from app.db.models.anime import Anime
+from app.db.repositories.tag_similarity import apply_anime_tag_changes
+from app.db.repositories.tags import get_or_create_tag_ids, tag_ids_for_names
 from app.schemas.anime import AnimeRead, AnimeCreate
 
 router = APIRouter(prefix="/anime", tags=["Anime"])
@@ -26,7 +28,10 @@ def create_anime(payload: AnimeCreate, db: Session=Depends(get_db)):
         raise HTTPException(status_code=409, detail="Anime already exists")
     
     anime = Anime(**payload.model_dump())
+    anime_tags = list(anime.tags or [])
+    anime.tag_ids = tag_ids_for_names(anime_tags, get_or_create_tag_ids(db, anime_tags))
     db.add(anime)
+    apply_anime_tag_changes(db, [([], anime.tag_ids)])
 
     try:
         db.commit()
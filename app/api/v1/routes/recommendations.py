@@ -1,19 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.db.models.user import User
+from app.services.memory_report import memory_report_if_enabled
+from app.services.metrics import observe_recommendation_stages
 from app.services.recommend_for_user import recommend_for_user
-from app.schemas.recommendations import RecommendationItem
+from app.services.stage_timing import collect_stage_timings
+from app.schemas.recommendations import RecommendationDebugResponse, RecommendationItem
 
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
-@router.get("/", response_model=list[RecommendationItem])
-def get_recommendations_for_user(user_id: int, db: Session=Depends(get_db)):
+@router.get("/", response_model=list[RecommendationItem] | RecommendationDebugResponse)
+def get_recommendations_for_user(
+    user_id: int,
+    response: Response,
+    debug: bool = False,
+    db: Session=Depends(get_db),
+):
     user = db.get(User, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    items = recommend_for_user(db, user_id)
+    with memory_report_if_enabled(f"recommendations user_id={user_id}"), collect_stage_timings() as timings:
+        items = recommend_for_user(db, user_id)
+    observe_recommendation_stages(timings.stages)
+    response.headers["Server-Timing"] = timings.server_timing_header()
+
+    if debug:
+        return RecommendationDebugResponse(
+            items=items,
+            stages=timings.stages,
+            total_ms=timings.total_ms,
+            query_count=timings.query_count,
+        )
     if not items:
         return []
     return items
@@ -1,34 +1,62 @@
-from collections import Counter, defaultdict
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import closing
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi import Request as HTTPRequest
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import select
 from decimal import Decimal
-from statistics import pstdev
+from tempfile import SpooledTemporaryFile
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
+from urllib.request import Request
 from urllib.error import HTTPError, URLError
+import hashlib
 import json
+import logging
 import os
+import queue
 import re
+import threading
 import time
 from app.api.deps import get_db
 from app.db.models.user import User
 from app.db.models.user_stats import UserStats
 from app.db.models.anime import Anime
 from app.db.models.user_anime_entry import UserAnimeEntry
-from app.db.models.user_tag_stat import UserTagStat
 from app.db.enums import AnimeStatus, AnimeType, EntryStatus, Provider
-from app.schemas.user import UserCreate, UserRead, UserImportMALRequest, UserImportMALResponse
+from app.db.repositories.tag_similarity import apply_anime_tag_changes
+from app.db.repositories.tags import get_or_create_tag_ids, tag_ids_for_names
+from app.schemas.user import (
+    UserCreate,
+    UserRead,
+    UserImportMALRequest,
+    UserImportMALResponse,
+    UserImportMALJobRead,
+)
+from app.services.jikan_rate_limiter import report_jikan_rate_limited, wait_for_jikan_slot
+from app.services.upstream_http import is_jikan_url, jikan_url, mal_url, record_upstream_retry, upstream_urlopen
+from app.services.mal_export import parse_mal_export
+from app.services.mal_import_jobs import enqueue_mal_import, get_mal_import_job, mal_import_job_read
+from app.services.memory_report import enter_memory_stage, memory_report_if_enabled
+from app.services.metrics import record_cache_lookup
+from app.services.user_stats import refresh_user_score_and_tag_stats
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/users", tags=["User"])
 
 _MAL_USERNAME_RE = re.compile(r"^/animelist/([^/]+?)/?$", re.IGNORECASE)
 _MAL_LOAD_PAGE_SIZE = 300
-_JIKAN_MIN_INTERVAL_SECONDS = 0.7
+_MAL_PREFETCH_PAGES_DEFAULT = 2
+_MAL_EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
 _JIKAN_RETRY_BASE_SECONDS = 1.5
 _JIKAN_MAX_RETRIES = 5
-_last_jikan_request_at = 0.0
+
+# Called as progress(stage, counters) while an import runs; used by the async
+# import jobs to publish stage-level progress.
+MalImportProgressCallback = Callable[[str, dict[str, int]], None]
 
 
 def _mal_import_debug_enabled() -> bool:
@@ -52,6 +80,27 @@ def _mal_import_enrichment_mode() -> str:
     return "full"
 
 
+def _mal_import_prefetch_pages() -> int:
+    raw = os.getenv("MAL_IMPORT_PREFETCH_PAGES", "").strip()
+    if not raw:
+        return _MAL_PREFETCH_PAGES_DEFAULT
+    try:
+        value = int(raw)
+    except ValueError:
+        return _MAL_PREFETCH_PAGES_DEFAULT
+    return max(value, 0)
+
+
+def _mal_import_full_refresh() -> bool:
+    value = os.getenv("MAL_IMPORT_FULL_REFRESH", "")
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _mal_import_chunked_commits() -> bool:
+    value = os.getenv("MAL_IMPORT_CHUNKED_COMMITS", "")
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 def _mal_import_enrichment_min_rating() -> float | None:
     raw = os.getenv("MAL_IMPORT_ENRICHMENT_MIN_RATING", "").strip()
     if not raw:
@@ -71,20 +120,6 @@ def _as_float_rating(value: object) -> float | None:
     except (TypeError, ValueError):
         return None
 
-def _is_jikan_url(url: str) -> bool:
-    return urlparse(url).netloc.lower() == "api.jikan.moe"
-
-def _throttle_jikan_requests() -> None:
-    global _last_jikan_request_at
-    elapsed = time.monotonic() - _last_jikan_request_at
-    wait_seconds = _JIKAN_MIN_INTERVAL_SECONDS - elapsed
-    if wait_seconds > 0:
-        time.sleep(wait_seconds)
-
-def _mark_jikan_request_complete() -> None:
-    global _last_jikan_request_at
-    _last_jikan_request_at = time.monotonic()
-
 def _retry_after_seconds(exc: HTTPError) -> float:
     header_value = exc.headers.get("Retry-After") if exc.headers else None
     if not header_value:
@@ -94,7 +129,7 @@ def _retry_after_seconds(exc: HTTPError) -> float:
     except ValueError:
         return 0.0
 
-def _parse_mal_username(value: str) -> str:
+def parse_mal_username(value: str) -> str:
     parsed = urlparse(value)
     if parsed.scheme and parsed.netloc:
         if parsed.netloc.lower() not in {"myanimelist.net", "www.myanimelist.net"}:
@@ -109,27 +144,25 @@ def _parse_mal_username(value: str) -> str:
     return value.strip()
 
 def _fetch_json(url: str) -> object:
-    is_jikan = _is_jikan_url(url)
+    is_jikan = is_jikan_url(url)
     attempts = 0
 
     while True:
         started = time.perf_counter()
         req = Request(url, headers={"User-Agent": "AnimeRecommendations/1.0"})
         if is_jikan:
-            _throttle_jikan_requests()
+            waited = wait_for_jikan_slot()
+            if waited > 0:
+                _mal_import_debug(f"HTTP GET throttled url={url} waited={waited:.2f}s")
 
         try:
             _mal_import_debug(f"HTTP GET start url={url} attempt={attempts + 1}")
-            with urlopen(req, timeout=20) as response:
-                if is_jikan:
-                    _mark_jikan_request_complete()
+            with upstream_urlopen(req, timeout=20, caller="import") as response:
                 payload = json.loads(response.read().decode("utf-8"))
                 elapsed = time.perf_counter() - started
                 _mal_import_debug(f"HTTP GET ok url={url} attempt={attempts + 1} elapsed={elapsed:.2f}s")
                 return payload
         except HTTPError as exc:
-            if is_jikan:
-                _mark_jikan_request_complete()
             elapsed = time.perf_counter() - started
             _mal_import_debug(
                 f"HTTP GET http_error url={url} code={exc.code} attempt={attempts + 1} elapsed={elapsed:.2f}s"
@@ -158,7 +191,10 @@ def _fetch_json(url: str) -> object:
                 _mal_import_debug(
                     f"HTTP GET retrying url={url} reason=429 backoff={backoff:.2f}s next_attempt={attempts + 2}"
                 )
-                time.sleep(backoff)
+                # The backoff is applied to the shared limiter; the next
+                # wait_for_jikan_slot() call sleeps it off for every process.
+                report_jikan_rate_limited(backoff)
+                record_upstream_retry(url, "import", "429")
                 attempts += 1
                 continue
 
@@ -178,6 +214,7 @@ def _fetch_json(url: str) -> object:
                     f"HTTP GET retrying url={url} reason=url_error backoff={backoff:.2f}s next_attempt={attempts + 2}"
                 )
                 time.sleep(backoff)
+                record_upstream_retry(url, "import", "network")
                 attempts += 1
                 continue
             raise HTTPException(status_code=502, detail="Could not reach MAL/Jikan upstream")
@@ -186,6 +223,89 @@ def _fetch_json(url: str) -> object:
             _mal_import_debug(f"HTTP GET invalid_json url={url} attempt={attempts + 1} elapsed={elapsed:.2f}s")
             raise HTTPException(status_code=502, detail="Invalid JSON from MAL/Jikan upstream")
 
+def _mal_list_page_fingerprint(list_data: list) -> str:
+    rows = [
+        [item.get("anime_id"), item.get("status"), item.get("score"), item.get("num_watched_episodes")]
+        for item in list_data
+        if isinstance(item, dict)
+    ]
+    return hashlib.sha1(json.dumps(rows, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def _fetch_mal_list_page(username: str, offset: int) -> list:
+    _mal_import_debug(f"Fetching MAL list page username={username} offset={offset}")
+    list_data = _fetch_json(
+        mal_url(f"/animelist/{username}/load.json?offset={offset}&status=7")
+    )
+    if not isinstance(list_data, list):
+        raise HTTPException(status_code=502, detail="Unexpected MAL list response shape")
+    return list_data
+
+def _iter_mal_list_pages(username: str, prefetch_pages: int) -> Iterator[list]:
+    """Yield load.json pages in order, ending with the first empty page.
+
+    With prefetch_pages > 0 a producer thread fetches ahead into a bounded queue,
+    so the next pages download while the caller is busy with DB work.
+    """
+    if prefetch_pages <= 0:
+        offset = 0
+        while True:
+            list_data = _fetch_mal_list_page(username, offset)
+            yield list_data
+            if not list_data:
+                return
+            offset += _MAL_LOAD_PAGE_SIZE
+
+    fetched: queue.Queue = queue.Queue(maxsize=prefetch_pages)
+    stop = threading.Event()
+
+    def _put(value: object) -> bool:
+        while not stop.is_set():
+            try:
+                fetched.put(value, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        offset = 0
+        try:
+            while not stop.is_set():
+                list_data = _fetch_mal_list_page(username, offset)
+                if not _put(list_data) or not list_data:
+                    return
+                offset += _MAL_LOAD_PAGE_SIZE
+        except BaseException as exc:
+            _put(exc)
+
+    producer = threading.Thread(target=_produce, name=f"mal-prefetch-{username}", daemon=True)
+    producer.start()
+    try:
+        while True:
+            value = fetched.get()
+            if isinstance(value, BaseException):
+                raise value
+            yield value
+            if not value:
+                return
+    finally:
+        stop.set()
+
+def _iter_fetched_mal_list_pages(list_pages: list[list]) -> Iterator[list]:
+    yield from list_pages
+    yield []
+
+def fetch_mal_user_list(username: str) -> tuple[int, list[list]]:
+    """Fetch the MAL user id and every non-empty load.json page for username."""
+    provider_user_id = _fetch_provider_user_id(username)
+    list_pages: list[list] = []
+    with closing(_iter_mal_list_pages(username, _mal_import_prefetch_pages())) as pages:
+        for list_data in pages:
+            if not list_data:
+                break
+            list_pages.append(list_data)
+    return provider_user_id, list_pages
+
 def _extract_mal_id_from_profile(profile_data: object) -> int | None:
     if not isinstance(profile_data, dict):
         return None
@@ -207,7 +327,7 @@ def _extract_mal_id_from_profile(profile_data: object) -> int | None:
     return None
 
 def _fetch_provider_user_id(username: str) -> int:
-    profile_data_basic = _fetch_json(f"https://api.jikan.moe/v4/users/{username}")
+    profile_data_basic = _fetch_json(jikan_url(f"/users/{username}"))
     mal_id = _extract_mal_id_from_profile(profile_data_basic)
     if mal_id is not None:
         return mal_id
@@ -315,6 +435,14 @@ def _extract_tags_from_mal_item(item: dict) -> list[str]:
 
     return _normalize_tags(collected)
 
+def _extract_jikan_anime_tags(data: dict) -> list[str]:
+    tags: list[str] = []
+    tags.extend(_extract_tag_names(data.get("genres")))
+    tags.extend(_extract_tag_names(data.get("themes")))
+    tags.extend(_extract_tag_names(data.get("demographics")))
+    tags.extend(_extract_tag_names(data.get("explicit_genres")))
+    return _normalize_tags(tags)
+
 def _extract_prequel_sequel_mal_ids_from_relations_payload(payload: object) -> list[int]:
     if not isinstance(payload, list):
         return []
@@ -343,7 +471,7 @@ def _extract_prequel_sequel_mal_ids_from_relations_payload(payload: object) -> l
 
 
 def _fetch_jikan_anime_enrichment(provider_anime_id: int) -> dict[str, object]:
-    details = _fetch_json(f"https://api.jikan.moe/v4/anime/{provider_anime_id}")
+    details = _fetch_json(jikan_url(f"/anime/{provider_anime_id}"))
     if not isinstance(details, dict):
         return {
             "tags": [],
@@ -361,11 +489,6 @@ def _fetch_jikan_anime_enrichment(provider_anime_id: int) -> dict[str, object]:
             "related_prequel_sequel_mal_ids": [],
         }
 
-    tags: list[str] = []
-    tags.extend(_extract_tag_names(data.get("genres")))
-    tags.extend(_extract_tag_names(data.get("themes")))
-    tags.extend(_extract_tag_names(data.get("demographics")))
-    tags.extend(_extract_tag_names(data.get("explicit_genres")))
     popularity = data.get("popularity")
     popularity_rank = popularity if isinstance(popularity, int) and popularity > 0 else None
 
@@ -374,17 +497,246 @@ def _fetch_jikan_anime_enrichment(provider_anime_id: int) -> dict[str, object]:
 
     relation_ids = _extract_prequel_sequel_mal_ids_from_relations_payload(data.get("relations"))
     if not relation_ids:
-        relations_payload = _fetch_json(f"https://api.jikan.moe/v4/anime/{provider_anime_id}/relations")
+        relations_payload = _fetch_json(jikan_url(f"/anime/{provider_anime_id}/relations"))
         if isinstance(relations_payload, dict):
             relation_ids = _extract_prequel_sequel_mal_ids_from_relations_payload(relations_payload.get("data"))
 
     return {
-        "tags": _normalize_tags(tags),
+        "tags": _extract_jikan_anime_tags(data),
         "provider_popularity_rank": popularity_rank,
         "provider_member_count": member_count,
         "related_prequel_sequel_mal_ids": relation_ids,
     }
 
+def _fetch_jikan_anime_enrichment_or_default(username: str, provider_anime_id: int) -> dict[str, object]:
+    try:
+        enrichment = _fetch_jikan_anime_enrichment(provider_anime_id)
+        _mal_import_debug(
+            f"Enrichment done username={username} anime_id={provider_anime_id}"
+        )
+        return enrichment
+    except HTTPException:
+        _mal_import_debug(
+            f"Enrichment failed username={username} anime_id={provider_anime_id}; using defaults"
+        )
+        return {
+            "tags": [],
+            "provider_popularity_rank": None,
+            "provider_member_count": None,
+            "related_prequel_sequel_mal_ids": [],
+            "fetch_failed": True,
+        }
+
+# (anime column, list item key) for catalog fields a list item may not carry.
+# MAL XML exports have none of the rating/airing/start-date keys and only the
+# romaji title, so for known anime a missing key keeps the stored value.
+_MAL_ITEM_CATALOG_KEYS = (
+    ("title", "anime_title_eng"),
+    ("provider_rating", "anime_score_val"),
+    ("anime_type", "anime_media_type_string"),
+    ("status", "anime_airing_status"),
+    ("episode_count", "anime_num_episodes"),
+    ("start_year", "anime_start_date_string"),
+)
+
+def _mal_item_anime_updates(item: dict, title: str, anime: Anime | None) -> dict[str, object]:
+    provider_rating = item.get("anime_score_val")
+    rating_decimal = Decimal(str(provider_rating)) if isinstance(provider_rating, (int, float)) else None
+    episode_count_raw = item.get("anime_num_episodes")
+    episode_count = episode_count_raw if isinstance(episode_count_raw, int) and episode_count_raw > 0 else None
+
+    anime_updates = {
+        "title": title,
+        "provider_rating": rating_decimal,
+        "provider_popularity_rank": (anime.provider_popularity_rank if anime is not None else None),
+        "provider_member_count": (anime.provider_member_count if anime is not None else None),
+        "anime_type": _map_anime_type(item.get("anime_media_type_string")),
+        "status": _map_anime_status(item.get("anime_airing_status")),
+        "episode_count": episode_count,
+        "start_year": _extract_year(item.get("anime_start_date_string")),
+        "related_prequel_sequel_mal_ids": (
+            list(anime.related_prequel_sequel_mal_ids or []) if anime is not None else []
+        ),
+    }
+    if anime is not None:
+        for column, item_key in _MAL_ITEM_CATALOG_KEYS:
+            if item_key not in item:
+                anime_updates[column] = getattr(anime, column)
+    return anime_updates
+
+def _mal_item_anime_tags(item: dict, anime: Anime | None) -> list[str]:
+    anime_tags = _extract_tags_from_mal_item(item)
+    if not anime_tags and anime is not None and anime.tags:
+        anime_tags = anime.tags
+    return anime_tags
+
+def _anime_needs_enrichment(enrichment_mode: str, anime_tags: list[str], anime_updates: dict[str, object]) -> bool:
+    if enrichment_mode == "none":
+        return False
+    if enrichment_mode == "relations":
+        return not anime_updates["related_prequel_sequel_mal_ids"]
+    return (
+        not anime_tags
+        or anime_updates["provider_popularity_rank"] is None
+        or anime_updates["provider_member_count"] is None
+        or not anime_updates["related_prequel_sequel_mal_ids"]
+    )
+
+def _skip_enrichment_for_rating(enrichment_min_rating: float | None, anime_updates: dict[str, object]) -> bool:
+    item_provider_rating = _as_float_rating(anime_updates["provider_rating"])
+    return (
+        enrichment_min_rating is not None
+        and item_provider_rating is not None
+        and item_provider_rating <= enrichment_min_rating
+    )
+
+def _insert_mal_anime_if_absent(
+    db: Session,
+    provider_anime_id: int,
+    anime_updates: dict[str, object],
+) -> tuple[Anime, bool]:
+    anime = Anime(
+        provider=Provider.MAL,
+        provider_anime_id=provider_anime_id,
+        **anime_updates,
+    )
+    try:
+        with db.begin_nested():
+            db.add(anime)
+    except IntegrityError:
+        # A concurrent import inserted this anime after our page lookup; keep
+        # its row rather than overwriting it with defaults computed for "new".
+        existing = db.execute(
+            select(Anime).where(
+                Anime.provider == Provider.MAL,
+                Anime.provider_anime_id == provider_anime_id,
+            )
+        ).scalar_one_or_none()
+        if existing is None:
+            raise
+        return existing, False
+    return anime, True
+
+
+def plan_mal_enrichment(
+    db: Session,
+    lists_by_username: dict[str, list[list]],
+    resume_after_pages: dict[str, int] | None = None,
+) -> list[int]:
+    """Return the MAL anime ids a batch of imports would enrich, most shared first.
+
+    Each anime appears once however many of the lists contain it. Pages whose
+    fingerprint matches the user's last import, and the first
+    resume_after_pages[username] pages of a resumed import, are ignored, as
+    run_mal_import will not enrich them either.
+    """
+    enrichment_mode = _mal_import_enrichment_mode()
+    if enrichment_mode == "none" or not lists_by_username:
+        return []
+    enrichment_min_rating = _mal_import_enrichment_min_rating()
+
+    stored_fingerprints_by_username: dict[str, list[str]] = {}
+    if not _mal_import_full_refresh():
+        stored_fingerprints_by_username = {
+            username: list(fingerprints or [])
+            for username, fingerprints in db.execute(
+                select(User.provider_username, UserStats.mal_list_page_fingerprints)
+                .join(UserStats, UserStats.user_id == User.id)
+                .where(User.provider == Provider.MAL, User.provider_username.in_(list(lists_by_username)))
+            ).all()
+        }
+
+    # run_mal_import only honours resume_after_page when pages commit one by one.
+    if not _mal_import_chunked_commits():
+        resume_after_pages = None
+
+    user_counts: Counter[int] = Counter()
+    first_item_by_provider_id: dict[int, tuple[str, dict]] = {}
+    for username, list_pages in lists_by_username.items():
+        stored_page_fingerprints = stored_fingerprints_by_username.get(username, [])
+        resume_after_page = (resume_after_pages or {}).get(username, 0)
+        seen_for_user: set[int] = set()
+        for page_index, list_data in enumerate(list_pages):
+            if page_index < resume_after_page:
+                continue
+            if (
+                page_index < len(stored_page_fingerprints)
+                and stored_page_fingerprints[page_index] == _mal_list_page_fingerprint(list_data)
+            ):
+                continue
+            for item in list_data:
+                if not isinstance(item, dict):
+                    continue
+                provider_anime_id = item.get("anime_id")
+                title = _pick_anime_title(item)
+                if not isinstance(provider_anime_id, int) or title is None or provider_anime_id in seen_for_user:
+                    continue
+                seen_for_user.add(provider_anime_id)
+                user_counts[provider_anime_id] += 1
+                first_item_by_provider_id.setdefault(provider_anime_id, (title, item))
+
+    candidate_ids = sorted(first_item_by_provider_id)
+    anime_by_provider_id: dict[int, Anime] = {}
+    for start in range(0, len(candidate_ids), _MAL_LOAD_PAGE_SIZE):
+        anime_rows = db.execute(
+            select(Anime).where(
+                Anime.provider == Provider.MAL,
+                Anime.provider_anime_id.in_(candidate_ids[start:start + _MAL_LOAD_PAGE_SIZE]),
+            )
+        ).scalars().all()
+        anime_by_provider_id.update({row.provider_anime_id: row for row in anime_rows})
+
+    enrichment_queue: list[int] = []
+    for provider_anime_id, (title, item) in first_item_by_provider_id.items():
+        anime = anime_by_provider_id.get(provider_anime_id)
+        anime_updates = _mal_item_anime_updates(item, title, anime)
+        anime_tags = _mal_item_anime_tags(item, anime)
+        if _anime_needs_enrichment(enrichment_mode, anime_tags, anime_updates) and not _skip_enrichment_for_rating(
+            enrichment_min_rating, anime_updates
+        ):
+            enrichment_queue.append(provider_anime_id)
+
+    def _popularity_key(provider_anime_id: int) -> tuple[int, int, int]:
+        anime = anime_by_provider_id.get(provider_anime_id)
+        member_count = anime.provider_member_count if anime is not None else None
+        return (-user_counts[provider_anime_id], -(member_count or 0), provider_anime_id)
+
+    enrichment_queue.sort(key=_popularity_key)
+    return enrichment_queue
+
+def fetch_mal_anime_enrichment(provider_anime_id: int) -> dict[str, object]:
+    return _fetch_jikan_anime_enrichment_or_default("<batch>", provider_anime_id)
+
+def _report_import_progress(progress: MalImportProgressCallback | None, stage: str, **counters: int) -> None:
+    enter_memory_stage(stage)
+    if progress is None:
+        return
+    progress(stage, counters)
+
+def _commit_anime_tag_changes(db: Session, username: str, anime_tag_changes: list[tuple[list[int], list[int]]]) -> None:
+    """Apply an import's tag count deltas in their own short transaction, after its catalog rows are committed.
+
+    apply_anime_tag_changes takes the global tag_similarity advisory lock.
+    Taking it in the import transaction, after anime rows are already locked,
+    deadlocks against a concurrent import that holds the advisory lock and
+    waits for one of those rows. The deltas of every page go in one call so
+    the lock is taken, and the tag_similarity version moves, once per import.
+    If this transaction fails, or a chunked import stops after committing
+    some pages, the counts drift until
+    import_mal_users.py --rebuild-tag-similarity repairs them.
+    """
+    if not anime_tag_changes:
+        return
+    try:
+        apply_anime_tag_changes(db, anime_tag_changes)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception(
+            "Tag count update failed username=%s; run import_mal_users.py --rebuild-tag-similarity to repair",
+            username,
+        )
+
 @router.get("/by-id/{id}", response_model=UserRead)
 def get_user(id: int, db: Session=Depends(get_db)):
     user = db.execute(select(User).where(User.id == id)).scalar_one_or_none()
@@ -424,302 +776,422 @@ def create_user(payload: UserCreate, db: Session=Depends(get_db)):
 
 @router.post("/import/mal", response_model=UserImportMALResponse)
 def import_mal_list(payload: UserImportMALRequest, db: Session=Depends(get_db)):
-    username = _parse_mal_username(payload.mal_list_url)
+    username = parse_mal_username(payload.mal_list_url)
+    with memory_report_if_enabled(f"import_mal_list {username}"):
+        return run_mal_import(db, username)
+
+@router.post("/import/mal/export", response_model=UserImportMALResponse)
+async def import_mal_export(request: HTTPRequest, username: str, db: Session=Depends(get_db)):
+    """Import a MAL XML list export sent as the raw request body (plain or gzipped).
+
+    username (a MAL list URL or username) names the user to import into and
+    must match the export's user_name. Uses only the export and the local
+    catalog: no MAL or Jikan requests.
+    """
+    requested_username = parse_mal_username(username)
+    with memory_report_if_enabled("import_mal_export"):
+        enter_memory_stage("parsing_export")
+        with SpooledTemporaryFile(max_size=_MAL_EXPORT_SPOOL_BYTES) as body:
+            async for chunk in request.stream():
+                body.write(chunk)
+            body.seek(0)
+            try:
+                export_username, provider_user_id, list_pages = await run_in_threadpool(parse_mal_export, body)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+
+        username = parse_mal_username(export_username)
+        if username.lower() != requested_username.lower():
+            raise HTTPException(status_code=400, detail="Export user_name does not match username")
+        return await run_in_threadpool(
+            run_mal_import,
+            db,
+            username,
+            provider_user_id=provider_user_id,
+            list_pages=list_pages,
+            enrichment_mode="none",
+        )
+
+def run_mal_import(
+    db: Session,
+    username: str,
+    progress: MalImportProgressCallback | None = None,
+    *,
+    provider_user_id: int | None = None,
+    list_pages: list[list] | None = None,
+    enrichment_cache: dict[int, dict[str, object]] | None = None,
+    resume_after_page: int = 0,
+    enrichment_mode: str | None = None,
+) -> UserImportMALResponse:
+    """Import a MAL list into the catalog and the user's entries.
+
+    Bulk imports may pass an already-fetched provider_user_id and list_pages,
+    and an enrichment_cache shared across users so each anime is looked up once.
+    With chunked commits, resume_after_page names the pages an interrupted run
+    already committed; their anime are not enriched again. enrichment_mode
+    overrides MAL_IMPORT_ENRICHMENT_MODE.
+    """
     import_started = time.perf_counter()
-    enrichment_mode = _mal_import_enrichment_mode()
+    if enrichment_mode is None:
+        enrichment_mode = _mal_import_enrichment_mode()
     enrichment_min_rating = _mal_import_enrichment_min_rating()
     _mal_import_debug(f"START username={username}")
     _mal_import_debug(f"Enrichment mode username={username} mode={enrichment_mode}")
     _mal_import_debug(
         f"Enrichment min rating username={username} min_rating={enrichment_min_rating}"
     )
-    _mal_import_debug(f"Fetching provider user id for username={username}")
-    provider_user_id = _fetch_provider_user_id(username)
+    if provider_user_id is None:
+        _mal_import_debug(f"Fetching provider user id for username={username}")
+        _report_import_progress(progress, "fetching_profile")
+        provider_user_id = _fetch_provider_user_id(username)
     _mal_import_debug(f"Resolved provider user id username={username} provider_user_id={provider_user_id}")
 
-    user = db.execute(
-        select(User).where(User.provider == Provider.MAL, User.provider_username == username)
-    ).scalar_one_or_none()
-
-    users_created = 0
-    users_updated = 0
-    if user is None:
-        user = User(
-            provider=Provider.MAL,
-            provider_username=username,
-            provider_user_id=provider_user_id,
+    chunked_commits = _mal_import_chunked_commits()
+    _mal_import_debug(f"Chunked commits username={username} enabled={chunked_commits}")
+    full_refresh = _mal_import_full_refresh()
+    stored_page_fingerprints: list[str] = []
+    if not full_refresh:
+        stored_page_fingerprints = list(
+            db.execute(
+                select(UserStats.mal_list_page_fingerprints)
+                .join(User, User.id == UserStats.user_id)
+                .where(User.provider == Provider.MAL, User.provider_username == username)
+            ).scalar_one_or_none()
+            or []
         )
-        db.add(user)
-        db.flush()
-        db.add(UserStats(user_id=user.id, mean_score=0.0, stddev_score=0.0, rating_count=0))
-        users_created = 1
-    elif user.provider_user_id != provider_user_id:
-        user.provider_user_id = provider_user_id
-        users_updated = 1
 
     pages_fetched = 0
+    pages_skipped = 0
     items_seen = 0
+    items_processed = 0
     anime_created = 0
     anime_updated = 0
     entries_created = 0
     entries_updated = 0
-    anime_enrichment_cache: dict[int, dict[str, object]] = {}
+    anime_enrichment_cache: dict[int, dict[str, object]] = enrichment_cache if enrichment_cache is not None else {}
+    # Entry writes are deferred until every page is through the catalog, so in
+    # chunked mode only catalog rows are committed page by page.
+    entry_updates_by_anime_id: dict[int, dict[str, object]] = {}
+    page_fingerprints: list[str] = []
+    # (old_tag_ids, new_tag_ids) for each anime whose tags changed, applied to
+    # the tag count tables once the import's last commit is done.
+    anime_tag_changes: list[tuple[list[int], list[int]]] = []
+    tag_ids_by_name: dict[str, int] = {}
+
+    if list_pages is not None:
+        page_iterator = _iter_fetched_mal_list_pages(list_pages)
+    else:
+        page_iterator = _iter_mal_list_pages(username, _mal_import_prefetch_pages())
 
     offset = 0
-    while True:
-        page_started = time.perf_counter()
-        _mal_import_debug(f"Fetching MAL list page username={username} offset={offset}")
-        list_data = _fetch_json(
-            f"https://myanimelist.net/animelist/{username}/load.json?offset={offset}&status=7"
-        )
-        if not isinstance(list_data, list):
-            raise HTTPException(status_code=502, detail="Unexpected MAL list response shape")
-
-        if not list_data:
-            _mal_import_debug(f"No more MAL list items username={username} offset={offset}; stopping pagination")
-            break
-
-        pages_fetched += 1
-        items_seen += len(list_data)
-        page_elapsed = time.perf_counter() - page_started
-        _mal_import_debug(
-            f"Fetched page username={username} page={pages_fetched} offset={offset} "
-            f"items={len(list_data)} items_seen={items_seen} elapsed={page_elapsed:.2f}s"
-        )
-
-        for item_index, item in enumerate(list_data, start=1):
-            if not isinstance(item, dict):
-                continue
+    with closing(page_iterator) as pages:
+        while True:
+            page_started = time.perf_counter()
+            _report_import_progress(
+                progress,
+                "fetching_pages",
+                pages_fetched=pages_fetched,
+                items_seen=items_seen,
+                items_processed=items_processed,
+            )
+            list_data = next(pages)
+            if not list_data:
+                _mal_import_debug(f"No more MAL list items username={username} offset={offset}; stopping pagination")
+                break
+
+            pages_fetched += 1
+            items_seen += len(list_data)
+            page_elapsed = time.perf_counter() - page_started
+            _mal_import_debug(
+                f"Received page username={username} page={pages_fetched} offset={offset} "
+                f"items={len(list_data)} items_seen={items_seen} waited={page_elapsed:.2f}s"
+            )
 
-            provider_anime_id = item.get("anime_id")
-            title = _pick_anime_title(item)
-            if not isinstance(provider_anime_id, int) or title is None:
+            page_fingerprint = _mal_list_page_fingerprint(list_data)
+            page_fingerprints.append(page_fingerprint)
+            page_index = pages_fetched - 1
+            # Set when an item is dropped or enriched with defaults; the page
+            # then stores a placeholder fingerprint so the next import redoes it.
+            page_incomplete = False
+            if (
+                page_index < len(stored_page_fingerprints)
+                and stored_page_fingerprints[page_index] == page_fingerprint
+            ):
+                pages_skipped += 1
+                _mal_import_debug(f"Page unchanged username={username} page={pages_fetched}; skipping")
+                offset += _MAL_LOAD_PAGE_SIZE
                 continue
 
-            anime = db.execute(
-                select(Anime).where(
-                    Anime.provider == Provider.MAL,
-                    Anime.provider_anime_id == provider_anime_id,
-                )
-            ).scalar_one_or_none()
-
-            provider_rating = item.get("anime_score_val")
-            rating_decimal = Decimal(str(provider_rating)) if isinstance(provider_rating, (int, float)) else None
-            episode_count_raw = item.get("anime_num_episodes")
-            episode_count = episode_count_raw if isinstance(episode_count_raw, int) and episode_count_raw > 0 else None
-
-            anime_updates = {
-                "title": title,
-                "provider_rating": rating_decimal,
-                "provider_popularity_rank": (anime.provider_popularity_rank if anime is not None else None),
-                "provider_member_count": (anime.provider_member_count if anime is not None else None),
-                "anime_type": _map_anime_type(item.get("anime_media_type_string")),
-                "status": _map_anime_status(item.get("anime_airing_status")),
-                "episode_count": episode_count,
-                "start_year": _extract_year(item.get("anime_start_date_string")),
-                "related_prequel_sequel_mal_ids": (
-                    list(anime.related_prequel_sequel_mal_ids or []) if anime is not None else []
-                ),
-            }
-
-            anime_tags = _extract_tags_from_mal_item(item)
-            if not anime_tags and anime is not None and anime.tags:
-                anime_tags = anime.tags
-            if enrichment_mode == "none":
-                needs_enrichment = False
-            elif enrichment_mode == "relations":
-                needs_enrichment = not anime_updates["related_prequel_sequel_mal_ids"]
-            else:
-                needs_enrichment = (
-                    not anime_tags
-                    or anime_updates["provider_popularity_rank"] is None
-                    or anime_updates["provider_member_count"] is None
-                    or not anime_updates["related_prequel_sequel_mal_ids"]
+            page_items: list[tuple[int, int, str, dict]] = []
+            for item_index, item in enumerate(list_data, start=1):
+                if not isinstance(item, dict):
+                    continue
+
+                provider_anime_id = item.get("anime_id")
+                title = _pick_anime_title(item)
+                if not isinstance(provider_anime_id, int) or title is None:
+                    continue
+                page_items.append((item_index, provider_anime_id, title, item))
+
+            anime_by_provider_id: dict[int, Anime] = {}
+            if page_items:
+                page_anime_rows = db.execute(
+                    select(Anime).where(
+                        Anime.provider == Provider.MAL,
+                        Anime.provider_anime_id.in_([provider_anime_id for _, provider_anime_id, _, _ in page_items]),
+                    )
+                ).scalars().all()
+                anime_by_provider_id = {row.provider_anime_id: row for row in page_anime_rows}
+
+            # Decide up front which anime on this page still need a Jikan lookup so
+            # the enrichment work is an explicit queue (and reportable as progress).
+            page_enrichment_mode = enrichment_mode
+            if chunked_commits and pages_fetched <= resume_after_page:
+                # The interrupted run already committed this page's catalog rows,
+                # enrichment included; keep what is stored.
+                page_enrichment_mode = "none"
+                _mal_import_debug(f"Resumed page username={username} page={pages_fetched}; skipping enrichment")
+
+            enrichment_queue: list[int] = []
+            queued_ids: set[int] = set()
+            for item_index, provider_anime_id, title, item in page_items:
+                if provider_anime_id in anime_enrichment_cache:
+                    record_cache_lookup("import_enrichment", True)
+                    continue
+                if provider_anime_id in queued_ids:
+                    continue
+                anime = anime_by_provider_id.get(provider_anime_id)
+                anime_updates = _mal_item_anime_updates(item, title, anime)
+                anime_tags = _mal_item_anime_tags(item, anime)
+                needs_enrichment = _anime_needs_enrichment(page_enrichment_mode, anime_tags, anime_updates)
+                if needs_enrichment and not _skip_enrichment_for_rating(enrichment_min_rating, anime_updates):
+                    record_cache_lookup("import_enrichment", False)
+                    enrichment_queue.append(provider_anime_id)
+                    queued_ids.add(provider_anime_id)
+
+            for queue_index, provider_anime_id in enumerate(enrichment_queue):
+                _report_import_progress(
+                    progress,
+                    "enriching",
+                    pages_fetched=pages_fetched,
+                    items_seen=items_seen,
+                    items_processed=items_processed,
+                    enrichment_queue_depth=len(enrichment_queue) - queue_index,
                 )
-            item_provider_rating = _as_float_rating(anime_updates["provider_rating"])
-            skip_enrichment_for_rating = (
-                enrichment_min_rating is not None
-                and item_provider_rating is not None
-                and item_provider_rating <= enrichment_min_rating
-            )
-
-            if skip_enrichment_for_rating and needs_enrichment:
                 _mal_import_debug(
-                    f"Skipping enrichment username={username} anime_id={provider_anime_id} "
-                    f"provider_rating={item_provider_rating:.2f} threshold={enrichment_min_rating:.2f}"
+                    f"Enrichment fetch username={username} anime_id={provider_anime_id} "
+                    f"page={pages_fetched} queued={queue_index + 1}/{len(enrichment_queue)}"
+                )
+                anime_enrichment_cache[provider_anime_id] = _fetch_jikan_anime_enrichment_or_default(
+                    username,
+                    provider_anime_id,
                 )
 
-            if needs_enrichment and not skip_enrichment_for_rating:
-                enrichment = anime_enrichment_cache.get(provider_anime_id)
-                if enrichment is None:
-                    try:
-                        _mal_import_debug(
-                            f"Enrichment fetch username={username} anime_id={provider_anime_id} "
-                            f"page={pages_fetched} item={item_index}/{len(list_data)}"
-                        )
-                        enrichment = _fetch_jikan_anime_enrichment(provider_anime_id)
-                        _mal_import_debug(
-                            f"Enrichment done username={username} anime_id={provider_anime_id}"
-                        )
-                    except HTTPException:
-                        _mal_import_debug(
-                            f"Enrichment failed username={username} anime_id={provider_anime_id}; using defaults"
+            # Resolve the page's tag names in one batch; only tags from an
+            # enrichment fetched below can still be missing afterwards.
+            page_tag_names = set()
+            for item_index, provider_anime_id, title, item in page_items:
+                page_tag_names.update(_mal_item_anime_tags(item, anime_by_provider_id.get(provider_anime_id)))
+                page_tag_names.update((anime_enrichment_cache.get(provider_anime_id) or {}).get("tags") or [])
+            page_tag_names.difference_update(tag_ids_by_name)
+            tag_ids_by_name.update(get_or_create_tag_ids(db, list(page_tag_names)))
+
+            # Write in provider id order so concurrent imports take row locks on
+            # shared anime rows in the same order.
+            for item_index, provider_anime_id, title, item in sorted(page_items, key=lambda page_item: page_item[1]):
+                anime = anime_by_provider_id.get(provider_anime_id)
+                anime_updates = _mal_item_anime_updates(item, title, anime)
+                if anime is None and anime_updates["status"] is None:
+                    # anime.status is NOT NULL; an export item for an anime the
+                    # catalog does not know yet has no airing status to store.
+                    _mal_import_debug(
+                        f"Skipping item username={username} anime_id={provider_anime_id}; "
+                        "not in catalog and no airing status"
+                    )
+                    page_incomplete = True
+                    continue
+                anime_tags = _mal_item_anime_tags(item, anime)
+                needs_enrichment = _anime_needs_enrichment(page_enrichment_mode, anime_tags, anime_updates)
+                skip_enrichment_for_rating = _skip_enrichment_for_rating(enrichment_min_rating, anime_updates)
+
+                if skip_enrichment_for_rating and needs_enrichment:
+                    _mal_import_debug(
+                        f"Skipping enrichment username={username} anime_id={provider_anime_id} "
+                        f"provider_rating={_as_float_rating(anime_updates['provider_rating']):.2f} "
+                        f"threshold={enrichment_min_rating:.2f}"
+                    )
+
+                if needs_enrichment and not skip_enrichment_for_rating:
+                    enrichment = anime_enrichment_cache.get(provider_anime_id)
+                    if enrichment is None:
+                        enrichment = _fetch_jikan_anime_enrichment_or_default(username, provider_anime_id)
+                        anime_enrichment_cache[provider_anime_id] = enrichment
+                    if enrichment.get("fetch_failed"):
+                        page_incomplete = True
+
+                    if page_enrichment_mode == "full" and not anime_tags:
+                        anime_tags = list(enrichment.get("tags") or [])
+                    if page_enrichment_mode == "full" and anime_updates["provider_popularity_rank"] is None:
+                        anime_updates["provider_popularity_rank"] = enrichment.get("provider_popularity_rank")
+                    if page_enrichment_mode == "full" and anime_updates["provider_member_count"] is None:
+                        anime_updates["provider_member_count"] = enrichment.get("provider_member_count")
+                    if not anime_updates["related_prequel_sequel_mal_ids"]:
+                        anime_updates["related_prequel_sequel_mal_ids"] = list(
+                            enrichment.get("related_prequel_sequel_mal_ids") or []
                         )
-                        enrichment = {
-                            "tags": [],
-                            "provider_popularity_rank": None,
-                            "provider_member_count": None,
-                            "related_prequel_sequel_mal_ids": [],
-                        }
-                    anime_enrichment_cache[provider_anime_id] = enrichment
-
-                if enrichment_mode == "full" and not anime_tags:
-                    anime_tags = list(enrichment.get("tags") or [])
-                if enrichment_mode == "full" and anime_updates["provider_popularity_rank"] is None:
-                    anime_updates["provider_popularity_rank"] = enrichment.get("provider_popularity_rank")
-                if enrichment_mode == "full" and anime_updates["provider_member_count"] is None:
-                    anime_updates["provider_member_count"] = enrichment.get("provider_member_count")
-                if not anime_updates["related_prequel_sequel_mal_ids"]:
-                    anime_updates["related_prequel_sequel_mal_ids"] = list(
-                        enrichment.get("related_prequel_sequel_mal_ids") or []
+                anime_updates["tags"] = anime_tags
+                missing_tag_names = [tag for tag in anime_tags if tag not in tag_ids_by_name]
+                if missing_tag_names:
+                    tag_ids_by_name.update(get_or_create_tag_ids(db, missing_tag_names))
+                anime_updates["tag_ids"] = tag_ids_for_names(anime_tags, tag_ids_by_name)
+
+                if anime is None:
+                    anime, created = _insert_mal_anime_if_absent(db, provider_anime_id, anime_updates)
+                    anime_by_provider_id[provider_anime_id] = anime
+                    if created:
+                        anime_created += 1
+                        anime_tag_changes.append(([], list(anime.tag_ids or [])))
+                else:
+                    if anime.tag_ids != anime_updates["tag_ids"]:
+                        anime_tag_changes.append((list(anime.tag_ids or []), list(anime_updates["tag_ids"])))
+                    changed = False
+                    for key, value in anime_updates.items():
+                        if getattr(anime, key) != value:
+                            setattr(anime, key, value)
+                            changed = True
+                    if changed:
+                        anime_updated += 1
+
+                entry_updates_by_anime_id[anime.id] = {
+                    "status": _map_entry_status(item.get("status")),
+                    "score": Decimal(str(item.get("score", 0))) if isinstance(item.get("score"), (int, float)) else None,
+                    "progress": item.get("num_watched_episodes") if isinstance(item.get("num_watched_episodes"), int) else None,
+                }
+
+                items_processed += 1
+                if items_processed % 50 == 0:
+                    _mal_import_debug(
+                        f"Processed page progress username={username} page={pages_fetched} "
+                        f"items_processed={items_processed}"
+                    )
+                    _report_import_progress(
+                        progress,
+                        "processing",
+                        pages_fetched=pages_fetched,
+                        items_seen=items_seen,
+                        items_processed=items_processed,
                     )
-            anime_updates["tags"] = anime_tags
 
-            if anime is None:
-                anime = Anime(
-                    provider=Provider.MAL,
-                    provider_anime_id=provider_anime_id,
-                    **anime_updates,
-                )
-                db.add(anime)
-                db.flush()
-                anime_created += 1
-            else:
-                changed = False
-                for key, value in anime_updates.items():
-                    if getattr(anime, key) != value:
-                        setattr(anime, key, value)
-                        changed = True
-                if changed:
-                    anime_updated += 1
-
-            entry = db.execute(
-                select(UserAnimeEntry).where(
-                    UserAnimeEntry.user_id == user.id,
-                    UserAnimeEntry.anime_id == anime.id,
-                )
-            ).scalar_one_or_none()
+            if page_incomplete:
+                _mal_import_debug(f"Page incomplete username={username} page={pages_fetched}; not fingerprinting")
+                page_fingerprints[page_index] = ""
 
-            entry_updates = {
-                "status": _map_entry_status(item.get("status")),
-                "score": Decimal(str(item.get("score", 0))) if isinstance(item.get("score"), (int, float)) else None,
-                "progress": item.get("num_watched_episodes") if isinstance(item.get("num_watched_episodes"), int) else None,
-            }
-
-            if entry is None:
-                entry = UserAnimeEntry(user_id=user.id, anime_id=anime.id, **entry_updates)
-                db.add(entry)
-                entries_created += 1
-            else:
-                changed = False
-                for key, value in entry_updates.items():
-                    if getattr(entry, key) != value:
-                        setattr(entry, key, value)
-                        changed = True
-                if changed:
-                    entries_updated += 1
-
-            if item_index % 50 == 0:
-                _mal_import_debug(
-                    f"Processed page progress username={username} page={pages_fetched} "
-                    f"item={item_index}/{len(list_data)}"
+            if chunked_commits:
+                try:
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()
+                    _mal_import_debug(f"Page commit failed username={username} page={pages_fetched} reason=IntegrityError")
+                    raise HTTPException(status_code=409, detail="Import failed due to conflicting data")
+                # Drop the committed catalog rows from the identity map so peak
+                # memory tracks one page rather than the whole list.
+                db.expunge_all()
+                _mal_import_debug(f"Page commit ok username={username} page={pages_fetched}")
+                _report_import_progress(
+                    progress,
+                    "page_committed",
+                    pages_fetched=pages_fetched,
+                    items_seen=items_seen,
+                    items_processed=items_processed,
                 )
 
-        offset += _MAL_LOAD_PAGE_SIZE
+            offset += _MAL_LOAD_PAGE_SIZE
+
+    _report_import_progress(
+        progress,
+        "writing_entries",
+        pages_fetched=pages_fetched,
+        items_seen=items_seen,
+        items_processed=items_processed,
+    )
+    user = db.execute(
+        select(User).where(User.provider == Provider.MAL, User.provider_username == username)
+    ).scalar_one_or_none()
 
-    _mal_import_debug(f"Computing score stats username={username}")
-    user_scores = db.execute(
-        select(UserAnimeEntry.score).where(
-            UserAnimeEntry.user_id == user.id,
-            UserAnimeEntry.score.is_not(None),
-            UserAnimeEntry.score > 0,
+    users_created = 0
+    users_updated = 0
+    if user is None:
+        user = User(
+            provider=Provider.MAL,
+            provider_username=username,
+            provider_user_id=provider_user_id,
         )
-    ).scalars().all()
-    score_values = [float(score) for score in user_scores]
+        db.add(user)
+        db.flush()
+        db.add(UserStats(user_id=user.id, mean_score=0.0, stddev_score=0.0, rating_count=0))
+        users_created = 1
+    elif user.provider_user_id != provider_user_id:
+        user.provider_user_id = provider_user_id
+        users_updated = 1
 
-    if score_values:
-        mean_score = round(sum(score_values) / len(score_values), 4)
-        stddev_score = round(pstdev(score_values), 4) if len(score_values) > 1 else 0.0
-        rating_count = len(score_values)
-    else:
-        mean_score = 0.0
-        stddev_score = 0.0
-        rating_count = 0
-
-    stats = db.execute(select(UserStats).where(UserStats.user_id == user.id)).scalar_one_or_none()
-    if stats is None:
-        stats = UserStats(user_id=user.id, mean_score=mean_score, stddev_score=stddev_score, rating_count=rating_count)
-        db.add(stats)
-        users_updated += 1
-    elif (
-        stats.mean_score != mean_score
-        or stats.stddev_score != stddev_score
-        or stats.rating_count != rating_count
-    ):
-        stats.mean_score = mean_score
-        stats.stddev_score = stddev_score
-        stats.rating_count = rating_count
-        users_updated += 1
-
-    user_entries = db.execute(
-        select(UserAnimeEntry).where(UserAnimeEntry.user_id == user.id)
-    ).scalars().all()
-    for user_entry in user_entries:
-        if user_entry.score is None or user_entry.score <= 0:
-            calculated_z_score = None
-        elif stddev_score > 0:
-            calculated_z_score = round((float(user_entry.score) - mean_score) / stddev_score, 4)
+    existing_entries_by_anime_id = {
+        entry.anime_id: entry
+        for entry in db.execute(
+            select(UserAnimeEntry).where(UserAnimeEntry.user_id == user.id)
+        ).scalars().all()
+    }
+    for anime_id, entry_updates in entry_updates_by_anime_id.items():
+        entry = existing_entries_by_anime_id.get(anime_id)
+        if entry is None:
+            entry = UserAnimeEntry(user_id=user.id, anime_id=anime_id, **entry_updates)
+            db.add(entry)
+            entries_created += 1
         else:
-            calculated_z_score = 0.0
-
-        if user_entry.z_score != calculated_z_score:
-            user_entry.z_score = calculated_z_score
-
-    tag_counts: Counter[str] = Counter()
-    tag_z_score_counts: Counter[str] = Counter()
-    tag_z_score_sums: defaultdict[str, float] = defaultdict(float)
-    user_entries_with_anime = db.execute(
-        select(UserAnimeEntry, Anime)
-        .join(Anime, Anime.id == UserAnimeEntry.anime_id)
-        .where(UserAnimeEntry.user_id == user.id)
-    ).all()
-    _mal_import_debug(
-        f"Building tag stats username={username} user_entries={len(user_entries)} joined_entries={len(user_entries_with_anime)}"
+            changed = False
+            for key, value in entry_updates.items():
+                if getattr(entry, key) != value:
+                    setattr(entry, key, value)
+                    changed = True
+            if changed:
+                entries_updated += 1
+    db.flush()
+
+    # Every page matched the stored fingerprints, so entries (and therefore
+    # z-scores and tag stats) are exactly what the last import left behind.
+    stats_unchanged = (
+        not full_refresh
+        and users_created == 0
+        and users_updated == 0
+        and pages_skipped == pages_fetched
+        and len(stored_page_fingerprints) == pages_fetched
     )
-    for user_entry, anime in user_entries_with_anime:
-        for tag in _normalize_tags(anime.tags or []):
-            tag_counts[tag] += 1
-            if user_entry.z_score is not None:
-                tag_z_score_counts[tag] += 1
-                tag_z_score_sums[tag] += float(user_entry.z_score)
-
-    db.execute(delete(UserTagStat).where(UserTagStat.user_id == user.id))
-    for tag, entry_count in tag_counts.items():
-        z_score_count = tag_z_score_counts[tag]
-        avg_z_score = round(tag_z_score_sums[tag] / z_score_count, 4) if z_score_count > 0 else None
-        db.add(
-            UserTagStat(
-                user_id=user.id,
-                tag=tag,
-                entry_count=entry_count,
-                z_score_count=z_score_count,
-                avg_z_score=avg_z_score,
-            )
+    if stats_unchanged:
+        _mal_import_debug(f"List unchanged username={username}; skipping score and tag stats")
+    else:
+        _report_import_progress(
+            progress,
+            "computing_stats",
+            pages_fetched=pages_fetched,
+            items_seen=items_seen,
+            items_processed=items_processed,
         )
-
+        _mal_import_debug(f"Computing score and tag stats username={username}")
+        stats, stats_changed = refresh_user_score_and_tag_stats(db, user)
+        if stats_changed:
+            users_updated += 1
+        if list(stats.mal_list_page_fingerprints or []) != page_fingerprints:
+            stats.mal_list_page_fingerprints = page_fingerprints
+
+    _report_import_progress(
+        progress,
+        "committing",
+        pages_fetched=pages_fetched,
+        items_seen=items_seen,
+        items_processed=items_processed,
+    )
     try:
         _mal_import_debug(
-            f"Commit start username={username} pages={pages_fetched} items_seen={items_seen} "
+            f"Commit start username={username} pages={pages_fetched} pages_skipped={pages_skipped} items_seen={items_seen} "
             f"anime_created={anime_created} anime_updated={anime_updated} "
             f"entries_created={entries_created} entries_updated={entries_updated}"
         )
@@ -730,12 +1202,14 @@ def import_mal_list(payload: UserImportMALRequest, db: Session=Depends(get_db)):
         db.rollback()
         _mal_import_debug(f"COMMIT failed username={username} reason=IntegrityError")
         raise HTTPException(status_code=409, detail="Import failed due to conflicting data")
+    _commit_anime_tag_changes(db, username, anime_tag_changes)
 
     return UserImportMALResponse(
         provider=Provider.MAL,
         provider_username=username,
         provider_user_id=provider_user_id,
         pages_fetched=pages_fetched,
+        pages_skipped=pages_skipped,
         items_seen=items_seen,
         users_created=users_created,
         users_updated=users_updated,
@@ -747,3 +1221,16 @@ def import_mal_list(payload: UserImportMALRequest, db: Session=Depends(get_db)):
         stddev_score=user.stddev_score,
         rating_count=user.rating_count,
     )
+
+@router.post("/import/mal/jobs", response_model=UserImportMALJobRead, status_code=202)
+def enqueue_mal_import_job(payload: UserImportMALRequest):
+    username = parse_mal_username(payload.mal_list_url)
+    job, coalesced = enqueue_mal_import(username)
+    return mal_import_job_read(job, coalesced=coalesced)
+
+@router.get("/import/jobs/{job_id}", response_model=UserImportMALJobRead)
+def get_mal_import_job_status(job_id: str):
+    job = get_mal_import_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return mal_import_job_read(job)
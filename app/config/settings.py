@@ -1,5 +1,8 @@
 from functools import lru_cache
-from pydantic import Field
+import os
+import tempfile
+from typing import Literal
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,6 +16,59 @@ class Settings(BaseSettings):
     app_name: str = "AnimeRecommendations"
     database_url: str = Field(..., alias="DATABASE_URL")
     debug: bool = Field(False, alias="DEBUG")
+    redis_url: str | None = Field(None, alias="REDIS_URL")
+    # Fleet-wide spacing between Jikan requests (Jikan allows 60 requests/minute).
+    jikan_min_interval_seconds: float = Field(1.0, alias="JIKAN_MIN_INTERVAL_SECONDS")
+    jikan_rate_limit_lock_path: str = Field(
+        os.path.join(tempfile.gettempdir(), "anime_recs_jikan_rate_limit.lock"),
+        alias="JIKAN_RATE_LIMIT_LOCK_PATH",
+    )
+    # Upstream base URLs; point both at scripts/upstream_standin.py for load tests.
+    jikan_base_url: str = Field("https://api.jikan.moe/v4", alias="JIKAN_BASE_URL")
+    mal_base_url: str = Field("https://myanimelist.net", alias="MAL_BASE_URL")
+    # tag_similarity keeps at most this many related tags per source tag (0 = no cap),
+    # and only pairs at or above the floors below. The floors match what
+    # recommend_for_user reads, so pruned rows were never used for scoring.
+    tag_similarity_top_k: int = Field(25, alias="TAG_SIMILARITY_TOP_K")
+    tag_similarity_min_jaccard: float = Field(0.2, alias="TAG_SIMILARITY_MIN_JACCARD")
+    tag_similarity_min_cooccurrence: int = Field(2, alias="TAG_SIMILARITY_MIN_COOCCURRENCE")
+    # MAL/Jikan traffic: live, record to the cassette, or replay from it (see
+    # app/services/upstream_http.py). The replay knobs only apply to replay.
+    upstream_http_mode: Literal["live", "record", "replay"] = Field("live", alias="UPSTREAM_HTTP_MODE")
+    upstream_cassette_path: str = Field(
+        os.path.join(tempfile.gettempdir(), "anime_recs_upstream.jsonl.gz"),
+        alias="UPSTREAM_CASSETTE_PATH",
+    )
+    upstream_replay_latency_ms: float = Field(0.0, alias="UPSTREAM_REPLAY_LATENCY_MS")
+    # Answer every Nth replayed request with a 429 (0 = never).
+    upstream_replay_429_every: int = Field(0, alias="UPSTREAM_REPLAY_429_EVERY")
+    upstream_replay_retry_after_seconds: float = Field(1.0, alias="UPSTREAM_REPLAY_RETRY_AFTER_SECONDS")
+    # Statements at or above this many ms are logged with the route that ran
+    # them (0 = off); a request or job running the same statement this many
+    # times is logged as a likely N+1 (0 = off).
+    slow_query_threshold_ms: float = Field(250.0, alias="SLOW_QUERY_THRESHOLD_MS")
+    query_repeat_warning_threshold: int = Field(50, alias="QUERY_REPEAT_WARNING_THRESHOLD")
+    # Requests sent with an X-Profile header equal to the token are profiled;
+    # the folded-stack profile is written to the directory and named in the
+    # X-Profile-Path response header. Enabling it without a token is an error.
+    request_profiling_enabled: bool = Field(False, alias="REQUEST_PROFILING_ENABLED")
+    request_profiling_token: str | None = Field(None, alias="REQUEST_PROFILING_TOKEN")
+    request_profiling_dir: str = Field(
+        os.path.join(tempfile.gettempdir(), "anime_recs_profiles"),
+        alias="REQUEST_PROFILING_DIR",
+    )
+    request_profiling_interval_ms: float = Field(5.0, alias="REQUEST_PROFILING_INTERVAL_MS")
+    # Trace allocations (tracemalloc) in MAL imports and recommendations and log
+    # peak memory per stage with the top allocation sites. Slows requests
+    # down considerably; meant for investigating a worker, not for production.
+    memory_report_enabled: bool = Field(False, alias="MEMORY_REPORT_ENABLED")
+    memory_report_top_sites: int = Field(10, alias="MEMORY_REPORT_TOP_SITES")
+
+    @model_validator(mode="after")
+    def _require_request_profiling_token(self) -> "Settings":
+        if self.request_profiling_enabled and not self.request_profiling_token:
+            raise ValueError("REQUEST_PROFILING_ENABLED requires REQUEST_PROFILING_TOKEN")
+        return self
 
 
 @lru_cache
@@ -1,5 +1,5 @@
 from app.db.base import Base
-from sqlalchemy import Integer, String, Text, Enum, Numeric, UniqueConstraint, Index
+from sqlalchemy import Integer, SmallInteger, String, Text, Enum, Numeric, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.enums import Provider, AnimeStatus, AnimeType
@@ -11,6 +11,7 @@ class Anime(Base):
     __table_args__ = (
         UniqueConstraint("provider", "provider_anime_id", name="uq_anime_provider_provider_anime_id"),
         Index("ix_anime_tags_gin", "tags", postgresql_using="gin"),
+        Index("ix_anime_tag_ids_gin", "tag_ids", postgresql_using="gin"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -26,4 +27,6 @@ class Anime(Base):
     episode_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     start_year: Mapped[int | None] = mapped_column(Integer, nullable=True)
     tags: Mapped[list[str]] = mapped_column(ARRAY(Text), nullable=False, default=list)
+    # tags.id of each entry in tags, same order; kept in sync by the writers of tags.
+    tag_ids: Mapped[list[int]] = mapped_column(ARRAY(SmallInteger), nullable=False, default=list)
     related_prequel_sequel_mal_ids: Mapped[list[int]] = mapped_column(ARRAY(Integer), nullable=False, default=list)
@@ -0,0 +1,10 @@
+from app.db.base import Base
+from sqlalchemy import SmallInteger, String, Identity
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id: Mapped[int] = mapped_column(SmallInteger, Identity(), primary_key=True)
+    name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
@@ -0,0 +1,10 @@
+from app.db.base import Base
+from sqlalchemy import ForeignKey, SmallInteger, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class TagCount(Base):
+    __tablename__ = "tag_counts"
+
+    tag_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("tags.id"), primary_key=True)
+    anime_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -0,0 +1,16 @@
+from app.db.base import Base
+from sqlalchemy import ForeignKey, SmallInteger, Integer, CheckConstraint, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class TagPairCount(Base):
+    __tablename__ = "tag_pair_counts"
+
+    __table_args__ = (
+        CheckConstraint("tag_a_id < tag_b_id", name="ck_tag_pair_counts_ordered"),
+        Index("ix_tag_pair_counts_tag_b_id", "tag_b_id"),
+    )
+
+    tag_a_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("tags.id"), primary_key=True)
+    tag_b_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("tags.id"), primary_key=True)
+    cooccurrence_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,5 +1,5 @@
 from app.db.base import Base
-from sqlalchemy import String, Integer, Float, CheckConstraint, Index
+from sqlalchemy import ForeignKey, SmallInteger, Integer, Float, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 
@@ -7,11 +7,11 @@ class TagSimilarity(Base):
     __tablename__ = "tag_similarity"
 
     __table_args__ = (
-        CheckConstraint("source_tag <> related_tag", name="ck_tag_similarity_no_self"),
-        Index("ix_tag_similarity_related_tag", "related_tag"),
+        CheckConstraint("source_tag_id <> related_tag_id", name="ck_tag_similarity_no_self"),
+        Index("ix_tag_similarity_related_tag_id", "related_tag_id"),
     )
 
-    source_tag: Mapped[str] = mapped_column(String, primary_key=True)
-    related_tag: Mapped[str] = mapped_column(String, primary_key=True)
+    source_tag_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("tags.id"), primary_key=True)
+    related_tag_id: Mapped[int] = mapped_column(SmallInteger, ForeignKey("tags.id"), primary_key=True)
     cooccurrence_count: Mapped[int] = mapped_column(Integer, nullable=False)
     jaccard_score: Mapped[float] = mapped_column(Float, nullable=False)
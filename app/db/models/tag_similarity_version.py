@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from app.db.base import Base
+from sqlalchemy import DateTime, Float, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class TagSimilarityVersion(Base):
+    __tablename__ = "tag_similarity_versions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    built_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    top_k: Mapped[int] = mapped_column(Integer, nullable=False)
+    min_jaccard: Mapped[float] = mapped_column(Float, nullable=False)
+    min_cooccurrence_count: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,5 +1,6 @@
 from app.db.base import Base
-from sqlalchemy import ForeignKey, Float, Integer
+from sqlalchemy import ForeignKey, Float, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -10,5 +11,6 @@ class UserStats(Base):
     mean_score: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     stddev_score: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
     rating_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mal_list_page_fingerprints: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False, default=list)
 
     user: Mapped["User"] = relationship(back_populates="stats")
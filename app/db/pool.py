@@ -0,0 +1,31 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.services.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CONNECTIONS_IN_USE
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    DB_POOL_CONNECTIONS_IN_USE.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    DB_POOL_CONNECTIONS_IN_USE.dec()
+
+
+def install_pool_metrics(engine: Engine) -> None:
+    event.listen(engine, "checkout", _on_checkout)
+    event.listen(engine, "checkin", _on_checkin)
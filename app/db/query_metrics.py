@@ -0,0 +1,145 @@
+import logging
+import re
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Fingerprints drop everything that varies between calls of the same query:
+# bound parameters, literals, and the length of IN (...) / VALUES lists. A
+# one-item list collapses like a longer one, and VALUES tuples of one column
+# like wider ones, so every list length shares a fingerprint.
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_RE = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint_statement(statement: str) -> str:
+    fingerprint = _STRING_RE.sub("?", statement)
+    fingerprint = _PARAM_RE.sub("?", fingerprint)
+    fingerprint = _NUMBER_RE.sub("?", fingerprint)
+    fingerprint = _LIST_RE.sub("(...)", fingerprint)
+    fingerprint = _VALUES_RE.sub(r"\1", fingerprint)
+    return _WHITESPACE_RE.sub(" ", fingerprint).strip()
+
+
+class QueryMetrics:
+    """SQL statement count, DB time and fingerprint histogram for one request or job."""
+
+    def __init__(self, route: str | Callable[[], str]) -> None:
+        self._route = route
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.fingerprints: Counter[str] = Counter()
+        self.fingerprint_ms: Counter[str] = Counter()
+
+    @property
+    def route(self) -> str:
+        return self._route() if callable(self._route) else self._route
+
+    def record(self, statement: str, duration_ms: float) -> str:
+        fingerprint = fingerprint_statement(statement)
+        self.query_count += 1
+        self.db_time_ms += duration_ms
+        self.fingerprints[fingerprint] += 1
+        self.fingerprint_ms[fingerprint] += duration_ms
+        return fingerprint
+
+    def repeated_fingerprints(self, threshold: int) -> list[tuple[str, int]]:
+        """Fingerprints run at least threshold times: the usual shape of an N+1."""
+        if threshold <= 0:
+            return []
+        return [(fingerprint, count) for fingerprint, count in self.fingerprints.most_common() if count >= threshold]
+
+
+_current_query_metrics: ContextVar[QueryMetrics | None] = ContextVar("query_metrics", default=None)
+
+
+def current_query_metrics() -> QueryMetrics | None:
+    return _current_query_metrics.get()
+
+
+@contextmanager
+def collect_query_metrics(route: str | Callable[[], str]) -> Iterator[QueryMetrics]:
+    """Attribute statements run in this context to route until the block exits.
+
+    route may be a callable so a label that is only known later (the matched
+    route template of a request) is resolved when it is logged.
+    """
+    metrics = QueryMetrics(route)
+    token = _current_query_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_query_metrics.reset(token)
+        log_query_summary(metrics)
+
+
+def log_query_summary(metrics: QueryMetrics) -> None:
+    logger.debug(
+        "%s: %d queries, %.1f ms in DB, %d distinct",
+        metrics.route,
+        metrics.query_count,
+        metrics.db_time_ms,
+        len(metrics.fingerprints),
+    )
+    for fingerprint, count in metrics.repeated_fingerprints(get_settings().query_repeat_warning_threshold):
+        logger.warning(
+            "%s: statement ran %d times (%.1f ms total), possible N+1: %s",
+            metrics.route,
+            count,
+            metrics.fingerprint_ms[fingerprint],
+            fingerprint,
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_stack = conn.info.get("query_started")
+    if not started_stack:
+        return
+    duration_ms = (time.perf_counter() - started_stack.pop()) * 1000
+
+    metrics = _current_query_metrics.get()
+    if metrics is not None:
+        fingerprint = metrics.record(statement, duration_ms)
+        route = metrics.route
+    else:
+        fingerprint = None
+        route = "-"
+
+    threshold_ms = get_settings().slow_query_threshold_ms
+    if threshold_ms > 0 and duration_ms >= threshold_ms:
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s",
+            duration_ms,
+            route,
+            fingerprint or fingerprint_statement(statement),
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def install_query_metrics(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -28,6 +28,7 @@ def get_anime_metadata_by_ids(db, anime_ids: list[int]):
             Anime.id,
             Anime.title,
             Anime.tags,
+            Anime.tag_ids,
             Anime.provider,
             Anime.provider_anime_id,
             Anime.anime_type,
@@ -43,6 +44,7 @@ def get_anime_metadata_by_ids(db, anime_ids: list[int]):
         anime_id: {
             "title": title,
             "tags": tags or [],
+            "tag_ids": tag_ids or [],
             "provider": provider,
             "provider_anime_id": provider_anime_id,
             "anime_type": anime_type,
@@ -55,6 +57,7 @@ def get_anime_metadata_by_ids(db, anime_ids: list[int]):
             anime_id,
             title,
             tags,
+            tag_ids,
             provider,
             provider_anime_id,
             anime_type,
@@ -75,6 +78,7 @@ def get_anime_metadata_by_mal_ids(db, mal_ids: list[int]):
             Anime.id,
             Anime.title,
             Anime.tags,
+            Anime.tag_ids,
             Anime.provider,
             Anime.provider_anime_id,
             Anime.anime_type,
@@ -94,6 +98,7 @@ def get_anime_metadata_by_mal_ids(db, mal_ids: list[int]):
             "id": anime_id,
             "title": title,
             "tags": tags or [],
+            "tag_ids": tag_ids or [],
             "provider": provider,
             "provider_anime_id": provider_anime_id,
             "anime_type": anime_type,
@@ -106,6 +111,7 @@ def get_anime_metadata_by_mal_ids(db, mal_ids: list[int]):
             anime_id,
             title,
             tags,
+            tag_ids,
             provider,
             provider_anime_id,
             anime_type,
@@ -1,22 +1,35 @@
-from sqlalchemy import select, func
+from collections import Counter, defaultdict
+from itertools import combinations
 
+from sqlalchemy import delete, func, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config.settings import get_settings
+from app.db.models.tag_count import TagCount
+from app.db.models.tag_pair_count import TagPairCount
 from app.db.models.tag_similarity import TagSimilarity
+from app.db.models.tag_similarity_version import TagSimilarityVersion
+
+# Serializes writers of the tag count/similarity tables. Concurrent
+# refreshes would otherwise each delete and re-insert the same similarity
+# rows and collide on the primary key.
+_TAG_SIMILARITY_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('tag_similarity'))"
 
 
 def get_max_related_similarity(
     db,
-    liked_tags: list[str],
-    unknown_tag: str,
+    liked_tag_ids: list[int],
+    unknown_tag_id: int,
     min_cooccurrence_count: int = 2,
 ):
-    if not liked_tags:
+    if not liked_tag_ids:
         return None
 
     return db.execute(
         select(func.max(TagSimilarity.jaccard_score))
         .where(
-            TagSimilarity.source_tag.in_(liked_tags),
-            TagSimilarity.related_tag == unknown_tag,
+            TagSimilarity.source_tag_id.in_(liked_tag_ids),
+            TagSimilarity.related_tag_id == unknown_tag_id,
             TagSimilarity.cooccurrence_count >= min_cooccurrence_count,
         )
     ).scalar_one_or_none()
@@ -24,52 +37,524 @@ def get_max_related_similarity(
 
 def get_max_related_similarity_for_unknown_tags(
     db,
-    liked_tags: list[str],
-    unknown_tags: list[str],
+    liked_tag_ids: list[int],
+    unknown_tag_ids: list[int],
     min_cooccurrence_count: int = 2,
 ):
-    if not liked_tags or not unknown_tags:
+    if not liked_tag_ids or not unknown_tag_ids:
         return {}
 
     rows = db.execute(
         select(
-            TagSimilarity.related_tag,
+            TagSimilarity.related_tag_id,
             func.max(TagSimilarity.jaccard_score),
         )
         .where(
-            TagSimilarity.source_tag.in_(liked_tags),
-            TagSimilarity.related_tag.in_(unknown_tags),
+            TagSimilarity.source_tag_id.in_(liked_tag_ids),
+            TagSimilarity.related_tag_id.in_(unknown_tag_ids),
             TagSimilarity.cooccurrence_count >= min_cooccurrence_count,
         )
-        .group_by(TagSimilarity.related_tag)
+        .group_by(TagSimilarity.related_tag_id)
     ).all()
 
-    return {related_tag: max_score for related_tag, max_score in rows}
+    return {related_tag_id: max_score for related_tag_id, max_score in rows}
 
 
 def get_similarity_scores_for_tag_pairs(
     db,
-    source_tags: list[str],
-    related_tags: list[str],
+    source_tag_ids: list[int],
+    related_tag_ids: list[int],
     min_cooccurrence_count: int = 2,
 ):
-    if not source_tags or not related_tags:
+    if not source_tag_ids or not related_tag_ids:
         return {}
 
     rows = db.execute(
         select(
-            TagSimilarity.source_tag,
-            TagSimilarity.related_tag,
+            TagSimilarity.source_tag_id,
+            TagSimilarity.related_tag_id,
             TagSimilarity.jaccard_score,
         )
         .where(
-            TagSimilarity.source_tag.in_(source_tags),
-            TagSimilarity.related_tag.in_(related_tags),
+            TagSimilarity.source_tag_id.in_(source_tag_ids),
+            TagSimilarity.related_tag_id.in_(related_tag_ids),
             TagSimilarity.cooccurrence_count >= min_cooccurrence_count,
         )
     ).all()
 
     return {
-        (source_tag, related_tag): float(jaccard_score)
-        for source_tag, related_tag, jaccard_score in rows
+        (source_tag_id, related_tag_id): float(jaccard_score)
+        for source_tag_id, related_tag_id, jaccard_score in rows
     }
+
+
+_BEST_RELATED_SIMILARITY_SQL = """
+SELECT a.id, MAX(ts.jaccard_score)
+FROM anime AS a
+CROSS JOIN LATERAL (
+    SELECT tag_id FROM unnest(a.tag_ids) AS tag_id WHERE tag_id = ANY(:liked_tag_ids)
+) AS liked
+CROSS JOIN LATERAL (
+    SELECT tag_id FROM unnest(a.tag_ids) AS tag_id WHERE NOT (tag_id = ANY(:known_tag_ids))
+) AS unknown
+JOIN tag_similarity AS ts
+    ON ts.source_tag_id = liked.tag_id
+   AND ts.related_tag_id = unknown.tag_id
+WHERE a.id = ANY(:anime_ids)
+  AND ts.cooccurrence_count >= :min_cooccurrence_count
+GROUP BY a.id
+"""
+
+
+def get_best_related_similarity_by_anime_ids(
+    db,
+    anime_ids: list[int],
+    liked_tag_ids: list[int],
+    known_tag_ids: list[int],
+    min_cooccurrence_count: int = 2,
+):
+    """Return {anime_id: best similarity} between each anime's liked and unknown tags.
+
+    A tag is liked if it is in liked_tag_ids and unknown if it is not in
+    known_tag_ids. Anime with no scored (liked, unknown) pair are omitted.
+    """
+    if not anime_ids or not liked_tag_ids:
+        return {}
+
+    rows = db.execute(
+        text(_BEST_RELATED_SIMILARITY_SQL),
+        {
+            "anime_ids": list(anime_ids),
+            "liked_tag_ids": list(liked_tag_ids),
+            "known_tag_ids": list(known_tag_ids),
+            "min_cooccurrence_count": min_cooccurrence_count,
+        },
+    ).all()
+
+    return {anime_id: float(best_similarity) for anime_id, best_similarity in rows}
+
+
+_TAG_INSTANCES_CTE = """
+WITH tag_instances AS (
+    SELECT DISTINCT
+        a.id AS anime_id,
+        tag_id
+    FROM anime AS a
+    CROSS JOIN LATERAL unnest(a.tag_ids) AS tag_id
+)
+"""
+
+_RESYNC_TAG_COUNTS_SQL = _TAG_INSTANCES_CTE + """
+INSERT INTO tag_counts (tag_id, anime_count)
+SELECT tag_id, COUNT(*)::integer
+FROM tag_instances
+GROUP BY tag_id
+"""
+
+_RESYNC_TAG_PAIR_COUNTS_SQL = _TAG_INSTANCES_CTE + """
+INSERT INTO tag_pair_counts (tag_a_id, tag_b_id, cooccurrence_count)
+SELECT ti1.tag_id, ti2.tag_id, COUNT(*)::integer
+FROM tag_instances AS ti1
+JOIN tag_instances AS ti2
+    ON ti1.anime_id = ti2.anime_id
+   AND ti1.tag_id < ti2.tag_id
+GROUP BY ti1.tag_id, ti2.tag_id
+"""
+
+# Both directions of every pair, scored from the maintained counts, keeping
+# the top_k related tags per source tag above the floors. {pair_filter} and
+# {source_filter} narrow the work to given source tags for incremental refreshes.
+_TAG_SIMILARITY_ROWS_SQL = """
+WITH pair_scores AS (
+    SELECT
+        pc.tag_a_id,
+        pc.tag_b_id,
+        pc.cooccurrence_count,
+        (
+            pc.cooccurrence_count::double precision
+            / NULLIF((tc_a.anime_count + tc_b.anime_count - pc.cooccurrence_count), 0)
+        ) AS jaccard_score
+    FROM tag_pair_counts AS pc
+    JOIN tag_counts AS tc_a
+        ON tc_a.tag_id = pc.tag_a_id
+    JOIN tag_counts AS tc_b
+        ON tc_b.tag_id = pc.tag_b_id
+    WHERE pc.cooccurrence_count >= :min_cooccurrence_count
+      {pair_filter}
+),
+directed_scores AS (
+    SELECT tag_a_id AS source_tag_id, tag_b_id AS related_tag_id, cooccurrence_count, jaccard_score
+    FROM pair_scores
+    UNION ALL
+    SELECT tag_b_id AS source_tag_id, tag_a_id AS related_tag_id, cooccurrence_count, jaccard_score
+    FROM pair_scores
+),
+ranked_scores AS (
+    SELECT
+        source_tag_id,
+        related_tag_id,
+        cooccurrence_count,
+        jaccard_score,
+        row_number() OVER (
+            PARTITION BY source_tag_id
+            ORDER BY jaccard_score DESC, cooccurrence_count DESC, related_tag_id
+        ) AS similarity_rank
+    FROM directed_scores
+    WHERE jaccard_score >= :min_jaccard
+      {source_filter}
+)
+INSERT INTO {table} (source_tag_id, related_tag_id, cooccurrence_count, jaccard_score)
+SELECT source_tag_id, related_tag_id, cooccurrence_count, jaccard_score
+FROM ranked_scores
+WHERE :top_k <= 0 OR similarity_rank <= :top_k
+"""
+
+# Incremental refreshes add a version row per import; only the recent ones
+# are worth keeping around.
+_TAG_SIMILARITY_VERSIONS_KEPT = 1000
+
+
+def _tag_similarity_build_params() -> dict[str, object]:
+    settings = get_settings()
+    return {
+        "top_k": settings.tag_similarity_top_k,
+        "min_jaccard": settings.tag_similarity_min_jaccard,
+        "min_cooccurrence_count": settings.tag_similarity_min_cooccurrence,
+    }
+
+
+def _record_tag_similarity_version(db, kind: str, row_count: int, params: dict[str, object]) -> int:
+    version_id = db.execute(
+        insert(TagSimilarityVersion)
+        .values(kind=kind, row_count=row_count, **params)
+        .returning(TagSimilarityVersion.id)
+    ).scalar_one()
+    db.execute(
+        delete(TagSimilarityVersion).where(
+            TagSimilarityVersion.id <= version_id - _TAG_SIMILARITY_VERSIONS_KEPT
+        )
+    )
+    return version_id
+
+
+def get_tag_similarity_version(db) -> int | None:
+    """Id of the latest tag_similarity build or refresh; changes whenever the rows do."""
+    return db.execute(select(func.max(TagSimilarityVersion.id))).scalar_one_or_none()
+
+
+def apply_anime_tag_changes(db, changes: list[tuple[list[int], list[int]]]) -> int:
+    """Apply per-anime (old_tag_ids, new_tag_ids) changes to the tag count tables.
+
+    Counts move by deltas and only the similarity rows those deltas can
+    affect are rescored (see _refresh_tag_similarity). Pass ([], tag_ids) for
+    a new anime; callers batch a whole import into one call so the version
+    moves once per import. Returns the number of source tags whose rows changed.
+    """
+    tag_deltas: Counter[int] = Counter()
+    pair_deltas: Counter[tuple[int, int]] = Counter()
+    for old_tag_ids, new_tag_ids in changes:
+        old_tag_set = set(old_tag_ids or [])
+        new_tag_set = set(new_tag_ids or [])
+        if old_tag_set == new_tag_set:
+            continue
+
+        for tag in new_tag_set - old_tag_set:
+            tag_deltas[tag] += 1
+        for tag in old_tag_set - new_tag_set:
+            tag_deltas[tag] -= 1
+
+        old_pairs = set(combinations(sorted(old_tag_set), 2))
+        new_pairs = set(combinations(sorted(new_tag_set), 2))
+        for pair in new_pairs - old_pairs:
+            pair_deltas[pair] += 1
+        for pair in old_pairs - new_pairs:
+            pair_deltas[pair] -= 1
+
+    changed_tags = sorted(tag for tag, delta in tag_deltas.items() if delta)
+    changed_pairs = sorted(pair for pair, delta in pair_deltas.items() if delta)
+    if not changed_tags and not changed_pairs:
+        return 0
+
+    db.execute(text(_TAG_SIMILARITY_LOCK_SQL))
+
+    # Rows are upserted in key order so concurrent writers lock them in the same order.
+    if changed_tags:
+        tag_upsert = pg_insert(TagCount).values(
+            [{"tag_id": tag_id, "anime_count": tag_deltas[tag_id]} for tag_id in changed_tags]
+        )
+        db.execute(
+            tag_upsert.on_conflict_do_update(
+                index_elements=[TagCount.tag_id],
+                set_={"anime_count": TagCount.anime_count + tag_upsert.excluded.anime_count},
+            )
+        )
+        db.execute(delete(TagCount).where(TagCount.tag_id.in_(changed_tags), TagCount.anime_count <= 0))
+
+    if changed_pairs:
+        pair_upsert = pg_insert(TagPairCount).values(
+            [
+                {"tag_a_id": tag_a_id, "tag_b_id": tag_b_id, "cooccurrence_count": pair_deltas[(tag_a_id, tag_b_id)]}
+                for tag_a_id, tag_b_id in changed_pairs
+            ]
+        )
+        db.execute(
+            pair_upsert.on_conflict_do_update(
+                index_elements=[TagPairCount.tag_a_id, TagPairCount.tag_b_id],
+                set_={
+                    "cooccurrence_count": (
+                        TagPairCount.cooccurrence_count + pair_upsert.excluded.cooccurrence_count
+                    )
+                },
+            )
+        )
+        db.execute(
+            delete(TagPairCount).where(
+                TagPairCount.tag_a_id.in_(sorted({tag_a_id for tag_a_id, _ in changed_pairs})),
+                TagPairCount.cooccurrence_count <= 0,
+            )
+        )
+
+    return _refresh_tag_similarity(db, changed_tags, changed_pairs)
+
+
+# Current counts of every pair that touches one of :tag_ids or is one of the
+# (:pair_a_ids[i], :pair_b_ids[i]) pairs, with both tags' anime counts.
+_RESCORED_PAIRS_SQL = """
+SELECT pc.tag_a_id, pc.tag_b_id, pc.cooccurrence_count, tc_a.anime_count, tc_b.anime_count
+FROM tag_pair_counts AS pc
+JOIN tag_counts AS tc_a
+    ON tc_a.tag_id = pc.tag_a_id
+JOIN tag_counts AS tc_b
+    ON tc_b.tag_id = pc.tag_b_id
+WHERE pc.cooccurrence_count >= :min_cooccurrence_count
+  AND (
+      pc.tag_a_id = ANY(CAST(:tag_ids AS integer[]))
+      OR pc.tag_b_id = ANY(CAST(:tag_ids AS integer[]))
+      OR (pc.tag_a_id, pc.tag_b_id) IN (
+          SELECT * FROM unnest(CAST(:pair_a_ids AS integer[]), CAST(:pair_b_ids AS integer[]))
+      )
+  )
+"""
+
+
+def _similarity_rank_key(related_tag_id: int, score: tuple[float, int]) -> tuple[float, int, int]:
+    # Same order as the row_number() in _TAG_SIMILARITY_ROWS_SQL.
+    jaccard_score, cooccurrence_count = score
+    return (-jaccard_score, -cooccurrence_count, related_tag_id)
+
+
+def _refresh_tag_similarity(db, changed_tags: list[int], changed_pairs: list[tuple[int, int]]) -> int:
+    """Bring tag_similarity up to date after the given tag and pair counts moved.
+
+    A tag count feeds the Jaccard score of every pair the tag is in, so those
+    pairs and the changed pairs are rescored and patched into their source
+    tags' rows. Another source tag is only re-ranked from the pair counts
+    when it had a full top-K list and a stored row left it or fell past the
+    old cutoff, since only then can a row that was not stored belong in it.
+    """
+    params = _tag_similarity_build_params()
+    top_k = int(params["top_k"])
+
+    # None marks a pair that no longer qualifies for tag_similarity.
+    rescored: dict[tuple[int, int], tuple[float, int] | None] = {}
+    for tag_a_id, tag_b_id in changed_pairs:
+        rescored[(tag_a_id, tag_b_id)] = None
+        rescored[(tag_b_id, tag_a_id)] = None
+    rows = db.execute(
+        text(_RESCORED_PAIRS_SQL),
+        {
+            "tag_ids": changed_tags,
+            "pair_a_ids": [tag_a_id for tag_a_id, _ in changed_pairs],
+            "pair_b_ids": [tag_b_id for _, tag_b_id in changed_pairs],
+            "min_cooccurrence_count": params["min_cooccurrence_count"],
+        },
+    ).all()
+    for tag_a_id, tag_b_id, cooccurrence_count, anime_count_a, anime_count_b in rows:
+        union_count = anime_count_a + anime_count_b - cooccurrence_count
+        jaccard_score = cooccurrence_count / union_count if union_count else None
+        score = None
+        if jaccard_score is not None and jaccard_score >= params["min_jaccard"]:
+            score = (jaccard_score, cooccurrence_count)
+        rescored[(tag_a_id, tag_b_id)] = score
+        rescored[(tag_b_id, tag_a_id)] = score
+
+    rescored_by_source: defaultdict[int, dict[int, tuple[float, int] | None]] = defaultdict(dict)
+    for (source_tag_id, related_tag_id), score in rescored.items():
+        rescored_by_source[source_tag_id][related_tag_id] = score
+    sources = sorted(rescored_by_source)
+
+    stored_by_source: defaultdict[int, dict[int, tuple[float, int]]] = defaultdict(dict)
+    for source_tag_id, related_tag_id, cooccurrence_count, jaccard_score in db.execute(
+        select(
+            TagSimilarity.source_tag_id,
+            TagSimilarity.related_tag_id,
+            TagSimilarity.cooccurrence_count,
+            TagSimilarity.jaccard_score,
+        ).where(TagSimilarity.source_tag_id.in_(sources))
+    ):
+        stored_by_source[source_tag_id][related_tag_id] = (jaccard_score, cooccurrence_count)
+
+    changed_tag_set = set(changed_tags)
+    rerank_sources: list[int] = []
+    stale_rows: list[tuple[int, int]] = []
+    upsert_rows: list[dict[str, object]] = []
+    for source_tag_id in sources:
+        stored = stored_by_source[source_tag_id]
+        candidates = dict(stored)
+        for related_tag_id, score in rescored_by_source[source_tag_id].items():
+            if score is None:
+                candidates.pop(related_tag_id, None)
+            else:
+                candidates[related_tag_id] = score
+        ranked = sorted(candidates.items(), key=lambda row: _similarity_rank_key(*row))
+        kept = ranked[:top_k] if top_k > 0 else ranked
+
+        # Every qualifying pair of a changed tag was rescored. For other
+        # sources, pairs that were neither stored nor rescored all rank below
+        # the old cutoff, so the patched list is exact unless it ends above it.
+        if top_k > 0 and len(stored) >= top_k and source_tag_id not in changed_tag_set:
+            cutoff = max(_similarity_rank_key(*row) for row in stored.items())
+            if len(kept) < top_k or _similarity_rank_key(*kept[-1]) > cutoff:
+                rerank_sources.append(source_tag_id)
+                continue
+
+        kept_ids = {related_tag_id for related_tag_id, _ in kept}
+        stale_rows.extend(
+            (source_tag_id, related_tag_id) for related_tag_id in sorted(stored) if related_tag_id not in kept_ids
+        )
+        upsert_rows.extend(
+            {
+                "source_tag_id": source_tag_id,
+                "related_tag_id": related_tag_id,
+                "cooccurrence_count": cooccurrence_count,
+                "jaccard_score": jaccard_score,
+            }
+            for related_tag_id, (jaccard_score, cooccurrence_count) in sorted(kept)
+            if stored.get(related_tag_id) != (jaccard_score, cooccurrence_count)
+        )
+
+    row_delta = 0
+    if stale_rows:
+        row_delta -= db.execute(
+            delete(TagSimilarity).where(
+                tuple_(TagSimilarity.source_tag_id, TagSimilarity.related_tag_id).in_(stale_rows)
+            )
+        ).rowcount
+    if upsert_rows:
+        row_delta += sum(
+            1
+            for row in upsert_rows
+            if row["related_tag_id"] not in stored_by_source[row["source_tag_id"]]
+        )
+        similarity_upsert = pg_insert(TagSimilarity).values(upsert_rows)
+        db.execute(
+            similarity_upsert.on_conflict_do_update(
+                index_elements=[TagSimilarity.source_tag_id, TagSimilarity.related_tag_id],
+                set_={
+                    "cooccurrence_count": similarity_upsert.excluded.cooccurrence_count,
+                    "jaccard_score": similarity_upsert.excluded.jaccard_score,
+                },
+            )
+        )
+    if rerank_sources:
+        row_delta -= db.execute(
+            delete(TagSimilarity).where(TagSimilarity.source_tag_id.in_(rerank_sources))
+        ).rowcount
+        row_delta += db.execute(
+            text(
+                _TAG_SIMILARITY_ROWS_SQL.format(
+                    table="tag_similarity",
+                    pair_filter="AND (pc.tag_a_id = ANY(:tag_ids) OR pc.tag_b_id = ANY(:tag_ids))",
+                    source_filter="AND source_tag_id = ANY(:tag_ids)",
+                )
+            ),
+            {"tag_ids": rerank_sources, **params},
+        ).rowcount
+
+    changed_sources = (
+        {source_tag_id for source_tag_id, _ in stale_rows}
+        | {row["source_tag_id"] for row in upsert_rows}
+        | set(rerank_sources)
+    )
+    if not changed_sources:
+        return 0
+
+    # The row count moves by the same delta as the table instead of being
+    # recounted; a missing version row (no build yet) falls back to counting.
+    previous_row_count = db.execute(
+        select(TagSimilarityVersion.row_count).order_by(TagSimilarityVersion.id.desc()).limit(1)
+    ).scalar_one_or_none()
+    if previous_row_count is None:
+        row_count = db.execute(select(func.count()).select_from(TagSimilarity)).scalar_one()
+    else:
+        row_count = previous_row_count + row_delta
+    _record_tag_similarity_version(db, "incremental", row_count, params)
+    return len(changed_sources)
+
+
+def rebuild_tag_similarity(db, lock_timeout_ms: int = 5000) -> dict[str, int]:
+    """Recompute tag counts and tag_similarity from anime.tag_ids and swap it in atomically.
+
+    Rows are built server-side into a staging table that readers never see;
+    the live table is only locked for the drop-and-rename at the end. The
+    caller commits.
+    """
+    db.execute(text(_TAG_SIMILARITY_LOCK_SQL))
+
+    # Re-derive the incrementally maintained counts from the catalog so a
+    # full rebuild also repairs any drift in them.
+    db.execute(delete(TagPairCount))
+    db.execute(delete(TagCount))
+    db.execute(text(_RESYNC_TAG_COUNTS_SQL))
+    db.execute(text(_RESYNC_TAG_PAIR_COUNTS_SQL))
+
+    db.execute(text("DROP TABLE IF EXISTS tag_similarity_staging"))
+    db.execute(
+        text(
+            "CREATE TABLE tag_similarity_staging "
+            "(LIKE tag_similarity INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    params = _tag_similarity_build_params()
+    db.execute(
+        text(_TAG_SIMILARITY_ROWS_SQL.format(table="tag_similarity_staging", pair_filter="", source_filter="")),
+        params,
+    )
+    # Build the indexes after the bulk insert rather than maintaining them row by row.
+    db.execute(
+        text(
+            "ALTER TABLE tag_similarity_staging "
+            "ADD CONSTRAINT tag_similarity_staging_pkey PRIMARY KEY (source_tag_id, related_tag_id)"
+        )
+    )
+    db.execute(
+        text("CREATE INDEX ix_tag_similarity_staging_related_tag_id ON tag_similarity_staging (related_tag_id)")
+    )
+    for column in ("source_tag_id", "related_tag_id"):
+        db.execute(
+            text(
+                f"ALTER TABLE tag_similarity_staging ADD CONSTRAINT tag_similarity_staging_{column}_fkey "
+                f"FOREIGN KEY ({column}) REFERENCES tags (id)"
+            )
+        )
+    stored_rows, unique_tags = db.execute(
+        text("SELECT COUNT(*), COUNT(DISTINCT source_tag_id) FROM tag_similarity_staging")
+    ).one()
+
+    # Give up rather than queue recommendation reads behind the swap if a
+    # long-running reader holds the live table.
+    db.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+    db.execute(text("DROP TABLE tag_similarity"))
+    db.execute(text("ALTER TABLE tag_similarity_staging RENAME TO tag_similarity"))
+    db.execute(text("ALTER TABLE tag_similarity RENAME CONSTRAINT tag_similarity_staging_pkey TO tag_similarity_pkey"))
+    db.execute(text("ALTER INDEX ix_tag_similarity_staging_related_tag_id RENAME TO ix_tag_similarity_related_tag_id"))
+    for column in ("source_tag_id", "related_tag_id"):
+        db.execute(
+            text(
+                f"ALTER TABLE tag_similarity RENAME CONSTRAINT tag_similarity_staging_{column}_fkey "
+                f"TO tag_similarity_{column}_fkey"
+            )
+        )
+    version_id = _record_tag_similarity_version(db, "full", int(stored_rows), params)
+
+    return {"stored_rows": int(stored_rows), "unique_tags": int(unique_tags), "version": version_id}
@@ -0,0 +1,52 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.models.tag import Tag
+
+
+def normalize_tag_name(value: object) -> str | None:
+    if not isinstance(value, str):
+        return None
+    cleaned = value.strip()
+    return cleaned or None
+
+
+def get_or_create_tag_ids(db, names: list[str]) -> dict[str, int]:
+    """Map tag names to tags.id, adding any names not yet in the dictionary."""
+    cleaned_names = sorted({name for name in map(normalize_tag_name, names) if name is not None})
+    if not cleaned_names:
+        return {}
+
+    tag_ids_by_name = dict(
+        db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(cleaned_names))).all()
+    )
+    missing_names = [name for name in cleaned_names if name not in tag_ids_by_name]
+    if missing_names:
+        # Sorted inserts so concurrent imports adding the same new tags wait on
+        # each other instead of deadlocking.
+        db.execute(
+            pg_insert(Tag)
+            .values([{"name": name} for name in missing_names])
+            .on_conflict_do_nothing(index_elements=[Tag.name])
+        )
+        tag_ids_by_name.update(
+            db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(missing_names))).all()
+        )
+    return tag_ids_by_name
+
+
+def tag_ids_for_names(names: list[str], tag_ids_by_name: dict[str, int]) -> list[int]:
+    """Resolve names in order, skipping blanks and repeats, as anime.tag_ids stores them."""
+    tag_ids: list[int] = []
+    for name in names:
+        tag_id = tag_ids_by_name.get(normalize_tag_name(name))
+        if tag_id is not None and tag_id not in tag_ids:
+            tag_ids.append(tag_id)
+    return tag_ids
+
+
+def get_tag_names_by_ids(db, tag_ids: list[int]) -> dict[int, str]:
+    if not tag_ids:
+        return {}
+
+    return dict(db.execute(select(Tag.id, Tag.name).where(Tag.id.in_(tag_ids))).all())
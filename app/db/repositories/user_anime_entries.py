@@ -65,12 +65,12 @@ def get_candidate_shows(db, neighbours: list, user_id: int, z_score_threshold: f
         for anime_id, base_score, support_count in recs
     ]
 
-def get_average_rating_by_tag(db, user_id: int, tag: str):
+def get_average_rating_by_tag(db, user_id: int, tag_id: int):
     average_score = db.execute(
         select(UserTagStat.avg_z_score)
         .where(
             UserTagStat.user_id == user_id,
-            UserTagStat.tag == tag,
+            UserTagStat.tag_id == tag_id,
         )
     ).scalar_one_or_none()
 
@@ -79,14 +79,14 @@ def get_average_rating_by_tag(db, user_id: int, tag: str):
 
 def get_user_tag_preferences(db, user_id: int):
     rows = db.execute(
-        select(UserTagStat.tag, UserTagStat.avg_z_score, UserTagStat.z_score_count)
+        select(UserTagStat.tag_id, UserTagStat.avg_z_score, UserTagStat.z_score_count)
         .where(UserTagStat.user_id == user_id)
     ).all()
 
     return {
-        tag: {
+        tag_id: {
             "avg_z_score": (float(avg_z_score) if avg_z_score is not None else None),
             "z_score_count": z_score_count,
         }
-        for tag, avg_z_score, z_score_count in rows
+        for tag_id, avg_z_score, z_score_count in rows
     }
@@ -1,6 +1,10 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.config.settings import get_settings
+from app.db.pool import InstrumentedQueuePool, install_pool_metrics
+from app.db.query_metrics import install_query_metrics
 
-engine = create_engine(get_settings().database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+engine = create_engine(get_settings().database_url, pool_pre_ping=True, poolclass=InstrumentedQueuePool)
+install_query_metrics(engine)
+install_pool_metrics(engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
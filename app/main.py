@@ -1,7 +1,13 @@
 from fastapi import FastAPI
 from sqlalchemy import text
 from app.db.session import SessionLocal
+from app.api.metrics import router as metrics_router
+from app.api.middleware import QueryMetricsMiddleware, RequestMetricsMiddleware, RequestProfilingMiddleware
 from app.api.v1.router import api_router
 
 app = FastAPI(title="Anime recommendations engine")
-app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
+app.add_middleware(QueryMetricsMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(RequestProfilingMiddleware)
+app.include_router(api_router, prefix="/api/v1")
+app.include_router(metrics_router)
@@ -1,5 +1,18 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class RecommendationItem(BaseModel):
+    anime_id: int
     title: str
-    score: float
\ No newline at end of file
+    score: float
+
+class RecommendationStageTiming(BaseModel):
+    name: str
+    duration_ms: float
+    queries: int
+    details: dict[str, float] = Field(default_factory=dict)
+
+class RecommendationDebugResponse(BaseModel):
+    items: list[RecommendationItem]
+    stages: list[RecommendationStageTiming]
+    total_ms: float
+    query_count: int
@@ -27,6 +27,7 @@ class UserImportMALResponse(BaseModel):
     provider_username: str
     provider_user_id: int
     pages_fetched: int
+    pages_skipped: int = 0
     items_seen: int
     users_created: int
     users_updated: int
@@ -37,3 +38,16 @@ class UserImportMALResponse(BaseModel):
     mean_score: float
     stddev_score: float
     rating_count: int
+
+class UserImportMALJobRead(BaseModel):
+    job_id: str
+    provider_username: str
+    status: str
+    stage: str | None = None
+    pages_fetched: int = 0
+    items_seen: int = 0
+    items_processed: int = 0
+    enrichment_queue_depth: int = 0
+    coalesced: bool = False
+    error: str | None = None
+    result: UserImportMALResponse | None = None
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import fcntl
+import math
+import os
+import time
+from functools import lru_cache
+
+import redis
+from redis.exceptions import RedisError
+
+from app.config.settings import get_settings
+
+
+# Every process (API workers, rq workers, scripts) reserves its Jikan slot from
+# the same shared schedule, so the fleet as a whole stays under the upstream
+# quota instead of each process throttling itself independently.
+REDIS_KEY = "anime_recs:jikan:next_slot_us"
+
+_RESERVE_SLOT_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local interval = tonumber(ARGV[1])
+local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+local slot = math.max(now, next_slot)
+redis.call('SET', KEYS[1], slot + interval, 'PX', math.floor((slot - now + interval) / 1000) + 1000)
+return slot - now
+"""
+
+_PENALIZE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000000 + tonumber(now_parts[2])
+local penalty = tonumber(ARGV[1])
+local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+local blocked_until = math.max(next_slot, now + penalty)
+redis.call('SET', KEYS[1], blocked_until, 'PX', math.floor((blocked_until - now) / 1000) + 1000)
+return blocked_until - now
+"""
+
+
+class FileLockJikanRateLimiter:
+    """Single-host fallback: the next free slot is kept in a flock-protected file."""
+
+    def __init__(self, path: str, min_interval_seconds: float) -> None:
+        self._path = path
+        self._min_interval_seconds = min_interval_seconds
+
+    def _update(self, compute_next_slot) -> float:
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 64).decode("ascii", errors="ignore").strip()
+            try:
+                next_slot = float(raw) if raw else 0.0
+            except ValueError:
+                next_slot = 0.0
+
+            now = time.time()
+            wait_seconds, stored_slot = compute_next_slot(now, next_slot)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{stored_slot:.6f}".encode("ascii"))
+            return wait_seconds
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def reserve(self) -> float:
+        def _reserve(now: float, next_slot: float) -> tuple[float, float]:
+            slot = max(now, next_slot)
+            return slot - now, slot + self._min_interval_seconds
+
+        return self._update(_reserve)
+
+    def penalize(self, seconds: float) -> float:
+        def _penalize(now: float, next_slot: float) -> tuple[float, float]:
+            blocked_until = max(next_slot, now + seconds)
+            return blocked_until - now, blocked_until
+
+        return self._update(_penalize)
+
+
+class RedisJikanRateLimiter:
+    """Multi-host limiter; slot reservation runs as one Lua script on the Redis clock."""
+
+    def __init__(self, client, min_interval_seconds: float, fallback: FileLockJikanRateLimiter) -> None:
+        self._client = client
+        self._min_interval_us = max(int(min_interval_seconds * 1_000_000), 0)
+        self._fallback = fallback
+        self._reserve_script = client.register_script(_RESERVE_SLOT_SCRIPT)
+        self._penalize_script = client.register_script(_PENALIZE_SCRIPT)
+
+    def reserve(self) -> float:
+        try:
+            wait_us = self._reserve_script(keys=[REDIS_KEY], args=[self._min_interval_us])
+        except RedisError:
+            return self._fallback.reserve()
+        return max(int(wait_us), 0) / 1_000_000
+
+    def penalize(self, seconds: float) -> float:
+        penalty_us = max(int(math.ceil(seconds * 1_000_000)), 0)
+        try:
+            wait_us = self._penalize_script(keys=[REDIS_KEY], args=[penalty_us])
+        except RedisError:
+            return self._fallback.penalize(seconds)
+        return max(int(wait_us), 0) / 1_000_000
+
+
+@lru_cache
+def get_jikan_rate_limiter() -> FileLockJikanRateLimiter | RedisJikanRateLimiter:
+    settings = get_settings()
+    fallback = FileLockJikanRateLimiter(
+        settings.jikan_rate_limit_lock_path,
+        settings.jikan_min_interval_seconds,
+    )
+    if not settings.redis_url:
+        return fallback
+
+    client = redis.Redis.from_url(settings.redis_url, socket_timeout=2, socket_connect_timeout=2)
+    try:
+        client.ping()
+    except RedisError:
+        return fallback
+    return RedisJikanRateLimiter(client, settings.jikan_min_interval_seconds, fallback)
+
+
+def wait_for_jikan_slot() -> float:
+    wait_seconds = get_jikan_rate_limiter().reserve()
+    if wait_seconds > 0:
+        time.sleep(wait_seconds)
+    return wait_seconds
+
+
+def report_jikan_rate_limited(backoff_seconds: float) -> float:
+    # Push the shared schedule out so every process backs off together, rather
+    # than each one discovering the 429 on its own next request.
+    return get_jikan_rate_limiter().penalize(backoff_seconds)
@@ -0,0 +1,122 @@
+import gzip
+import xml.etree.ElementTree as ET
+from typing import BinaryIO
+
+# Pages are cut at load.json's page size so the import pipeline treats an
+# export exactly like a list fetched from MAL.
+MAL_EXPORT_PAGE_SIZE = 300
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# my_status is a label in current exports and a numeric code in older ones;
+# both map onto load.json's status codes.
+_MY_STATUS_CODES = {
+    "watching": 1,
+    "completed": 2,
+    "on-hold": 3,
+    "on hold": 3,
+    "dropped": 4,
+    "plan to watch": 6,
+}
+
+
+def _open_export(source: BinaryIO) -> BinaryIO:
+    """Return source, transparently gunzipped; it must support peek() or seek()."""
+    if hasattr(source, "peek"):
+        magic = source.peek(2)[:2]
+    else:
+        magic = source.read(2)
+        source.seek(0)
+    if magic == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    return source
+
+
+def _child_text(element: ET.Element, tag: str) -> str | None:
+    value = element.findtext(tag)
+    if value is None:
+        return None
+    value = value.strip()
+    return value or None
+
+
+def _child_int(element: ET.Element, tag: str) -> int | None:
+    value = _child_text(element, tag)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _my_status_code(value: str | None) -> int | None:
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    return _MY_STATUS_CODES.get(value.lower())
+
+
+def _export_anime_item(element: ET.Element) -> dict[str, object] | None:
+    anime_id = _child_int(element, "series_animedb_id")
+    title = _child_text(element, "series_title")
+    if anime_id is None or title is None:
+        return None
+
+    # Only the keys an export actually carries: catalog fields it lacks
+    # (rating, airing status, start date) are left to what is stored.
+    item: dict[str, object] = {
+        "anime_id": anime_id,
+        "anime_title": title,
+        "status": _my_status_code(_child_text(element, "my_status")),
+        "score": _child_int(element, "my_score") or 0,
+        "num_watched_episodes": _child_int(element, "my_watched_episodes") or 0,
+    }
+    series_type = _child_text(element, "series_type")
+    if series_type is not None:
+        item["anime_media_type_string"] = series_type
+    series_episodes = _child_int(element, "series_episodes")
+    if series_episodes is not None:
+        item["anime_num_episodes"] = series_episodes
+    return item
+
+
+def parse_mal_export(source: BinaryIO) -> tuple[str, int, list[list]]:
+    """Stream-parse a MAL XML list export (optionally gzipped).
+
+    Returns (username, MAL user id, load.json-shaped list pages). Raises
+    ValueError if the document is not a MAL anime list export.
+    """
+    username: str | None = None
+    provider_user_id: int | None = None
+    list_pages: list[list] = []
+    page: list[dict[str, object]] = []
+    root: ET.Element | None = None
+
+    try:
+        for event, element in ET.iterparse(_open_export(source), events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag == "myinfo":
+                username = _child_text(element, "user_name")
+                provider_user_id = _child_int(element, "user_id")
+                root.clear()
+            elif element.tag == "anime":
+                item = _export_anime_item(element)
+                # Drop parsed entries from the tree so memory stays flat.
+                root.clear()
+                if item is None:
+                    continue
+                page.append(item)
+                if len(page) >= MAL_EXPORT_PAGE_SIZE:
+                    list_pages.append(page)
+                    page = []
+    except (ET.ParseError, OSError, EOFError) as exc:
+        raise ValueError(f"Invalid MAL export: {exc}") from exc
+
+    if page:
+        list_pages.append(page)
+    if username is None or provider_user_id is None:
+        raise ValueError("Invalid MAL export: missing myinfo user_name or user_id")
+    return username, provider_user_id, list_pages
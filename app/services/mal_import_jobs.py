@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from fastapi import HTTPException
+from redis import Redis
+from rq import Queue, get_current_job
+from rq.exceptions import DuplicateJobError, NoSuchJobError
+from rq.job import Job, JobStatus
+
+from app.config.settings import get_settings
+from app.db.query_metrics import collect_query_metrics
+from app.db.session import SessionLocal
+from app.services.memory_report import memory_report_if_enabled
+from app.schemas.user import UserImportMALJobRead, UserImportMALResponse
+
+
+MAL_IMPORT_QUEUE_NAME = "mal_import"
+MAL_IMPORT_JOB_TIMEOUT_SECONDS = 6 * 60 * 60
+MAL_IMPORT_RESULT_TTL_SECONDS = 24 * 60 * 60
+_ACTIVE_JOB_STATUSES = {
+    JobStatus.CREATED,
+    JobStatus.QUEUED,
+    JobStatus.STARTED,
+    JobStatus.DEFERRED,
+    JobStatus.SCHEDULED,
+}
+_JOB_ID_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+@lru_cache
+def get_redis_connection() -> Redis:
+    redis_url = get_settings().redis_url
+    if not redis_url:
+        raise HTTPException(status_code=503, detail="Import jobs require REDIS_URL to be configured")
+    return Redis.from_url(redis_url)
+
+
+def get_mal_import_queue() -> Queue:
+    return Queue(MAL_IMPORT_QUEUE_NAME, connection=get_redis_connection())
+
+
+def mal_import_job_id(username: str) -> str:
+    # One job id per username (case-insensitive, like MAL) so concurrent
+    # requests for the same list land on the same job.
+    return "mal-import-" + _JOB_ID_UNSAFE_RE.sub("_", username.strip().lower())
+
+
+def _fetch_job(job_id: str) -> Job | None:
+    try:
+        return Job.fetch(job_id, connection=get_redis_connection())
+    except NoSuchJobError:
+        return None
+
+
+def enqueue_mal_import(username: str) -> tuple[Job, bool]:
+    job_id = mal_import_job_id(username)
+    existing = _fetch_job(job_id)
+    if existing is not None:
+        if existing.get_status() in _ACTIVE_JOB_STATUSES:
+            return existing, True
+        existing.delete()
+
+    try:
+        job = get_mal_import_queue().enqueue_call(
+            run_mal_import_job,
+            args=(username,),
+            job_id=job_id,
+            timeout=MAL_IMPORT_JOB_TIMEOUT_SECONDS,
+            result_ttl=MAL_IMPORT_RESULT_TTL_SECONDS,
+            failure_ttl=MAL_IMPORT_RESULT_TTL_SECONDS,
+            meta={"provider_username": username, "stage": "queued"},
+            unique=True,
+        )
+    except DuplicateJobError:
+        job = _fetch_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=409, detail="Import job changed state concurrently; retry")
+        return job, True
+    return job, False
+
+
+def get_mal_import_job(job_id: str) -> Job | None:
+    if not job_id.startswith("mal-import-"):
+        return None
+    return _fetch_job(job_id)
+
+
+def mal_import_job_read(job: Job, coalesced: bool = False) -> UserImportMALJobRead:
+    meta = job.get_meta(refresh=True)
+    status = job.get_status()
+    result = None
+    if status == JobStatus.FINISHED:
+        return_value = job.return_value()
+        if isinstance(return_value, dict):
+            result = UserImportMALResponse.model_validate(return_value)
+
+    return UserImportMALJobRead(
+        job_id=job.id,
+        provider_username=str(meta.get("provider_username", "")),
+        status=str(getattr(status, "value", status)),
+        stage=meta.get("stage"),
+        pages_fetched=int(meta.get("pages_fetched", 0)),
+        items_seen=int(meta.get("items_seen", 0)),
+        items_processed=int(meta.get("items_processed", 0)),
+        enrichment_queue_depth=int(meta.get("enrichment_queue_depth", 0)),
+        coalesced=coalesced,
+        error=meta.get("error"),
+        result=result,
+    )
+
+
+def run_mal_import_job(username: str) -> dict:
+    # Deferred: the user routes module imports this one to enqueue jobs.
+    from app.api.v1.routes.user import run_mal_import
+
+    job = get_current_job()
+
+    def _publish_progress(stage: str, counters: dict[str, int]) -> None:
+        if job is None:
+            return
+        job.meta["stage"] = stage
+        job.meta["enrichment_queue_depth"] = 0
+        job.meta.update(counters)
+        job.save_meta()
+
+    db = SessionLocal()
+    try:
+        job_label = f"mal_import_job {mal_import_job_id(username)}"
+        with collect_query_metrics(job_label), memory_report_if_enabled(job_label):
+            result = run_mal_import(db, username, progress=_publish_progress)
+    except HTTPException as exc:
+        if job is not None:
+            job.meta["stage"] = "failed"
+            job.meta["error"] = f"{exc.status_code}: {exc.detail}"
+            job.save_meta()
+        raise
+    finally:
+        db.close()
+
+    _publish_progress("done", {})
+    return result.model_dump(mode="json")
@@ -0,0 +1,140 @@
+import json
+import logging
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_GROWTH = 1.1
+_IGNORED_FILES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemoryReport:
+    """Peak traced allocation per stage of one operation, plus its top allocation sites.
+
+    Stages are entered one after another (enter_stage); entering the stage
+    that is already current is a no-op, so a loop can mark its phases on
+    every iteration. Peaks are relative to the memory traced when the report
+    started. Allocation sites come from a snapshot taken at the stage
+    boundary with the most memory still allocated, the closest tracemalloc
+    gets to the peak without snapshotting on every allocation.
+    """
+
+    def __init__(self, label: str, top_sites: int = 10) -> None:
+        self.label = label
+        self.top_sites = top_sites
+        self.stages: dict[str, dict[str, int]] = {}
+        self.peak_bytes = 0
+        self._stage_name = "setup"
+        self._stage_started_bytes = 0
+        self._baseline_bytes = 0
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_bytes = 0
+        self._snapshot_stage: str | None = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._baseline_bytes = tracemalloc.get_traced_memory()[0]
+        self._stage_started_bytes = self._baseline_bytes
+        tracemalloc.reset_peak()
+
+    def enter_stage(self, name: str) -> None:
+        if name == self._stage_name:
+            return
+        self._close_stage()
+        self._stage_name = name
+        self._stage_started_bytes = tracemalloc.get_traced_memory()[0]
+
+    def finish(self) -> None:
+        self._close_stage()
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _close_stage(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        stage = self.stages.setdefault(self._stage_name, {"peak_bytes": 0, "net_bytes": 0, "entered": 0})
+        stage["peak_bytes"] = max(stage["peak_bytes"], peak - self._baseline_bytes)
+        stage["net_bytes"] += current - self._stage_started_bytes
+        stage["entered"] += 1
+        self.peak_bytes = max(self.peak_bytes, peak - self._baseline_bytes)
+        if current > self._snapshot_bytes * _SNAPSHOT_GROWTH:
+            self._snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_FILES)
+            self._snapshot_bytes = current
+            self._snapshot_stage = self._stage_name
+        tracemalloc.reset_peak()
+
+    def top_allocation_sites(self) -> list[dict[str, object]]:
+        if self._snapshot is None:
+            return []
+        return [
+            {
+                "site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in self._snapshot.statistics("lineno")[: self.top_sites]
+        ]
+
+    def as_dict(self) -> dict[str, object]:
+        return {
+            "label": self.label,
+            "peak_bytes": self.peak_bytes,
+            "stages": [{"name": name, **stats} for name, stats in self.stages.items()],
+            "top_sites_stage": self._snapshot_stage,
+            "top_sites": self.top_allocation_sites(),
+        }
+
+
+_current_memory_report: ContextVar[MemoryReport | None] = ContextVar("memory_report", default=None)
+# tracemalloc is process-wide, so only one report can run at a time.
+_report_lock = threading.Lock()
+
+
+@contextmanager
+def collect_memory_report(label: str, top_sites: int = 10) -> Iterator[MemoryReport | None]:
+    """Trace allocations until the block exits; yields None if another report is running."""
+    if not _report_lock.acquire(blocking=False):
+        yield None
+        return
+    report = MemoryReport(label, top_sites)
+    token = _current_memory_report.set(report)
+    report.start()
+    try:
+        yield report
+    finally:
+        report.finish()
+        _current_memory_report.reset(token)
+        _report_lock.release()
+
+
+@contextmanager
+def memory_report_if_enabled(label: str) -> Iterator[MemoryReport | None]:
+    """collect_memory_report when MEMORY_REPORT_ENABLED is set, logging the report at the end."""
+    settings = get_settings()
+    if not settings.memory_report_enabled:
+        yield None
+        return
+    with collect_memory_report(label, settings.memory_report_top_sites) as report:
+        yield report
+    if report is not None:
+        logger.info("Memory report: %s", json.dumps(report.as_dict()))
+
+
+def enter_memory_stage(name: str) -> None:
+    """Mark the start of a stage in the active memory report; a no-op otherwise."""
+    report = _current_memory_report.get()
+    if report is not None:
+        report.enter_stage(name)
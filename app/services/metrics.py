@@ -0,0 +1,86 @@
+import os
+import re
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Prometheus metrics for the API, the recommendation pipeline, the DB pool
+# and MAL/Jikan traffic, served by GET /metrics. With several worker
+# processes set PROMETHEUS_MULTIPROC_DIR to an empty directory shared by all
+# of them (and cleared on deploy) so /metrics aggregates across workers.
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+_ITERATION_SUFFIX_RE = re.compile(r"_\d+$")
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+RECOMMENDATION_STAGE_DURATION = Histogram(
+    "recommendation_stage_duration_seconds",
+    "Latency of each recommend_for_user stage; collapse iterations share one series.",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent getting a connection from the SQLAlchemy pool, including opening new ones.",
+    buckets=_POOL_WAIT_BUCKETS,
+)
+DB_POOL_CONNECTIONS_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the SQLAlchemy pool.",
+    multiprocess_mode="livesum",
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total",
+    "MAL/Jikan requests by upstream, calling path and HTTP status ('error' if no response).",
+    ["upstream", "caller", "status"],
+)
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "upstream_request_duration_seconds",
+    "MAL/Jikan request latency by upstream and calling path.",
+    ["upstream", "caller"],
+    buckets=_LATENCY_BUCKETS,
+)
+UPSTREAM_RETRIES = Counter(
+    "upstream_retries_total",
+    "MAL/Jikan requests retried, by calling path and reason (429 or network error).",
+    ["upstream", "caller", "reason"],
+)
+
+
+def observe_recommendation_stages(stages: list[dict[str, object]]) -> None:
+    for stage in stages:
+        stage_name = _ITERATION_SUFFIX_RE.sub("", str(stage["name"]))
+        RECOMMENDATION_STAGE_DURATION.labels(stage=stage_name).observe(float(stage["duration_ms"]) / 1000)
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    if count > 0:
+        CACHE_LOOKUPS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
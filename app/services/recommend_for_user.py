@@ -3,7 +3,7 @@ import json
 import re
 import time
 from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from urllib.request import Request
 
 from sqlalchemy import select
 from app.db.session import SessionLocal
@@ -22,8 +22,12 @@ from app.db.repositories.anime import (
     get_mal_franchise_nodes_by_mal_ids,
 )
 from app.db.enums import Provider
-from app.db.repositories.tag_similarity import get_similarity_scores_for_tag_pairs
+from app.db.repositories.tag_similarity import get_best_related_similarity_by_anime_ids
+from app.services.jikan_rate_limiter import report_jikan_rate_limited, wait_for_jikan_slot
+from app.services.upstream_http import jikan_url, record_upstream_retry, upstream_urlopen
 from app.services.mal_franchise_resolver import MalFranchiseResolver
+from app.services.metrics import record_cache_lookup
+from app.services.stage_timing import record_stage_detail, timed_stage
 from app.schemas.recommendations import RecommendationItem
 
 # discovery tuning
@@ -38,9 +42,7 @@ FINAL_RECOMMENDATION_COUNT = 10
 FRANCHISE_COLLAPSE_EXPANSION_STEP = 10
 FRANCHISE_RELATION_BACKFILL_MAX_CANDIDATES = 50
 FRANCHISE_RELATION_BACKFILL_TOP_CANDIDATES = 15
-JIKAN_RELATIONS_MIN_INTERVAL_SECONDS = 0.7
 JIKAN_RELATIONS_MAX_RETRIES = 3
-_last_jikan_relations_request_at = 0.0
 _LIKELY_CONTINUATION_TITLE_RE = re.compile(
     r"(?ix)"
     r"("
@@ -71,19 +73,6 @@ def _z_bucket(z: float | None) -> float:
             return 0.75
 
 
-def _throttle_jikan_relations_requests() -> None:
-    global _last_jikan_relations_request_at
-    elapsed = time.monotonic() - _last_jikan_relations_request_at
-    wait_seconds = JIKAN_RELATIONS_MIN_INTERVAL_SECONDS - elapsed
-    if wait_seconds > 0:
-        time.sleep(wait_seconds)
-
-
-def _mark_jikan_relations_request_complete() -> None:
-    global _last_jikan_relations_request_at
-    _last_jikan_relations_request_at = time.monotonic()
-
-
 def _extract_prequel_sequel_relation_ids(payload: object) -> list[int]:
     if not isinstance(payload, dict):
         return []
@@ -124,32 +113,35 @@ def _looks_like_continuation_title(title: str | None) -> bool:
 
 
 def _fetch_jikan_relations_for_mal_id(mal_id: int) -> list[int] | None:
-    url = f"https://api.jikan.moe/v4/anime/{mal_id}/relations"
+    url = jikan_url(f"/anime/{mal_id}/relations")
     attempts = 0
 
     while True:
-        _throttle_jikan_relations_requests()
+        wait_for_jikan_slot()
         started = time.perf_counter()
         try:
             req = Request(url, headers={"User-Agent": "AnimeRecommendations/1.0"})
-            with urlopen(req, timeout=20) as response:
-                _mark_jikan_relations_request_complete()
+            with upstream_urlopen(req, timeout=20, caller="recommendation") as response:
                 payload = json.loads(response.read().decode("utf-8"))
-                _ = time.perf_counter() - started
+                record_stage_detail("jikan_fetches")
+                record_stage_detail("jikan_ms", (time.perf_counter() - started) * 1000)
                 return _extract_prequel_sequel_relation_ids(payload)
         except HTTPError as exc:
-            _mark_jikan_relations_request_complete()
+            record_stage_detail("jikan_fetches")
+            record_stage_detail("jikan_ms", (time.perf_counter() - started) * 1000)
             if exc.code == 404:
                 return []
             if exc.code == 429 and attempts < JIKAN_RELATIONS_MAX_RETRIES:
                 attempts += 1
-                time.sleep(1.5 * (2 ** (attempts - 1)))
+                report_jikan_rate_limited(1.5 * (2 ** (attempts - 1)))
+                record_upstream_retry(url, "recommendation", "429")
                 continue
             return None
         except (URLError, json.JSONDecodeError):
             if attempts < JIKAN_RELATIONS_MAX_RETRIES:
                 attempts += 1
                 time.sleep(1.5 * (2 ** (attempts - 1)))
+                record_upstream_retry(url, "recommendation", "network")
                 continue
             return None
 
@@ -276,6 +268,7 @@ def _ensure_franchise_relations_for_ranked_pool(db, ranked_candidates, anime_met
                 ).scalar_one_or_none()
                 if cache_row is not None:
                     relation_cache_by_mal_id[current_mal_id] = cache_row
+            record_cache_lookup("mal_relation_cache", cache_row is not None)
             if cache_row is not None:
                 relation_ids = [
                     value for value in (cache_row.related_prequel_sequel_mal_ids or []) if isinstance(value, int)
@@ -387,8 +380,10 @@ def _collapse_output_to_franchise_entrypoints(db, ranked_candidates, anime_metad
 
         cached_root_mal_id = cached_roots_by_mal_id.get(mal_id)
         if isinstance(cached_root_mal_id, int) and cached_root_mal_id > 0:
+            record_cache_lookup("franchise_root", True)
             resolved_mal_id = cached_root_mal_id
         else:
+            record_cache_lookup("franchise_root", False)
             resolved_mal_id = resolver.resolve_entrypoint(mal_id)
         candidate_root_mal_id_by_local_id[anime_id] = resolved_mal_id
         if resolved_mal_id != mal_id:
@@ -478,57 +473,23 @@ def _persist_franchise_root_cache_for_ranked_pool(db, ranked_candidates, anime_m
     return touched
 
 
-def recommend_for_user(db, user_id, z_score=0.25):
-    user_shows = get_entries_above_z_score(db, user_id, z_score)
-    neighbours = get_neighbours(db, user_shows, user_id, z_score)
-    candidate_shows = get_candidate_shows(db, neighbours, user_id, z_score)
-    score_dict = Counter(
-        {
-            row["anime_id"]: row["base_score"]
-            for row in candidate_shows
-            if row["support_count"] >= MIN_CANDIDATE_SUPPORT_COUNT
-        }
-    )
-    user_tag_prefs = get_user_tag_preferences(db, user_id)
-    anime_metadata_by_id = get_anime_metadata_by_ids(db, list(score_dict.keys()))
-    global_liked_tags = [
-        tag
-        for tag, pref in user_tag_prefs.items()
-        if pref["avg_z_score"] is not None
-        and pref["z_score_count"] >= MIN_CONFIDENT_TAG_COUNT
-        and float(pref["avg_z_score"]) >= 0.2
-    ]
-    all_unknown_candidate_tags = sorted(
-        {
-            tag
-            for anime_meta in anime_metadata_by_id.values()
-            for tag in (anime_meta.get("tags") or [])
-            if tag not in user_tag_prefs
-        }
-    )
-    similarity_scores_by_pair = get_similarity_scores_for_tag_pairs(
-        db,
-        global_liked_tags,
-        all_unknown_candidate_tags,
-        min_cooccurrence_count=2,
-    )
-
+def _rescore_candidates(score_dict, anime_metadata_by_id, user_tag_prefs, best_similarity_by_anime_id) -> None:
     for id in list(score_dict.keys()):
         anime_meta = anime_metadata_by_id.get(id)
         if anime_meta is None:
             continue
 
         base_score = score_dict[id] * 0.55
-        tags = anime_meta["tags"]
+        tag_ids = anime_meta["tag_ids"]
         known_scores: list[float] = []
-        liked_known_tags: list[str] = []
-        unknown_tags: list[str] = []
+        liked_known_tag_ids: list[int] = []
+        unknown_tag_ids: list[int] = []
         has_strong_disliked_tag = False
 
-        for tag in tags:
-            pref = user_tag_prefs.get(tag)
+        for tag_id in tag_ids:
+            pref = user_tag_prefs.get(tag_id)
             if pref is None or pref["avg_z_score"] is None:
-                unknown_tags.append(tag)
+                unknown_tag_ids.append(tag_id)
                 continue
 
             avg_z = float(pref["avg_z_score"])
@@ -536,22 +497,15 @@ def recommend_for_user(db, user_id, z_score=0.25):
 
             if pref["z_score_count"] >= MIN_CONFIDENT_TAG_COUNT:
                 if avg_z >= 0.2:
-                    liked_known_tags.append(tag)
+                    liked_known_tag_ids.append(tag_id)
                 if avg_z <= -0.5:
                     has_strong_disliked_tag = True
 
         avg_tag_score = (sum(known_scores) / len(known_scores)) if known_scores else 0.0
         genre_multiplier = _z_bucket(avg_tag_score)
 
-        if liked_known_tags and unknown_tags and not has_strong_disliked_tag:
-            best_similarity = max(
-                (
-                    similarity_scores_by_pair.get((liked_tag, unknown_tag), 0.0)
-                    for liked_tag in liked_known_tags
-                    for unknown_tag in unknown_tags
-                ),
-                default=0.0,
-            )
+        if liked_known_tag_ids and unknown_tag_ids and not has_strong_disliked_tag:
+            best_similarity = best_similarity_by_anime_id.get(id, 0.0)
             if best_similarity >= RELATED_TAG_SIMILARITY_THRESHOLD:
                 discovery_multiplier = 1.0 + min(
                     RELATED_DISCOVERY_MAX_BONUS,
@@ -562,11 +516,56 @@ def recommend_for_user(db, user_id, z_score=0.25):
         base_score *= genre_multiplier
         score_dict[id] = base_score
 
-    user_seen_anime_ids = set(
-        db.execute(
-            select(UserAnimeEntry.anime_id).where(UserAnimeEntry.user_id == user_id)
-        ).scalars().all()
+
+def recommend_for_user(db, user_id, z_score=0.25):
+    # Stages are timed (with SQL counts) when the caller collects them with
+    # collect_stage_timings(); the recommendations route reports them in
+    # its Server-Timing header.
+    with timed_stage("seed_entries"):
+        user_shows = get_entries_above_z_score(db, user_id, z_score)
+        record_stage_detail("seeds", len(user_shows))
+    with timed_stage("neighbours"):
+        neighbours = get_neighbours(db, user_shows, user_id, z_score)
+        record_stage_detail("neighbours", len(neighbours))
+    with timed_stage("candidates"):
+        candidate_shows = get_candidate_shows(db, neighbours, user_id, z_score)
+        record_stage_detail("candidates", len(candidate_shows))
+    score_dict = Counter(
+        {
+            row["anime_id"]: row["base_score"]
+            for row in candidate_shows
+            if row["support_count"] >= MIN_CANDIDATE_SUPPORT_COUNT
+        }
     )
+    with timed_stage("tag_preferences"):
+        user_tag_prefs = get_user_tag_preferences(db, user_id)
+    with timed_stage("anime_metadata"):
+        anime_metadata_by_id = get_anime_metadata_by_ids(db, list(score_dict.keys()))
+    global_liked_tag_ids = [
+        tag_id
+        for tag_id, pref in user_tag_prefs.items()
+        if pref["avg_z_score"] is not None
+        and pref["z_score_count"] >= MIN_CONFIDENT_TAG_COUNT
+        and float(pref["avg_z_score"]) >= 0.2
+    ]
+    with timed_stage("related_similarity"):
+        best_similarity_by_anime_id = get_best_related_similarity_by_anime_ids(
+            db,
+            list(anime_metadata_by_id.keys()),
+            global_liked_tag_ids,
+            list(user_tag_prefs.keys()),
+            min_cooccurrence_count=2,
+        )
+
+    with timed_stage("rescoring"):
+        _rescore_candidates(score_dict, anime_metadata_by_id, user_tag_prefs, best_similarity_by_anime_id)
+
+    with timed_stage("seen_entries"):
+        user_seen_anime_ids = set(
+            db.execute(
+                select(UserAnimeEntry.anime_id).where(UserAnimeEntry.user_id == user_id)
+            ).scalars().all()
+        )
 
     ranked_pool = score_dict.most_common(OUTPUT_RESOLUTION_POOL_SIZE)
     collapse_pool_size = min(FRANCHISE_COLLAPSE_POOL_SIZE, len(ranked_pool))
@@ -574,20 +573,24 @@ def recommend_for_user(db, user_id, z_score=0.25):
     any_franchise_cache_updated = False
     display_scores = Counter()
     display_metadata_by_id: dict[int, dict] = {}
+    collapse_iteration = 0
 
     while collapse_pool_size > 0:
+        collapse_iteration += 1
         franchise_pool = ranked_pool[:collapse_pool_size]
-        runtime_franchise_nodes, relations_cache_updated = _ensure_franchise_relations_for_ranked_pool(
-            db,
-            franchise_pool,
-            anime_metadata_by_id,
-        )
-        display_scores, display_metadata_by_id, franchise_cache_updated = _collapse_output_to_franchise_entrypoints(
-            db,
-            franchise_pool,
-            anime_metadata_by_id,
-            runtime_franchise_nodes,
-        )
+        with timed_stage(f"relation_backfill_{collapse_iteration}"):
+            runtime_franchise_nodes, relations_cache_updated = _ensure_franchise_relations_for_ranked_pool(
+                db,
+                franchise_pool,
+                anime_metadata_by_id,
+            )
+        with timed_stage(f"franchise_collapse_{collapse_iteration}"):
+            display_scores, display_metadata_by_id, franchise_cache_updated = _collapse_output_to_franchise_entrypoints(
+                db,
+                franchise_pool,
+                anime_metadata_by_id,
+                runtime_franchise_nodes,
+            )
         any_relations_cache_updated = any_relations_cache_updated or relations_cache_updated
         any_franchise_cache_updated = any_franchise_cache_updated or franchise_cache_updated
 
@@ -605,13 +608,15 @@ def recommend_for_user(db, user_id, z_score=0.25):
         collapse_pool_size = min(len(ranked_pool), collapse_pool_size + FRANCHISE_COLLAPSE_EXPANSION_STEP)
 
     if any_relations_cache_updated or any_franchise_cache_updated:
-        db.commit()
+        with timed_stage("persist"):
+            db.commit()
 
     recommendation_items = []
     for id, match_score in display_scores.most_common(collapse_pool_size):
         if id in user_seen_anime_ids:
             continue
         item = RecommendationItem(
+            anime_id=id,
             title=display_metadata_by_id.get(id, {}).get("title", f"Anime {id}"),
             score=match_score
         )
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Root of the app package; stacks without a frame under it are idle threads.
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample Python stacks from a background thread and aggregate them as folded stacks.
+
+    The output is one "root;...;leaf count" line per distinct stack, the
+    input format of flamegraph.pl, speedscope and most flamegraph viewers.
+    With thread_ids, only those threads are sampled; otherwise every thread
+    currently running code from the app package is (idle server and pool
+    threads are skipped), so a profile taken while other requests are in
+    flight includes them too.
+    """
+
+    def __init__(self, interval_seconds: float = 0.005, thread_ids: set[int] | None = None) -> None:
+        self.interval_seconds = interval_seconds
+        self.thread_ids = thread_ids
+        self.stacks: Counter[str] = Counter()
+        self.sample_count = 0
+        self.duration_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration_seconds = time.perf_counter() - self._started
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop.wait(self.interval_seconds):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                labels = []
+                in_app = False
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    in_app = in_app or frame.f_code.co_filename.startswith(_APP_DIR)
+                    frame = frame.f_back
+                if self.thread_ids is None and not in_app:
+                    continue
+                if thread_id not in thread_names:
+                    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(self.folded())
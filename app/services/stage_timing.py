@@ -0,0 +1,109 @@
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.db.session import engine
+from app.services.memory_report import enter_memory_stage
+
+
+class StageTimings:
+    """Wall time, SQL statement count and counters for each named stage of one operation."""
+
+    def __init__(self) -> None:
+        self.stages: list[dict[str, object]] = []
+        self.untracked_queries = 0
+        self.total_ms = 0.0
+        self._active: list[dict[str, object]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        entry: dict[str, object] = {"name": name, "duration_ms": 0.0, "queries": 0, "details": defaultdict(float)}
+        self._active.append(entry)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["duration_ms"] = (time.perf_counter() - started) * 1000
+            entry["details"] = dict(entry["details"])
+            self._active.pop()
+            self.stages.append(entry)
+
+    def count_query(self) -> None:
+        if self._active:
+            self._active[-1]["queries"] += 1
+        else:
+            self.untracked_queries += 1
+
+    def add_detail(self, name: str, amount: float) -> None:
+        if self._active:
+            self._active[-1]["details"][name] += amount
+
+    def finish(self) -> None:
+        self.total_ms = (time.perf_counter() - self._started) * 1000
+
+    @property
+    def query_count(self) -> int:
+        return self.untracked_queries + sum(stage["queries"] for stage in self.stages)
+
+    def server_timing_header(self) -> str:
+        metrics = [
+            f'{stage["name"]};dur={stage["duration_ms"]:.1f};desc="{stage["queries"]} queries"'
+            for stage in self.stages
+        ]
+        metrics.append(f'total;dur={self.total_ms:.1f};desc="{self.query_count} queries"')
+        return ", ".join(metrics)
+
+
+_current_stage_timings: ContextVar[StageTimings | None] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect_stage_timings() -> Iterator[StageTimings]:
+    """Collect the timed_stage() blocks run in this context until the block exits."""
+    timings = StageTimings()
+    token = _current_stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        timings.finish()
+        _current_stage_timings.reset(token)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Time a stage if a collector is active; a no-op otherwise.
+
+    The stage is also marked in an active memory report; code between
+    stages is reported there as "other".
+    """
+    enter_memory_stage(name)
+    timings = _current_stage_timings.get()
+    try:
+        if timings is None:
+            yield
+            return
+        with timings.stage(name):
+            yield
+    finally:
+        enter_memory_stage("other")
+
+
+def record_stage_detail(name: str, amount: float = 1.0) -> None:
+    """Add to a counter (e.g. network fetches) on the innermost running stage."""
+    timings = _current_stage_timings.get()
+    if timings is not None:
+        timings.add_detail(name, amount)
+
+
+def _count_query(*_args) -> None:
+    timings = _current_stage_timings.get()
+    if timings is not None:
+        timings.count_query()
+
+
+event.listen(engine, "before_cursor_execute", _count_query)
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import fcntl
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from email.message import Message
+from functools import lru_cache
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from app.config.settings import get_settings
+from app.services.metrics import UPSTREAM_REQUEST_DURATION, UPSTREAM_REQUESTS, UPSTREAM_RETRIES
+
+
+# Every MAL/Jikan fetcher opens URLs through upstream_urlopen, so one setting
+# switches the whole app between live traffic, recording it, and replaying a
+# recording:
+#   live   - plain urlopen
+#   record - urlopen, appending each final response to the cassette
+#   replay - serve responses from the cassette only, with optional injected
+#            latency and 429s; a URL missing from the cassette is an error
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "recorded": 0, "replayed": 0, "injected_429": 0}
+
+
+class UpstreamCassetteMiss(RuntimeError):
+    """Replay mode was asked for a URL the cassette has no response for."""
+
+
+class _CassetteResponse(io.BytesIO):
+    def __init__(self, url: str, status: int, body: bytes) -> None:
+        super().__init__(body)
+        self.url = url
+        self.status = status
+
+    def getcode(self) -> int:
+        return self.status
+
+
+def _bump(counter: str) -> int:
+    with _stats_lock:
+        _stats[counter] += 1
+        return _stats[counter]
+
+
+def get_upstream_stats() -> dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_upstream_stats() -> None:
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
+
+
+def jikan_url(path: str) -> str:
+    return get_settings().jikan_base_url.rstrip("/") + path
+
+
+def mal_url(path: str) -> str:
+    return get_settings().mal_base_url.rstrip("/") + path
+
+
+def is_jikan_url(url: str) -> bool:
+    base = get_settings().jikan_base_url.rstrip("/")
+    return url == base or url.startswith(base + "/")
+
+
+def _request_url(req: Request | str) -> str:
+    return req.full_url if isinstance(req, Request) else req
+
+
+def _record(path: str, url: str, status: int, body: bytes) -> None:
+    line = json.dumps(
+        {"url": url, "status": status, "body": body.decode("utf-8", errors="surrogateescape")},
+        ensure_ascii=False,
+    )
+    # One complete gzip member per response, appended under a lock, so any
+    # number of recording processes produce one valid multi-member file.
+    member = gzip.compress((line + "\n").encode("utf-8", errors="surrogateescape"))
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.write(fd, member)
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+    _bump("recorded")
+
+
+@lru_cache
+def load_cassette(path: str) -> dict[str, tuple[int, bytes]]:
+    """Map URL -> (status, body) for a cassette; the last recording of a URL wins."""
+    responses: dict[str, tuple[int, bytes]] = {}
+    with gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            responses[entry["url"]] = (
+                int(entry["status"]),
+                entry["body"].encode("utf-8", errors="surrogateescape"),
+            )
+    return responses
+
+
+def _http_error(url: str, status: int, body: bytes, headers: dict[str, str] | None = None) -> HTTPError:
+    message = Message()
+    for name, value in (headers or {}).items():
+        message[name] = value
+    return HTTPError(url, status, f"HTTP {status}", message, io.BytesIO(body))
+
+
+def _replay(url: str):
+    settings = get_settings()
+    if settings.upstream_replay_latency_ms > 0:
+        time.sleep(settings.upstream_replay_latency_ms / 1000)
+
+    replay_number = _bump("replayed")
+    every = settings.upstream_replay_429_every
+    if every > 0 and replay_number % every == 0:
+        _bump("injected_429")
+        raise _http_error(
+            url,
+            429,
+            b'{"status": 429, "message": "Injected rate limit (replay)"}',
+            {"Retry-After": str(settings.upstream_replay_retry_after_seconds)},
+        )
+
+    response = load_cassette(settings.upstream_cassette_path).get(url)
+    if response is None:
+        raise UpstreamCassetteMiss(f"No recorded response for {url} in {settings.upstream_cassette_path}")
+    status, body = response
+    if status >= 400:
+        raise _http_error(url, status, body)
+    return _CassetteResponse(url, status, body)
+
+
+def _upstream_name(url: str) -> str:
+    return "jikan" if is_jikan_url(url) else "mal"
+
+
+def record_upstream_retry(url: str, caller: str, reason: str) -> None:
+    """Count a retried MAL/Jikan request; reason is "429" or "network"."""
+    UPSTREAM_RETRIES.labels(upstream=_upstream_name(url), caller=caller, reason=reason).inc()
+
+
+def upstream_urlopen(req: Request | str, timeout: float = 20, caller: str = "other"):
+    """urlopen for MAL/Jikan requests, honouring UPSTREAM_HTTP_MODE.
+
+    caller ("import", "recommendation", ...) labels the request in /metrics.
+    """
+    url = _request_url(req)
+    upstream = _upstream_name(url)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = _upstream_urlopen(req, url, timeout)
+        status = str(getattr(response, "status", 200))
+        return response
+    except HTTPError as exc:
+        status = str(exc.code)
+        raise
+    finally:
+        UPSTREAM_REQUESTS.labels(upstream=upstream, caller=caller, status=status).inc()
+        UPSTREAM_REQUEST_DURATION.labels(upstream=upstream, caller=caller).observe(time.perf_counter() - started)
+
+
+def _upstream_urlopen(req: Request | str, url: str, timeout: float):
+    settings = get_settings()
+    mode = settings.upstream_http_mode
+    _bump("requests")
+    if mode == "replay":
+        return _replay(url)
+    if mode != "record":
+        return urlopen(req, timeout=timeout)
+
+    try:
+        with urlopen(req, timeout=timeout) as response:
+            status = response.status
+            body = response.read()
+    except HTTPError as exc:
+        body = exc.read()
+        # 429s are transient; the retry that follows records the real answer.
+        if exc.code != 429:
+            _record(settings.upstream_cassette_path, url, exc.code, body)
+        raise _http_error(url, exc.code, body, dict(exc.headers or {})) from None
+    _record(settings.upstream_cassette_path, url, status, body)
+    return _CassetteResponse(url, status, body)
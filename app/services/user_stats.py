@@ -0,0 +1,107 @@
+from collections import Counter, defaultdict
+from statistics import pstdev
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.db.models import tag  # noqa: F401  (registers the table user_tag_stats.tag_id references)
+from app.db.models.anime import Anime
+from app.db.models.user import User
+from app.db.models.user_anime_entry import UserAnimeEntry
+from app.db.models.user_stats import UserStats
+from app.db.models.user_tag_stat import UserTagStat
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_user_score_and_tag_stats(db: Session, user: User) -> tuple[UserStats, bool]:
+    """Recompute a user's score stats, entry z-scores and per-tag stats from their entries.
+
+    Returns the user's stats row and whether its score stats changed. Changes
+    are left in the session for the caller to commit.
+    """
+    user_scores = db.execute(
+        select(UserAnimeEntry.score).where(
+            UserAnimeEntry.user_id == user.id,
+            UserAnimeEntry.score.is_not(None),
+            UserAnimeEntry.score > 0,
+        )
+    ).scalars().all()
+    score_values = [float(score) for score in user_scores]
+
+    if score_values:
+        mean_score = round(sum(score_values) / len(score_values), 4)
+        stddev_score = round(pstdev(score_values), 4) if len(score_values) > 1 else 0.0
+        rating_count = len(score_values)
+    else:
+        mean_score = 0.0
+        stddev_score = 0.0
+        rating_count = 0
+
+    stats_changed = False
+    stats = db.execute(select(UserStats).where(UserStats.user_id == user.id)).scalar_one_or_none()
+    if stats is None:
+        stats = UserStats(user_id=user.id, mean_score=mean_score, stddev_score=stddev_score, rating_count=rating_count)
+        db.add(stats)
+        stats_changed = True
+    elif (
+        stats.mean_score != mean_score
+        or stats.stddev_score != stddev_score
+        or stats.rating_count != rating_count
+    ):
+        stats.mean_score = mean_score
+        stats.stddev_score = stddev_score
+        stats.rating_count = rating_count
+        stats_changed = True
+
+    user_entries = db.execute(
+        select(UserAnimeEntry).where(UserAnimeEntry.user_id == user.id)
+    ).scalars().all()
+    for user_entry in user_entries:
+        if user_entry.score is None or user_entry.score <= 0:
+            calculated_z_score = None
+        elif stddev_score > 0:
+            calculated_z_score = round((float(user_entry.score) - mean_score) / stddev_score, 4)
+        else:
+            calculated_z_score = 0.0
+
+        if user_entry.z_score != calculated_z_score:
+            user_entry.z_score = calculated_z_score
+
+    tag_counts: Counter[int] = Counter()
+    tag_z_score_counts: Counter[int] = Counter()
+    tag_z_score_sums: defaultdict[int, float] = defaultdict(float)
+    user_entries_with_anime = db.execute(
+        select(UserAnimeEntry, Anime)
+        .join(Anime, Anime.id == UserAnimeEntry.anime_id)
+        .where(UserAnimeEntry.user_id == user.id)
+    ).all()
+    logger.debug(
+        "Building tag stats user_id=%s user_entries=%s joined_entries=%s",
+        user.id,
+        len(user_entries),
+        len(user_entries_with_anime),
+    )
+    for user_entry, anime in user_entries_with_anime:
+        for tag_id in set(anime.tag_ids or []):
+            tag_counts[tag_id] += 1
+            if user_entry.z_score is not None:
+                tag_z_score_counts[tag_id] += 1
+                tag_z_score_sums[tag_id] += float(user_entry.z_score)
+
+    db.execute(delete(UserTagStat).where(UserTagStat.user_id == user.id))
+    for tag_id, entry_count in tag_counts.items():
+        z_score_count = tag_z_score_counts[tag_id]
+        avg_z_score = round(tag_z_score_sums[tag_id] / z_score_count, 4) if z_score_count > 0 else None
+        db.add(
+            UserTagStat(
+                user_id=user.id,
+                tag_id=tag_id,
+                entry_count=entry_count,
+                z_score_count=z_score_count,
+                avg_z_score=avg_z_score,
+            )
+        )
+
+    return stats, stats_changed
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import resource
+import time
+
+from sqlalchemy.orm import Session
+
+from app.api.v1.routes.user import run_mal_import
+from app.db.session import engine
+from app.services.memory_report import collect_memory_report, enter_memory_stage
+from scripts._common import log
+from scripts.upstream_standin import SyntheticCatalog
+
+# Anime ids of the benchmark list are shifted past both real MAL ids and the
+# ones generate_synthetic_dataset.py uses, so every entry creates its anime.
+_MAL_ID_OFFSET = 60_000_000
+_PAGE_SIZE = 300
+_USERNAME = "memory-bench"
+_PROVIDER_USER_ID = 60_000_000
+
+
+def build_list_pages(catalog: SyntheticCatalog) -> list[list]:
+    items = [dict(item, anime_id=item["anime_id"] + _MAL_ID_OFFSET) for item in catalog.list_for_user("user0")]
+    return [items[start : start + _PAGE_SIZE] for start in range(0, len(items), _PAGE_SIZE)]
+
+
+def build_enrichment_cache(catalog: SyntheticCatalog, list_pages: list[list]) -> dict[int, dict[str, object]]:
+    """What the import would have fetched from Jikan for every listed anime."""
+    cache: dict[int, dict[str, object]] = {}
+    for page in list_pages:
+        for item in page:
+            anime = catalog.anime_by_id[item["anime_id"] - _MAL_ID_OFFSET]
+            tags = [entry["name"] for key in ("genres", "themes", "demographics") for entry in anime[key]]
+            relation_ids = [
+                entry["mal_id"] + _MAL_ID_OFFSET
+                for relation in catalog.relations_by_id.get(anime["mal_id"], [])
+                for entry in relation["entry"]
+            ]
+            cache[item["anime_id"]] = {
+                "tags": tags,
+                "provider_popularity_rank": anime["popularity"],
+                "provider_member_count": anime["members"],
+                "related_prequel_sequel_mal_ids": relation_ids,
+            }
+    return cache
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Import one synthetic MAL list (10k entries by default) under tracemalloc and report "
+            "peak traced memory per import stage and the top allocation sites as JSON. Exits "
+            "non-zero when the peak exceeds --budget-mb. Nothing is written: the import runs in "
+            "a transaction that is rolled back, and no MAL or Jikan requests are made."
+        )
+    )
+    parser.add_argument("--entries", type=int, default=10_000, help="List size (default: 10000).")
+    parser.add_argument("--budget-mb", type=float, default=96.0, help="Peak traced memory budget (default: 96).")
+    parser.add_argument(
+        "--enrichment",
+        choices=("cached", "none"),
+        default="cached",
+        help="cached: pre-fetched Jikan data for every anime, as a bulk import passes it; none: no enrichment.",
+    )
+    parser.add_argument("--top-sites", type=int, default=15, help="Allocation sites to report (default: 15).")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic catalog seed (default: 7).")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+    if args.entries < 1 or args.budget_mb <= 0:
+        parser.error("need --entries >= 1 and --budget-mb > 0")
+
+    catalog = SyntheticCatalog(
+        args.seed,
+        anime_count=args.entries + args.entries // 5,
+        user_count=1,
+        min_list=args.entries,
+        max_list=args.entries,
+    )
+    list_pages = build_list_pages(catalog)
+    log(f"Importing {sum(len(page) for page in list_pages)} entries in {len(list_pages)} pages")
+
+    connection = engine.connect()
+    outer = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    started = time.perf_counter()
+    try:
+        with collect_memory_report("bench_import_memory", args.top_sites) as report:
+            enrichment_cache = None
+            if args.enrichment == "cached":
+                enter_memory_stage("enrichment_cache")
+                enrichment_cache = build_enrichment_cache(catalog, list_pages)
+            result = run_mal_import(
+                db,
+                _USERNAME,
+                provider_user_id=_PROVIDER_USER_ID,
+                list_pages=list_pages,
+                enrichment_cache=enrichment_cache,
+                enrichment_mode="full" if args.enrichment == "cached" else "none",
+            )
+            del enrichment_cache
+    finally:
+        db.close()
+        outer.rollback()
+        connection.close()
+    elapsed = time.perf_counter() - started
+
+    mib = 1024 * 1024
+    peak_mb = report.peak_bytes / mib
+    summary = report.as_dict()
+    output = json.dumps(
+        {
+            "config": {
+                "entries": args.entries,
+                "enrichment": args.enrichment,
+                "budget_mb": args.budget_mb,
+                "chunked_commits": os.getenv("MAL_IMPORT_CHUNKED_COMMITS", ""),
+            },
+            "entries_created": result.entries_created,
+            "anime_created": result.anime_created,
+            "elapsed_s": round(elapsed, 2),
+            "peak_traced_mb": round(peak_mb, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+            "within_budget": peak_mb <= args.budget_mb,
+            "stages": [
+                {
+                    "name": stage["name"],
+                    "peak_mb": round(stage["peak_bytes"] / mib, 2),
+                    "net_mb": round(stage["net_bytes"] / mib, 2),
+                    "entered": stage["entered"],
+                }
+                for stage in summary["stages"]
+            ],
+            "top_sites_stage": summary["top_sites_stage"],
+            "top_sites": [
+                {"site": site["site"], "size_mb": round(site["size_bytes"] / mib, 2), "count": site["count"]}
+                for site in summary["top_sites"]
+            ],
+        },
+        indent=2,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    print(output)
+    if peak_mb > args.budget_mb:
+        raise SystemExit(f"Peak traced memory {peak_mb:.1f} MB exceeds the {args.budget_mb:.1f} MB budget")
+
+
+if __name__ == "__main__":
+    main()
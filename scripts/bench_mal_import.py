@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import statistics
+import time
+from collections.abc import Callable
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.config.settings import get_settings
+from app.db.session import SessionLocal
+from app.services.jikan_rate_limiter import get_jikan_rate_limiter
+from app.services.upstream_http import get_upstream_stats, load_cassette, reset_upstream_stats
+from scripts._common import log, percentile
+from scripts.import_mal_users import parse_usernames
+
+
+def run_round(usernames: list[str], session_factory: Callable[[], Session] = SessionLocal) -> dict[str, object]:
+    # Imported here so the replay settings are in place before the route
+    # module builds anything from them.
+    from app.api.v1.routes.user import run_mal_import
+
+    reset_upstream_stats()
+    user_seconds: list[float] = []
+    items_seen = 0
+    failed = 0
+    started = time.perf_counter()
+    for username in usernames:
+        user_started = time.perf_counter()
+        db = session_factory()
+        try:
+            result = run_mal_import(db, username)
+            items_seen += result.items_seen
+        except HTTPException:
+            db.rollback()
+            failed += 1
+        finally:
+            db.close()
+        user_seconds.append(time.perf_counter() - user_started)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "users": len(usernames),
+        "failed": failed,
+        "items": items_seen,
+        "elapsed_s": round(elapsed, 3),
+        "users_per_min": round(len(usernames) / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        "items_per_s": round(items_seen / elapsed, 1) if elapsed > 0 else 0.0,
+        "user_p50_s": round(statistics.median(user_seconds), 3) if user_seconds else 0.0,
+        "user_p95_s": round(percentile(user_seconds, 0.95), 3),
+        "upstream": get_upstream_stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark MAL imports end to end against a recorded upstream cassette. "
+            "Record one first by running import_mal_users.py with UPSTREAM_HTTP_MODE=record. "
+            "Writes to DATABASE_URL, so point it at a scratch database. "
+            "tests/bench runs the same replay loop against a small committed cassette (pytest -m bench)."
+        )
+    )
+    parser.add_argument("--file", type=str, required=True, help="Usernames to import, one per line.")
+    parser.add_argument("--cassette", type=str, default="", help="Cassette path (default: UPSTREAM_CASSETTE_PATH).")
+    parser.add_argument("--rounds", type=int, default=3, help="Import every user this many times (default: 3).")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency injected per replayed request.")
+    parser.add_argument(
+        "--inject-429-every",
+        type=int,
+        default=0,
+        help="Answer every Nth replayed request with a 429 (default: 0, never).",
+    )
+    parser.add_argument(
+        "--retry-after-seconds",
+        type=float,
+        default=1.0,
+        help="Retry-After sent with injected 429s (default: 1).",
+    )
+    parser.add_argument(
+        "--jikan-min-interval-seconds",
+        type=float,
+        default=None,
+        help="Override JIKAN_MIN_INTERVAL_SECONDS (e.g. 0 to measure the pipeline without throttling).",
+    )
+    parser.add_argument(
+        "--enrichment-mode",
+        type=str,
+        default="",
+        choices=["", "full", "relations", "none"],
+        help="Override MAL_IMPORT_ENRICHMENT_MODE (default: use environment).",
+    )
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("--rounds must be >= 1")
+
+    os.environ["UPSTREAM_HTTP_MODE"] = "replay"
+    os.environ["UPSTREAM_REPLAY_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["UPSTREAM_REPLAY_429_EVERY"] = str(args.inject_429_every)
+    os.environ["UPSTREAM_REPLAY_RETRY_AFTER_SECONDS"] = str(args.retry_after_seconds)
+    if args.cassette:
+        os.environ["UPSTREAM_CASSETTE_PATH"] = args.cassette
+    if args.jikan_min_interval_seconds is not None:
+        os.environ["JIKAN_MIN_INTERVAL_SECONDS"] = str(args.jikan_min_interval_seconds)
+    if args.enrichment_mode:
+        os.environ["MAL_IMPORT_ENRICHMENT_MODE"] = args.enrichment_mode
+    # Every round repeats the full import instead of skipping unchanged pages.
+    os.environ["MAL_IMPORT_FULL_REFRESH"] = "1"
+    get_settings.cache_clear()
+    get_jikan_rate_limiter.cache_clear()
+
+    settings = get_settings()
+    cassette_size = len(load_cassette(settings.upstream_cassette_path))
+    usernames = parse_usernames(args)
+    log(
+        f"Replaying {settings.upstream_cassette_path} ({cassette_size} responses) for {len(usernames)} users, "
+        f"{args.rounds} round(s), latency={args.latency_ms}ms, 429_every={args.inject_429_every}"
+    )
+
+    rounds = []
+    for round_number in range(1, args.rounds + 1):
+        summary = run_round(usernames)
+        rounds.append(summary)
+        log(
+            f"Round {round_number}: elapsed={summary['elapsed_s']}s items/s={summary['items_per_s']} "
+            f"users/min={summary['users_per_min']} failed={summary['failed']} "
+            f"injected_429={summary['upstream']['injected_429']}"
+        )
+
+    print(
+        json.dumps(
+            {
+                "cassette": settings.upstream_cassette_path,
+                "latency_ms": args.latency_ms,
+                "inject_429_every": args.inject_429_every,
+                "rounds": rounds,
+                "best_items_per_s": max(summary["items_per_s"] for summary in rounds),
+                "median_elapsed_s": round(statistics.median(summary["elapsed_s"] for summary in rounds), 3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
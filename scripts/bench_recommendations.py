@@ -0,0 +1,207 @@
+import argparse
+import json
+import random
+import re
+import statistics
+from collections import defaultdict
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.recommend_for_user import recommend_for_user
+from app.services.stage_timing import collect_stage_timings
+from app.services.upstream_http import get_upstream_stats, reset_upstream_stats
+from scripts._common import log, percentile
+
+# Stages recorded by recommend_for_user, in report order. Collapse stages
+# run once per iteration (relation_backfill_1, ...) and are summed here;
+# time outside any stage is reported as "other".
+_STAGES = (
+    "seed_entries",
+    "neighbours",
+    "candidates",
+    "tag_preferences",
+    "anime_metadata",
+    "related_similarity",
+    "rescoring",
+    "seen_entries",
+    "relation_backfill",
+    "franchise_collapse",
+    "persist",
+)
+_ITERATION_SUFFIX_RE = re.compile(r"_\d+$")
+
+# Per user: rated-entry count and the median popularity rank of the rated anime.
+_USER_PROFILE_SQL = """
+SELECT
+    e.user_id,
+    COUNT(*) AS entry_count,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY a.provider_popularity_rank) AS median_popularity_rank
+FROM user_anime_entries AS e
+JOIN anime AS a ON a.id = e.anime_id
+JOIN users AS u ON u.id = e.user_id
+WHERE e.z_score IS NOT NULL
+  AND u.provider_username LIKE :username_pattern
+GROUP BY e.user_id
+HAVING bool_or(e.z_score >= :z_score)
+"""
+
+
+def select_archetype_users(db, per_archetype: int, username_pattern: str, z_score: float, seed: int) -> dict[str, list[int]]:
+    """Sample users for each archetype from the rated-list profile of every user.
+
+    light: fewest rated entries (bottom 20%); heavy: most (top 5%);
+    niche / mainstream: among mid-sized lists, the 20% whose rated anime
+    are least / most popular by median popularity rank.
+    """
+    rows = db.execute(
+        text(_USER_PROFILE_SQL), {"username_pattern": username_pattern, "z_score": z_score}
+    ).all()
+    if not rows:
+        return {}
+
+    counts = sorted(row.entry_count for row in rows)
+    light_max = percentile(counts, 0.2)
+    heavy_min = percentile(counts, 0.95)
+    mid_sized = [
+        row for row in rows
+        if light_max < row.entry_count < heavy_min and row.median_popularity_rank is not None
+    ]
+    ranks = sorted(row.median_popularity_rank for row in mid_sized)
+
+    pools = {
+        "light": [row.user_id for row in rows if row.entry_count <= light_max],
+        "heavy": [row.user_id for row in rows if row.entry_count >= heavy_min],
+        "niche": [row.user_id for row in mid_sized if ranks and row.median_popularity_rank >= percentile(ranks, 0.8)],
+        "mainstream": [
+            row.user_id for row in mid_sized if ranks and row.median_popularity_rank <= percentile(ranks, 0.2)
+        ],
+    }
+    rng = random.Random(seed)
+    return {
+        archetype: sorted(rng.sample(user_ids, min(per_archetype, len(user_ids))))
+        for archetype, user_ids in pools.items()
+        if user_ids
+    }
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    return {
+        "p50": round(percentile(values, 0.5), 2),
+        "p95": round(percentile(values, 0.95), 2),
+        "p99": round(percentile(values, 0.99), 2),
+    }
+
+
+def run_user(user_id: int, z_score: float) -> dict[str, object]:
+    db = SessionLocal()
+    try:
+        with collect_stage_timings() as timings:
+            items = recommend_for_user(db, user_id, z_score)
+    finally:
+        db.close()
+
+    stage_ms = dict.fromkeys(_STAGES, 0.0)
+    queries = dict.fromkeys(_STAGES, 0)
+    details: dict[str, float] = defaultdict(float)
+    collapse_iterations = 0
+    for stage in timings.stages:
+        name = _ITERATION_SUFFIX_RE.sub("", stage["name"])
+        if name == "franchise_collapse":
+            collapse_iterations += 1
+        stage_ms[name] = stage_ms.get(name, 0.0) + stage["duration_ms"]
+        queries[name] = queries.get(name, 0) + stage["queries"]
+        for detail, amount in stage["details"].items():
+            details[detail] += amount
+    stage_ms["other"] = max(0.0, timings.total_ms - sum(stage_ms.values()))
+    queries["other"] = timings.untracked_queries
+    return {
+        "total_ms": timings.total_ms,
+        "stage_ms": stage_ms,
+        "queries": queries,
+        "neighbours": int(details["neighbours"]),
+        "candidates": int(details["candidates"]),
+        "jikan_fetches": int(details["jikan_fetches"]),
+        "collapse_iterations": collapse_iterations,
+        "results": len(items),
+    }
+
+
+def summarize(runs: list[dict[str, object]]) -> dict[str, object]:
+    stage_labels = list(_STAGES) + ["other"]
+    return {
+        "runs": len(runs),
+        "total_ms": _distribution([run["total_ms"] for run in runs]),
+        "queries": _distribution([sum(run["queries"].values()) for run in runs]),
+        "stages": {
+            label: {
+                **_distribution([run["stage_ms"][label] for run in runs]),
+                "queries_mean": round(statistics.fmean(run["queries"][label] for run in runs), 2),
+            }
+            for label in stage_labels
+        },
+        "neighbours_p50": percentile([run["neighbours"] for run in runs], 0.5),
+        "candidates_p50": percentile([run["candidates"] for run in runs], 0.5),
+        "collapse_iterations_mean": round(statistics.fmean(run["collapse_iterations"] for run in runs), 2),
+        "jikan_fetches_total": sum(run["jikan_fetches"] for run in runs),
+        "results_mean": round(statistics.fmean(run["results"] for run in runs), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark recommend_for_user across user archetypes (light, heavy, niche, mainstream), "
+            "reporting per-stage p50/p95/p99 latency and SQL statement counts as JSON. Works on "
+            "any populated database, e.g. one filled by generate_synthetic_dataset.py."
+        )
+    )
+    parser.add_argument("--users-per-archetype", type=int, default=25, help="Users sampled per archetype (default: 25).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per user (default: 3).")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per user first (default: 1).")
+    parser.add_argument("--username-prefix", type=str, default="", help="Only sample users with this prefix.")
+    parser.add_argument("--z-score", type=float, default=0.25, help="z_score passed to recommend_for_user.")
+    parser.add_argument("--seed", type=int, default=7, help="User sampling seed (default: 7).")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+    if args.users_per_archetype < 1 or args.repeat < 1 or args.warmup < 0:
+        parser.error("need --users-per-archetype >= 1, --repeat >= 1 and --warmup >= 0")
+
+    with SessionLocal() as db:
+        users_by_archetype = select_archetype_users(
+            db,
+            args.users_per_archetype,
+            args.username_prefix.replace("%", r"\%").replace("_", r"\_") + "%",
+            args.z_score,
+            args.seed,
+        )
+    if not users_by_archetype:
+        raise SystemExit("No users with rated entries to benchmark.")
+
+    reset_upstream_stats()
+    report: dict[str, object] = {"z_score": args.z_score, "repeat": args.repeat, "archetypes": {}}
+    for archetype, user_ids in users_by_archetype.items():
+        log(f"{archetype}: {len(user_ids)} users")
+        runs = []
+        for user_id in user_ids:
+            for _ in range(args.warmup):
+                run_user(user_id, args.z_score)
+            runs.extend(run_user(user_id, args.z_score) for _ in range(args.repeat))
+        summary = summarize(runs)
+        report["archetypes"][archetype] = {"users": len(user_ids), **summary}
+        log(
+            f"{archetype}: p50={summary['total_ms']['p50']}ms p95={summary['total_ms']['p95']}ms "
+            f"p99={summary['total_ms']['p99']}ms queries_p50={summary['queries']['p50']}"
+        )
+
+    # Any upstream traffic here means franchise resolution fell back to Jikan.
+    report["upstream_requests"] = get_upstream_stats()["requests"]
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import argparse
+import importlib
+import json
+import math
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from app.db.models.user import User
+from app.db.models.user_anime_entry import UserAnimeEntry
+from app.db.session import engine
+from app.services.user_stats import refresh_user_score_and_tag_stats
+from scripts._common import log, percentile
+
+_DEFAULT_BACKEND = "app.services.recommend_for_user:recommend_for_user"
+
+# Recommendations are collapsed to franchise entry points, so held-out titles
+# are compared by the anime their franchise resolves to.
+_CANONICAL_ANIME_SQL = """
+SELECT a.id, COALESCE(root.id, a.id)
+FROM anime AS a
+LEFT JOIN anime AS root
+    ON root.provider = a.provider
+   AND root.provider_anime_id = a.franchise_root_mal_id
+"""
+
+_ELIGIBLE_USERS_SQL = """
+SELECT user_id
+FROM user_anime_entries
+WHERE z_score >= :holdout_z
+GROUP BY user_id
+HAVING COUNT(*) >= :min_high_z
+ORDER BY user_id
+"""
+
+
+def load_backend(path: str):
+    """Resolve "package.module:function"; the function is called as (db, user_id, z_score)."""
+    module_name, _, function_name = path.partition(":")
+    if not module_name or not function_name:
+        raise SystemExit(f"--backend must look like package.module:function, got {path!r}")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def choose_holdout(entries: list[tuple[int, float]], fraction: float, holdout_z: float, rng: random.Random) -> list[int]:
+    """Hold out a fraction (at least one) of the high-z entries, always leaving one behind."""
+    high_z = sorted(anime_id for anime_id, z_score in entries if z_score is not None and z_score >= holdout_z)
+    count = min(len(high_z) - 1, max(1, round(len(high_z) * fraction)))
+    return sorted(rng.sample(high_z, count)) if count > 0 else []
+
+
+def ndcg_at_k(recommended: list[int], relevant: set[int], k: int) -> float:
+    dcg = sum(1.0 / math.log2(rank + 2) for rank, anime_id in enumerate(recommended[:k]) if anime_id in relevant)
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(k, len(relevant))))
+    return dcg / ideal if ideal > 0 else 0.0
+
+
+def evaluate_user(
+    backend,
+    user_id: int,
+    canonical_by_anime_id: dict[int, int],
+    fraction: float,
+    holdout_z: float,
+    z_score: float,
+    k: int,
+    seed: int,
+) -> dict[str, object]:
+    """Run the backend for one user with part of their list hidden, then roll everything back.
+
+    The holdout, the stats recomputed without it and anything the backend
+    commits all happen inside one outer transaction that is never
+    committed: the session's commits only release savepoints.
+    """
+    connection = engine.connect()
+    outer = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        entries = db.execute(
+            text("SELECT anime_id, z_score FROM user_anime_entries WHERE user_id = :user_id"),
+            {"user_id": user_id},
+        ).all()
+        held_out = choose_holdout(entries, fraction, holdout_z, random.Random(seed * 1_000_003 + user_id))
+        remaining_canonical = {
+            canonical_by_anime_id.get(anime_id, anime_id) for anime_id, _ in entries if anime_id not in held_out
+        }
+        # A held-out sequel whose franchise entry point is still on the list
+        # can never be recommended back, so it is not counted as relevant.
+        relevant = {canonical_by_anime_id.get(anime_id, anime_id) for anime_id in held_out} - remaining_canonical
+        if not relevant:
+            return {"user_id": user_id, "skipped": True}
+
+        db.execute(
+            delete(UserAnimeEntry).where(UserAnimeEntry.user_id == user_id, UserAnimeEntry.anime_id.in_(held_out))
+        )
+        user = db.get(User, user_id)
+        refresh_user_score_and_tag_stats(db, user)
+        db.flush()
+
+        started = time.perf_counter()
+        items = backend(db, user_id, z_score)
+        latency_ms = (time.perf_counter() - started) * 1000
+    finally:
+        db.close()
+        outer.rollback()
+        connection.close()
+
+    recommended = [item.anime_id for item in items][:k]
+    hits = sum(1 for anime_id in recommended if anime_id in relevant)
+    return {
+        "user_id": user_id,
+        "skipped": False,
+        "held_out": len(relevant),
+        "hits": hits,
+        "recall": hits / len(relevant),
+        "ndcg": ndcg_at_k(recommended, relevant, k),
+        "latency_ms": latency_ms,
+        "recommended": recommended,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Offline evaluation of a recommendation backend: hide a fraction of each sampled user's "
+            "high-z entries, recommend, and report recall@k, NDCG@k, catalog coverage and latency "
+            "as JSON. Nothing is written: each user runs in a transaction that is rolled back."
+        )
+    )
+    parser.add_argument("--backend", type=str, default=_DEFAULT_BACKEND, help=f"Backend (default: {_DEFAULT_BACKEND}).")
+    parser.add_argument("--users", type=int, default=200, help="Users sampled (default: 200).")
+    parser.add_argument("--workers", type=int, default=4, help="Users evaluated in parallel (default: 4).")
+    parser.add_argument("--holdout-fraction", type=float, default=0.2, help="Share of high-z entries hidden (default: 0.2).")
+    parser.add_argument("--holdout-z", type=float, default=1.0, help="Entries at or above this z-score can be held out (default: 1.0).")
+    parser.add_argument("--min-high-z", type=int, default=5, help="Only users with this many high-z entries (default: 5).")
+    parser.add_argument("--z-score", type=float, default=0.25, help="z_score passed to the backend (default: 0.25).")
+    parser.add_argument("--k", type=int, default=10, help="Cut-off for recall and NDCG (default: 10).")
+    parser.add_argument("--seed", type=int, default=7, help="User sampling and holdout seed (default: 7).")
+    parser.add_argument("--per-user", action="store_true", help="Include per-user results in the report.")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+    if args.users < 1 or args.workers < 1 or args.k < 1:
+        parser.error("need --users, --workers and --k >= 1")
+    if not 0.0 < args.holdout_fraction < 1.0:
+        parser.error("--holdout-fraction must be between 0 and 1")
+    if args.min_high_z < 2:
+        parser.error("--min-high-z must be >= 2 so something stays behind")
+
+    backend = load_backend(args.backend)
+    with engine.connect() as connection:
+        canonical_by_anime_id = dict(connection.execute(text(_CANONICAL_ANIME_SQL)).all())
+        eligible = connection.execute(
+            text(_ELIGIBLE_USERS_SQL), {"holdout_z": args.holdout_z, "min_high_z": args.min_high_z}
+        ).scalars().all()
+    if not eligible:
+        raise SystemExit("No users with enough high-z entries to evaluate.")
+    user_ids = sorted(random.Random(args.seed).sample(eligible, min(args.users, len(eligible))))
+    log(f"Evaluating {args.backend} on {len(user_ids)} of {len(eligible)} eligible users with {args.workers} workers")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(
+            pool.map(
+                lambda user_id: evaluate_user(
+                    backend,
+                    user_id,
+                    canonical_by_anime_id,
+                    args.holdout_fraction,
+                    args.holdout_z,
+                    args.z_score,
+                    args.k,
+                    args.seed,
+                ),
+                user_ids,
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    evaluated = [result for result in results if not result["skipped"]]
+    latencies = [result["latency_ms"] for result in evaluated]
+    recommended_ids = {anime_id for result in evaluated for anime_id in result["recommended"]}
+    catalog_size = len(set(canonical_by_anime_id.values()))
+    summary = {
+        "users_evaluated": len(evaluated),
+        "users_skipped": len(results) - len(evaluated),
+        f"recall_at_{args.k}": round(statistics.fmean(r["recall"] for r in evaluated), 4) if evaluated else 0.0,
+        f"ndcg_at_{args.k}": round(statistics.fmean(r["ndcg"] for r in evaluated), 4) if evaluated else 0.0,
+        "hit_rate": round(sum(1 for r in evaluated if r["hits"]) / len(evaluated), 4) if evaluated else 0.0,
+        "catalog_size": catalog_size,
+        "distinct_recommended": len(recommended_ids),
+        "catalog_coverage": round(len(recommended_ids) / catalog_size, 4) if catalog_size else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+        },
+        "elapsed_s": round(elapsed, 2),
+    }
+    report: dict[str, object] = {
+        "config": {
+            "backend": args.backend,
+            "users": len(user_ids),
+            "holdout_fraction": args.holdout_fraction,
+            "holdout_z": args.holdout_z,
+            "min_high_z": args.min_high_z,
+            "z_score": args.z_score,
+            "k": args.k,
+            "seed": args.seed,
+        },
+        "summary": summary,
+    }
+    if args.per_user:
+        report["users"] = [
+            {
+                key: (round(value, 4) if isinstance(value, float) else value)
+                for key, value in result.items()
+                if key != "latency_ms"
+            }
+            for result in results
+        ]
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
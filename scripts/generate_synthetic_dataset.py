@@ -0,0 +1,472 @@
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import accumulate
+from statistics import pstdev
+
+from sqlalchemy import text
+
+from app.db.enums import AnimeStatus, AnimeType, EntryStatus, Provider
+from app.db.repositories.tag_similarity import rebuild_tag_similarity
+from app.db.repositories.tags import get_or_create_tag_ids
+from app.db.session import SessionLocal
+
+
+# Synthetic anime use MAL ids from here up, far above real ones, so a
+# synthetic catalog can sit next to imported data.
+SYNTHETIC_MAL_ID_OFFSET = 50_000_000
+SYNTHETIC_TAG_PREFIX = "Synthetic Tag "
+
+# Users are drawn from a few popularity biases: the exponent of the Zipf
+# distribution over anime popularity rank they pick titles from. Low
+# exponents reach deep into the long tail ("niche" users).
+_POPULARITY_EXPONENTS = (0.25, 0.45, 0.8, 1.0, 1.15)
+_POPULARITY_EXPONENT_WEIGHTS = (0.08, 0.12, 0.3, 0.3, 0.2)
+
+_ENTRY_STATUSES = (
+    EntryStatus.WATCHED,
+    EntryStatus.WATCHING,
+    EntryStatus.ON_HOLD,
+    EntryStatus.DROPPED,
+    EntryStatus.PLAN_TO_WATCH,
+)
+_ENTRY_STATUS_WEIGHTS = (0.70, 0.08, 0.05, 0.07, 0.10)
+_ANIME_TYPES = (AnimeType.TV, AnimeType.MOVIE, AnimeType.OVA, AnimeType.ONA, AnimeType.SPECIAL)
+_ANIME_TYPE_WEIGHTS = (0.55, 0.15, 0.12, 0.12, 0.06)
+
+_COPY_CHUNK_ROWS = 200_000
+
+
+def log(message: str) -> None:
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {message}", flush=True)
+
+
+def _pg_int_array(values) -> str:
+    return "{" + ",".join(str(value) for value in values) + "}"
+
+
+def copy_rows(db, table: str, columns: tuple[str, ...], rows) -> int:
+    """COPY rows (an iterable of value tuples) into table in CSV chunks; returns the row count."""
+    cursor = db.connection().connection.cursor()
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+    try:
+        for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending >= _COPY_CHUNK_ROWS:
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                total += pending
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            total += pending
+    finally:
+        cursor.close()
+    return total
+
+
+def _zipf_cum_weights(count: int, exponent: float) -> list[float]:
+    return list(accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def _pick_distinct(rng: random.Random, cum_weights: list[float], count: int) -> list[int]:
+    """Up to count distinct indexes drawn by cum_weights, in draw order."""
+    population = len(cum_weights)
+    count = min(count, population)
+    picked: dict[int, None] = {}
+    total = cum_weights[-1]
+    while len(picked) < count:
+        for _ in range(count - len(picked) + 8):
+            picked[bisect_left(cum_weights, rng.random() * total)] = None
+        if len(picked) >= count:
+            break
+        if len(picked) > population * 0.7:
+            # The weighted draw stalls near the whole population; finish uniformly.
+            remaining = [index for index in range(population) if index not in picked]
+            for index in rng.sample(remaining, count - len(picked)):
+                picked[index] = None
+    return list(picked)[:count]
+
+
+def _list_size(rng: random.Random, minimum: int, maximum: int, alpha: float) -> int:
+    return min(maximum, int(minimum * rng.paretovariate(alpha)))
+
+
+def generate_catalog(rng: random.Random, anime_count: int, tag_ids: list[int]) -> list[dict[str, object]]:
+    """Anime in popularity order, grouped into prequel/sequel franchises.
+
+    Tags come in families of four that tend to appear together (plus the
+    odd unrelated tag), so tag co-occurrence, and therefore tag_similarity,
+    has structure. Every title belongs to a franchise of 2-4 entries whose
+    first (earliest, TV) entry is the stored franchise root, so
+    recommendations resolve franchises from stored links alone.
+    """
+    families = [tag_ids[start : start + 4] for start in range(0, len(tag_ids), 4)]
+    family_cum_weights = _zipf_cum_weights(len(families), 0.9)
+    tag_cum_weights = _zipf_cum_weights(len(tag_ids), 0.9)
+    anime: list[dict[str, object]] = []
+    for index in range(anime_count):
+        family = families[bisect_left(family_cum_weights, rng.random() * family_cum_weights[-1])]
+        family_tag_count = min(len(family), rng.choices((1, 2, 3, 4), (0.25, 0.35, 0.25, 0.15))[0])
+        anime_tag_ids = set(rng.sample(family, family_tag_count))
+        if rng.random() < 0.3:
+            anime_tag_ids.add(tag_ids[bisect_left(tag_cum_weights, rng.random() * tag_cum_weights[-1])])
+        anime_tag_ids = sorted(anime_tag_ids)
+        anime.append(
+            {
+                "mal_id": SYNTHETIC_MAL_ID_OFFSET + index + 1,
+                "quality": min(9.2, max(4.0, rng.gauss(7.0, 0.9))),
+                "tag_ids": anime_tag_ids,
+                "popularity_rank": index + 1,
+                "member_count": max(200, int(3_000_000 / ((index + 1) ** 0.85))),
+                "anime_type": rng.choices(_ANIME_TYPES, _ANIME_TYPE_WEIGHTS)[0],
+                "episode_count": rng.choice((1, 12, 12, 13, 24, 25, 26, 50)),
+                "start_year": rng.randint(1985, 2024),
+                "related": [],
+                "root_mal_id": None,
+            }
+        )
+
+    # Chain random titles into franchises; the head becomes an earlier TV entry.
+    order = list(range(anime_count))
+    rng.shuffle(order)
+    position = 0
+    while position < len(order):
+        remaining = len(order) - position
+        size = min(rng.choice((2, 2, 2, 3, 3, 4)), remaining)
+        if remaining - size == 1:
+            # Never leave a single title without a franchise.
+            size += 1
+        members = order[position : position + size]
+        position += size
+        head = anime[members[0]]
+        head["anime_type"] = AnimeType.TV
+        for offset, member in enumerate(members[1:], start=1):
+            anime[member]["start_year"] = min(2025, head["start_year"] + offset)
+        for offset, member in enumerate(members):
+            related = []
+            if offset > 0:
+                related.append(anime[members[offset - 1]]["mal_id"])
+            if offset < len(members) - 1:
+                related.append(anime[members[offset + 1]]["mal_id"])
+            anime[member]["related"] = related
+            anime[member]["root_mal_id"] = head["mal_id"]
+    return anime
+
+
+def _anime_rows(anime: list[dict[str, object]], tag_names_by_id: dict[int, str]):
+    for item in anime:
+        yield (
+            f"Synthetic Anime {item['mal_id'] - SYNTHETIC_MAL_ID_OFFSET}",
+            Provider.MAL.name,
+            item["mal_id"],
+            f"{item['quality']:.2f}",
+            item["popularity_rank"],
+            item["member_count"],
+            item["root_mal_id"],
+            item["anime_type"].name,
+            AnimeStatus.COMPLETED.name,
+            item["episode_count"],
+            item["start_year"],
+            "{" + ",".join(f'"{tag_names_by_id[tag_id]}"' for tag_id in item["tag_ids"]) + "}",
+            _pg_int_array(item["tag_ids"]),
+            _pg_int_array(item["related"]),
+        )
+
+
+_ANIME_COLUMNS = (
+    "title",
+    "provider",
+    "provider_anime_id",
+    "provider_rating",
+    "provider_popularity_rank",
+    "provider_member_count",
+    "franchise_root_mal_id",
+    "anime_type",
+    "status",
+    "episode_count",
+    "start_year",
+    "tags",
+    "tag_ids",
+    "related_prequel_sequel_mal_ids",
+)
+
+
+def _score_entry(rng: random.Random, quality: float, taste: float, status: EntryStatus) -> int:
+    if status == EntryStatus.PLAN_TO_WATCH or rng.random() < 0.15:
+        return 0
+    score = quality + taste + rng.gauss(0.0, 1.1)
+    if status == EntryStatus.DROPPED:
+        score -= 2.0
+    return max(1, min(10, round(score)))
+
+
+class _UserRows:
+    """Generate one user's entries plus the user_stats and user_tag_stats derived from them.
+
+    Stats follow refresh_user_score_and_tag_stats exactly (same rounding),
+    so the result is what an import of these lists would have stored.
+    """
+
+    def __init__(self) -> None:
+        self.entries: list[tuple] = []
+        self.stats: list[tuple] = []
+        self.tag_stats: list[tuple] = []
+
+    def add_user(
+        self,
+        rng: random.Random,
+        user_id: int,
+        anime: list[dict[str, object]],
+        anime_db_ids: list[int],
+        cum_weights: list[float],
+        size: int,
+        liked_tags: set[int],
+        disliked_tags: set[int],
+    ) -> None:
+        bias = rng.gauss(0.0, 0.7)
+        picks = _pick_distinct(rng, cum_weights, size)
+        entries: list[tuple[int, EntryStatus, int, int]] = []
+        for index in picks:
+            item = anime[index]
+            taste = bias
+            for tag_id in item["tag_ids"]:
+                if tag_id in liked_tags:
+                    taste += 0.8
+                elif tag_id in disliked_tags:
+                    taste -= 0.9
+            status = rng.choices(_ENTRY_STATUSES, _ENTRY_STATUS_WEIGHTS)[0]
+            progress = 0 if status == EntryStatus.PLAN_TO_WATCH else item["episode_count"]
+            entries.append((index, status, _score_entry(rng, item["quality"], taste, status), progress))
+
+        score_values = [float(score) for _, _, score, _ in entries if score > 0]
+        if score_values:
+            mean_score = round(sum(score_values) / len(score_values), 4)
+            stddev_score = round(pstdev(score_values), 4) if len(score_values) > 1 else 0.0
+        else:
+            mean_score = 0.0
+            stddev_score = 0.0
+        self.stats.append((user_id, mean_score, stddev_score, len(score_values), "{}"))
+
+        tag_counts: Counter[int] = Counter()
+        tag_z_score_counts: Counter[int] = Counter()
+        tag_z_score_sums: defaultdict[int, float] = defaultdict(float)
+        for index, status, score, progress in entries:
+            if score <= 0:
+                z_score = None
+            elif stddev_score > 0:
+                z_score = round((score - mean_score) / stddev_score, 4)
+            else:
+                z_score = 0.0
+            self.entries.append(
+                (user_id, anime_db_ids[index], status.name, score, "" if z_score is None else z_score, progress)
+            )
+            for tag_id in anime[index]["tag_ids"]:
+                tag_counts[tag_id] += 1
+                if z_score is not None:
+                    tag_z_score_counts[tag_id] += 1
+                    tag_z_score_sums[tag_id] += z_score
+
+        for tag_id, entry_count in tag_counts.items():
+            z_score_count = tag_z_score_counts[tag_id]
+            avg_z_score = round(tag_z_score_sums[tag_id] / z_score_count, 4) if z_score_count > 0 else ""
+            self.tag_stats.append((user_id, tag_id, entry_count, z_score_count, avg_z_score))
+
+
+def delete_synthetic_data(db, username_prefix: str) -> None:
+    user_filter = "SELECT id FROM users WHERE provider_username LIKE :prefix"
+    params = {"prefix": f"{username_prefix}%"}
+    for table in ("user_tag_stats", "user_stats", "user_anime_entries"):
+        db.execute(text(f"DELETE FROM {table} WHERE user_id IN ({user_filter})"), params)
+    db.execute(text("DELETE FROM users WHERE provider_username LIKE :prefix"), params)
+    # Synthetic anime are only referenced by synthetic users.
+    db.execute(
+        text("DELETE FROM mal_relation_cache WHERE provider_anime_id > :offset"),
+        {"offset": SYNTHETIC_MAL_ID_OFFSET},
+    )
+    db.execute(
+        text("DELETE FROM anime WHERE provider = :provider AND provider_anime_id > :offset"),
+        {"provider": Provider.MAL.name, "offset": SYNTHETIC_MAL_ID_OFFSET},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Fill the database with a synthetic catalog and users for load tests and "
+            "recommendation benchmarks: power-law list sizes and popularity, z-scores, "
+            "user tag stats, tag similarity and franchise links, all loaded with COPY. "
+            "Writes to DATABASE_URL, so point it at a scratch database."
+        )
+    )
+    parser.add_argument("--users", type=int, default=100_000, help="Synthetic users (default: 100000).")
+    parser.add_argument("--anime", type=int, default=15_000, help="Synthetic anime (default: 15000).")
+    parser.add_argument("--tags", type=int, default=80, help="Synthetic tags (default: 80).")
+    parser.add_argument("--min-list", type=int, default=20, help="Smallest list size (default: 20).")
+    parser.add_argument("--max-list", type=int, default=5000, help="Largest list size (default: 5000).")
+    parser.add_argument(
+        "--list-alpha",
+        type=float,
+        default=1.25,
+        help="Pareto shape of list sizes; lower means heavier tail (default: 1.25, ~100 entries/user).",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--username-prefix", type=str, default="synth-", help="Username prefix (default: synth-).")
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="Delete existing synthetic users and anime first instead of refusing to run.",
+    )
+    parser.add_argument(
+        "--user-batch-size",
+        type=int,
+        default=5000,
+        help="Users generated and copied per batch (default: 5000).",
+    )
+    args = parser.parse_args()
+    if args.users < 1 or args.anime < 4 or args.tags < 2:
+        parser.error("need --users >= 1, --anime >= 4 and --tags >= 2")
+    if not 1 <= args.min_list <= args.max_list:
+        parser.error("need 1 <= --min-list <= --max-list")
+    if args.list_alpha <= 0:
+        parser.error("--list-alpha must be > 0")
+
+    rng = random.Random(args.seed)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        existing = db.execute(
+            text("SELECT COUNT(*) FROM users WHERE provider_username LIKE :prefix"),
+            {"prefix": f"{args.username_prefix}%"},
+        ).scalar_one()
+        if existing:
+            if not args.replace:
+                raise SystemExit(
+                    f"{existing} users named {args.username_prefix}* already exist; pass --replace to regenerate."
+                )
+            log(f"Deleting {existing} existing synthetic users and their anime")
+            delete_synthetic_data(db, args.username_prefix)
+
+        tag_names = [f"{SYNTHETIC_TAG_PREFIX}{index:03d}" for index in range(args.tags)]
+        tag_ids_by_name = get_or_create_tag_ids(db, tag_names)
+        tag_ids = [tag_ids_by_name[name] for name in tag_names]
+        tag_names_by_id = {tag_id: name for name, tag_id in tag_ids_by_name.items()}
+
+        anime = generate_catalog(rng, args.anime, tag_ids)
+        copy_rows(db, "anime", _ANIME_COLUMNS, _anime_rows(anime, tag_names_by_id))
+        db_id_by_mal_id = dict(
+            db.execute(
+                text("SELECT provider_anime_id, id FROM anime WHERE provider = :provider AND provider_anime_id > :offset"),
+                {"provider": Provider.MAL.name, "offset": SYNTHETIC_MAL_ID_OFFSET},
+            ).all()
+        )
+        anime_db_ids = [db_id_by_mal_id[item["mal_id"]] for item in anime]
+        # The franchise walk reads relations of titles it reaches through
+        # links from mal_relation_cache, which a warmed-up database has
+        # filled; without these rows every walk would go to Jikan.
+        copy_rows(
+            db,
+            "mal_relation_cache",
+            ("provider_anime_id", "related_prequel_sequel_mal_ids"),
+            ((item["mal_id"], _pg_int_array(item["related"])) for item in anime),
+        )
+        log(f"Loaded {len(anime)} anime with {len(tag_ids)} tags and their franchise links")
+
+        copy_rows(
+            db,
+            "users",
+            ("public_id", "provider", "provider_username"),
+            ((str(uuid.UUID(int=rng.getrandbits(128), version=4)), Provider.MAL.name, f"{args.username_prefix}{index:07d}")
+             for index in range(args.users)),
+        )
+        user_ids = db.execute(
+            text("SELECT id FROM users WHERE provider_username LIKE :prefix ORDER BY provider_username"),
+            {"prefix": f"{args.username_prefix}%"},
+        ).scalars().all()
+        db.commit()
+        log(f"Loaded {len(user_ids)} users")
+
+        cum_weights_by_exponent = {
+            exponent: _zipf_cum_weights(args.anime, exponent) for exponent in _POPULARITY_EXPONENTS
+        }
+        tag_cum_weights = _zipf_cum_weights(len(tag_ids), 0.7)
+        entry_total = 0
+        for batch_start in range(0, len(user_ids), args.user_batch_size):
+            rows = _UserRows()
+            for user_id in user_ids[batch_start : batch_start + args.user_batch_size]:
+                exponent = rng.choices(_POPULARITY_EXPONENTS, _POPULARITY_EXPONENT_WEIGHTS)[0]
+                liked_tags = {
+                    tag_ids[bisect_left(tag_cum_weights, rng.random() * tag_cum_weights[-1])]
+                    for _ in range(rng.randint(1, 4))
+                }
+                disliked_tags = set(rng.sample(tag_ids, rng.randint(0, 3))) - liked_tags
+                rows.add_user(
+                    rng,
+                    user_id,
+                    anime,
+                    anime_db_ids,
+                    cum_weights_by_exponent[exponent],
+                    _list_size(rng, args.min_list, args.max_list, args.list_alpha),
+                    liked_tags,
+                    disliked_tags,
+                )
+            entry_total += copy_rows(
+                db,
+                "user_anime_entries",
+                ("user_id", "anime_id", "status", "score", "z_score", "progress"),
+                rows.entries,
+            )
+            copy_rows(
+                db,
+                "user_stats",
+                ("user_id", "mean_score", "stddev_score", "rating_count", "mal_list_page_fingerprints"),
+                rows.stats,
+            )
+            copy_rows(
+                db,
+                "user_tag_stats",
+                ("user_id", "tag_id", "entry_count", "z_score_count", "avg_z_score"),
+                rows.tag_stats,
+            )
+            db.commit()
+            done = min(batch_start + args.user_batch_size, len(user_ids))
+            elapsed = time.perf_counter() - started
+            log(f"Users {done}/{len(user_ids)} entries={entry_total} ({entry_total / elapsed:,.0f} rows/s)")
+
+        summary = rebuild_tag_similarity(db)
+        db.commit()
+        log(f"Rebuilt tag similarity: {summary}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Fresh statistics so the benchmark sees the plans production would.
+    with SessionLocal() as analyze_db:
+        for table in ("anime", "users", "user_anime_entries", "user_stats", "user_tag_stats", "tag_similarity"):
+            analyze_db.execute(text(f"ANALYZE {table}"))
+        analyze_db.commit()
+
+    log(
+        f"Done. users={args.users} anime={args.anime} entries={entry_total} "
+        f"elapsed={time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
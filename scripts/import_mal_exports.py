@@ -0,0 +1,99 @@
+import argparse
+import os
+import time
+
+from fastapi import HTTPException
+
+from app.api.v1.routes.user import parse_mal_username, run_mal_import
+from app.db.session import SessionLocal
+from app.services.mal_export import parse_mal_export
+from scripts._common import log
+from scripts.import_mal_users import ImportProgressReporter
+
+_EXPORT_SUFFIXES = (".xml", ".xml.gz")
+
+
+def collect_export_paths(paths: list[str]) -> list[str]:
+    """Expand directories to the MAL export files directly inside them."""
+    export_paths: list[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            export_paths.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(_EXPORT_SUFFIXES)
+            )
+        else:
+            export_paths.append(path)
+    return export_paths
+
+
+def import_export_file(path: str, enrichment_mode: str) -> dict[str, object]:
+    started = time.perf_counter()
+    username = os.path.basename(path)
+    db = SessionLocal()
+    try:
+        with open(path, "rb") as handle:
+            export_username, provider_user_id, list_pages = parse_mal_export(handle)
+        username = parse_mal_username(export_username)
+        result = run_mal_import(
+            db,
+            username,
+            provider_user_id=provider_user_id,
+            list_pages=list_pages,
+            enrichment_mode=enrichment_mode,
+        )
+        return {
+            "username": username,
+            "ok": True,
+            "result": result.model_dump(),
+            "elapsed": time.perf_counter() - started,
+        }
+    except (OSError, ValueError) as exc:
+        db.rollback()
+        return {"username": username, "ok": False, "error": str(exc), "elapsed": time.perf_counter() - started}
+    except HTTPException as exc:
+        db.rollback()
+        return {
+            "username": username,
+            "ok": False,
+            "error": f"{exc.status_code}: {exc.detail}",
+            "elapsed": time.perf_counter() - started,
+        }
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Import MAL XML list exports (.xml or .xml.gz) without calling MAL or Jikan."
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Export files, or directories whose .xml/.xml.gz files are all imported.",
+    )
+    parser.add_argument(
+        "--enrichment-mode",
+        type=str,
+        default="none",
+        choices=["full", "relations", "none"],
+        help="Jikan enrichment for anime in the exports (default: none, fully offline).",
+    )
+    args = parser.parse_args()
+
+    export_paths = collect_export_paths(args.paths)
+    if not export_paths:
+        raise SystemExit("No MAL export files found.")
+
+    log(f"Importing {len(export_paths)} MAL export file(s) (enrichment={args.enrichment_mode})")
+    reporter = ImportProgressReporter(len(export_paths))
+    for path in export_paths:
+        reporter.record(import_export_file(path, args.enrichment_mode))
+    reporter.summary()
+    if reporter.failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
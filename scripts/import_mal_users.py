@@ -1,22 +1,22 @@
 import argparse
-from collections import Counter
-from itertools import combinations
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections.abc import Callable
+import json
 import os
 import time
 
 from fastapi import HTTPException
-from sqlalchemy import delete, select
 
-from app.api.v1.routes.user import import_mal_list
-from app.db.models.anime import Anime
-from app.db.models.tag_similarity import TagSimilarity
-from app.db.session import SessionLocal
-from app.schemas.user import UserImportMALRequest
-
-
-def log(message: str) -> None:
-    ts = time.strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{ts}] {message}", flush=True)
+from app.api.v1.routes.user import (
+    fetch_mal_anime_enrichment,
+    fetch_mal_user_list,
+    parse_mal_username,
+    plan_mal_enrichment,
+    run_mal_import,
+)
+from app.db.repositories.tag_similarity import rebuild_tag_similarity
+from app.db.session import SessionLocal, engine
+from scripts._common import log
 
 
 def parse_usernames(args: argparse.Namespace) -> list[str]:
@@ -40,85 +40,20 @@ def parse_usernames(args: argparse.Namespace) -> list[str]:
     return deduped
 
 
-def _normalize_tag_list(raw_tags: object) -> list[str]:
-    if not isinstance(raw_tags, list):
-        return []
-
-    seen: set[str] = set()
-    cleaned_tags: list[str] = []
-    for value in raw_tags:
-        if not isinstance(value, str):
-            continue
-        cleaned = value.strip()
-        if not cleaned:
-            continue
-        key = cleaned.lower()
-        if key in seen:
-            continue
-        seen.add(key)
-        cleaned_tags.append(cleaned)
-    return cleaned_tags
-
-
-def rebuild_tag_similarity() -> None:
+def refresh_tag_similarity() -> None:
     started = time.perf_counter()
     log("Rebuilding tag_similarity from anime tags...")
 
     db = SessionLocal()
     try:
-        anime_tag_rows = db.execute(select(Anime.tags)).scalars().all()
-        tag_counts: Counter[str] = Counter()
-        pair_counts: Counter[tuple[str, str]] = Counter()
-        anime_with_tags = 0
-
-        for raw_tags in anime_tag_rows:
-            tags = sorted(_normalize_tag_list(raw_tags))
-            if len(tags) < 1:
-                continue
-
-            anime_with_tags += 1
-            tag_counts.update(tags)
-
-            if len(tags) < 2:
-                continue
-
-            for left_tag, right_tag in combinations(tags, 2):
-                pair_counts[(left_tag, right_tag)] += 1
-
-        payload_rows: list[dict[str, object]] = []
-        for (left_tag, right_tag), cooccurrence_count in pair_counts.items():
-            denom = tag_counts[left_tag] + tag_counts[right_tag] - cooccurrence_count
-            if denom <= 0:
-                continue
-            jaccard_score = cooccurrence_count / denom
-            payload_rows.append(
-                {
-                    "source_tag": left_tag,
-                    "related_tag": right_tag,
-                    "cooccurrence_count": cooccurrence_count,
-                    "jaccard_score": float(jaccard_score),
-                }
-            )
-            payload_rows.append(
-                {
-                    "source_tag": right_tag,
-                    "related_tag": left_tag,
-                    "cooccurrence_count": cooccurrence_count,
-                    "jaccard_score": float(jaccard_score),
-                }
-            )
-
-        db.execute(delete(TagSimilarity))
-        if payload_rows:
-            db.execute(TagSimilarity.__table__.insert(), payload_rows)
+        counts = rebuild_tag_similarity(db)
         db.commit()
 
         elapsed = time.perf_counter() - started
         log(
             "Rebuilt tag_similarity "
-            f"(anime_rows={len(anime_tag_rows)}, anime_with_tags={anime_with_tags}, "
-            f"unique_tags={len(tag_counts)}, undirected_pairs={len(pair_counts)}, "
-            f"stored_rows={len(payload_rows)}, elapsed={elapsed:.2f}s)"
+            f"(unique_tags={counts['unique_tags']}, stored_rows={counts['stored_rows']}, "
+            f"version={counts['version']}, elapsed={elapsed:.2f}s)"
         )
     except Exception:
         db.rollback()
@@ -127,6 +62,343 @@ def rebuild_tag_similarity() -> None:
         db.close()
 
 
+def _init_worker() -> None:
+    # Each worker process opens its own connections instead of sharing pooled
+    # sockets inherited from the parent.
+    engine.dispose(close=False)
+
+
+class ImportCheckpoint:
+    """Append-only JSONL log of per-user import progress, safe to share across workers."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def has_records(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def reset(self) -> None:
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+
+    def append(self, event: str, username: str, **fields: object) -> None:
+        record = {"ts": time.time(), "event": event, "username": username, **fields}
+        # One short O_APPEND write per record, so concurrent workers never
+        # interleave partial lines.
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def load(self) -> dict[str, dict[str, object]]:
+        state: dict[str, dict[str, object]] = {}
+        if not os.path.exists(self.path):
+            return state
+
+        with open(self.path, "r", encoding="utf-8") as handle:
+            for raw in handle:
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    # A crash can leave the last line half written.
+                    continue
+                username = record.get("username")
+                if not isinstance(username, str):
+                    continue
+                user_state = state.setdefault(
+                    username,
+                    {"done": False, "failures": 0, "retryable": True, "pages_committed": 0},
+                )
+                event = record.get("event")
+                if event == "page":
+                    user_state["pages_committed"] = int(record.get("page", 0))
+                elif event == "done":
+                    user_state["done"] = True
+                    user_state["pages_committed"] = 0
+                elif event == "failed":
+                    user_state["failures"] = int(user_state["failures"]) + 1
+                    user_state["retryable"] = bool(record.get("retryable", True))
+        return state
+
+
+def _is_retryable_status(status_code: int | None) -> bool:
+    # Unknown users and bad input fail the same way every time; upstream
+    # errors, rate limits and write conflicts are worth another attempt.
+    return status_code is None or status_code in {409, 429} or status_code >= 500
+
+
+def import_user(
+    username: str,
+    prepared: tuple[int, list[list], dict[int, dict[str, object]]] | None = None,
+    checkpoint_path: str | None = None,
+    resume_after_page: int = 0,
+) -> dict[str, object]:
+    started = time.perf_counter()
+    checkpoint = ImportCheckpoint(checkpoint_path) if checkpoint_path else None
+
+    def _record_progress(stage: str, counters: dict[str, int]) -> None:
+        if checkpoint is not None and stage == "page_committed":
+            checkpoint.append("page", username, page=counters["pages_fetched"])
+
+    db = SessionLocal()
+    try:
+        provider_user_id: int | None = None
+        list_pages: list[list] | None = None
+        enrichment_cache: dict[int, dict[str, object]] | None = None
+        if prepared is not None:
+            provider_user_id, list_pages, enrichment_cache = prepared
+        result = run_mal_import(
+            db,
+            parse_mal_username(f"https://myanimelist.net/animelist/{username}"),
+            progress=_record_progress,
+            provider_user_id=provider_user_id,
+            list_pages=list_pages,
+            enrichment_cache=enrichment_cache,
+            resume_after_page=resume_after_page,
+        )
+        outcome: dict[str, object] = {
+            "username": username,
+            "ok": True,
+            "result": result.model_dump(mode="json"),
+            "elapsed": time.perf_counter() - started,
+        }
+    except HTTPException as exc:
+        outcome = {
+            "username": username,
+            "ok": False,
+            "status": exc.status_code,
+            "error": f"status={exc.status_code} detail={exc.detail}",
+            "elapsed": time.perf_counter() - started,
+        }
+    except Exception as exc:
+        outcome = {
+            "username": username,
+            "ok": False,
+            "status": None,
+            "error": f"error={exc}",
+            "elapsed": time.perf_counter() - started,
+        }
+    finally:
+        db.close()
+
+    if checkpoint is not None:
+        if outcome["ok"]:
+            checkpoint.append("done", username)
+        else:
+            checkpoint.append(
+                "failed",
+                username,
+                error=outcome["error"],
+                retryable=_is_retryable_status(outcome["status"]),
+            )
+    return outcome
+
+
+def _fetch_user_list(username: str) -> tuple[int, list[list]] | dict[str, object]:
+    started = time.perf_counter()
+    try:
+        return fetch_mal_user_list(username)
+    except HTTPException as exc:
+        return {
+            "username": username,
+            "ok": False,
+            "status": exc.status_code,
+            "error": f"status={exc.status_code} detail={exc.detail}",
+            "elapsed": time.perf_counter() - started,
+        }
+
+
+def fetch_user_lists(
+    usernames: list[str],
+    workers: int = 1,
+) -> tuple[dict[str, tuple[int, list[list]]], list[dict[str, object]]]:
+    fetched: dict[str, tuple[int, list[list]]] = {}
+    failures: list[dict[str, object]] = []
+    # Lists are fetched concurrently; the Jikan profile lookups still queue on
+    # the shared rate limiter, so extra threads only overlap network waits.
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for username, outcome in zip(usernames, pool.map(_fetch_user_list, usernames)):
+            if isinstance(outcome, dict):
+                failures.append(outcome)
+            else:
+                fetched[username] = outcome
+    return fetched, failures
+
+
+def enrich_batch(
+    usernames: list[str],
+    fetched: dict[str, tuple[int, list[list]]],
+    pages_committed: dict[str, int],
+) -> dict[int, dict[str, object]]:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        enrichment_queue = plan_mal_enrichment(
+            db,
+            {username: fetched[username][1] for username in usernames if username in fetched},
+            resume_after_pages=pages_committed,
+        )
+    finally:
+        db.close()
+
+    log(f"Enriching {len(enrichment_queue)} unique anime for {len(fetched)} users")
+    enrichment_cache: dict[int, dict[str, object]] = {}
+    for queue_index, provider_anime_id in enumerate(enrichment_queue, start=1):
+        enrichment_cache[provider_anime_id] = fetch_mal_anime_enrichment(provider_anime_id)
+        if queue_index % 50 == 0:
+            log(f"Enriched {queue_index}/{len(enrichment_queue)} anime")
+    log(f"Enrichment pass done (anime={len(enrichment_queue)}, elapsed={time.perf_counter() - started:.2f}s)")
+    return enrichment_cache
+
+
+def _user_enrichment_cache(
+    list_pages: list[list],
+    enrichment_cache: dict[int, dict[str, object]],
+) -> dict[int, dict[str, object]]:
+    # Worker processes get only the slice of the batch cache their list needs.
+    return {
+        item["anime_id"]: enrichment_cache[item["anime_id"]]
+        for list_data in list_pages
+        for item in list_data
+        if isinstance(item, dict) and item.get("anime_id") in enrichment_cache
+    }
+
+
+def import_batch_deduped(
+    usernames: list[str],
+    record: Callable[[dict[str, object]], None],
+    pool: ProcessPoolExecutor | None,
+    checkpoint_path: str | None,
+    pages_committed: dict[str, int],
+    workers: int = 1,
+) -> None:
+    log(f"Fetching lists for batch of {len(usernames)} users")
+    fetched, failures = fetch_user_lists(usernames, workers)
+    for outcome in failures:
+        if checkpoint_path:
+            ImportCheckpoint(checkpoint_path).append(
+                "failed",
+                outcome["username"],
+                error=outcome["error"],
+                retryable=_is_retryable_status(outcome["status"]),
+            )
+        record(outcome)
+
+    enrichment_cache = enrich_batch(usernames, fetched, pages_committed)
+
+    if pool is None:
+        for username, (provider_user_id, list_pages) in fetched.items():
+            record(
+                import_user(
+                    username,
+                    (provider_user_id, list_pages, enrichment_cache),
+                    checkpoint_path,
+                    pages_committed.get(username, 0),
+                )
+            )
+        return
+
+    futures = [
+        pool.submit(
+            import_user,
+            username,
+            (provider_user_id, list_pages, _user_enrichment_cache(list_pages, enrichment_cache)),
+            checkpoint_path,
+            pages_committed.get(username, 0),
+        )
+        for username, (provider_user_id, list_pages) in fetched.items()
+    ]
+    for future in as_completed(futures):
+        record(future.result())
+
+
+def import_round(
+    usernames: list[str],
+    args: argparse.Namespace,
+    record: Callable[[dict[str, object]], None],
+    checkpoint_path: str | None,
+    pages_committed: dict[str, int],
+) -> None:
+    if args.dedupe_enrichment:
+        batch_size = max(args.batch_size, 1)
+        pool = (
+            ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker)
+            if args.workers > 1
+            else None
+        )
+        try:
+            for start in range(0, len(usernames), batch_size):
+                import_batch_deduped(
+                    usernames[start:start + batch_size],
+                    record,
+                    pool,
+                    checkpoint_path,
+                    pages_committed,
+                    args.workers,
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    elif args.workers <= 1:
+        for username in usernames:
+            log(f"START {username}")
+            record(import_user(username, None, checkpoint_path, pages_committed.get(username, 0)))
+    else:
+        # Workers share the Jikan budget through the cross-process rate limiter,
+        # so adding workers raises throughput only up to the upstream quota.
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(import_user, username, None, checkpoint_path, pages_committed.get(username, 0))
+                for username in usernames
+            ]
+            for future in as_completed(futures):
+                record(future.result())
+
+
+class ImportProgressReporter:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.done = 0
+        self.ok = 0
+        self.failed = 0
+        self.items_seen = 0
+        self.anime_created = 0
+        self.entries_created = 0
+        self.started = time.perf_counter()
+
+    def record(self, outcome: dict[str, object]) -> None:
+        self.done += 1
+        username = outcome["username"]
+        elapsed = float(outcome["elapsed"])
+        prefix = f"[{self.done}/{self.total}]"
+        if not outcome["ok"]:
+            self.failed += 1
+            log(f"{prefix} FAIL {username} ({outcome['error']}, elapsed={elapsed:.2f}s)")
+            return
+
+        result = outcome["result"]
+        self.ok += 1
+        self.items_seen += result["items_seen"]
+        self.anime_created += result["anime_created"]
+        self.entries_created += result["entries_created"]
+        log(
+            f"{prefix} OK {username} "
+            f"(items={result['items_seen']}, anime+={result['anime_created']}, "
+            f"entries+={result['entries_created']}, mean={result['mean_score']:.2f}, "
+            f"stddev={result['stddev_score']:.2f}, count={result['rating_count']}, "
+            f"elapsed={elapsed:.2f}s)"
+        )
+
+    def summary(self) -> None:
+        total_elapsed = time.perf_counter() - self.started
+        users_per_minute = self.done / total_elapsed * 60 if total_elapsed > 0 else 0.0
+        log(
+            f"Done. total={self.total} ok={self.ok} failed={self.failed} "
+            f"items={self.items_seen} anime+={self.anime_created} entries+={self.entries_created} "
+            f"elapsed={total_elapsed:.2f}s users_per_min={users_per_minute:.1f}"
+        )
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Bulk import MAL users using the existing /users/import/mal route logic."
@@ -143,6 +415,57 @@ def main() -> None:
         default=0,
         help="Optional limit for how many usernames to import (0 = no limit).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes importing users in parallel (default: 1, serial).",
+    )
+    parser.add_argument(
+        "--dedupe-enrichment",
+        action="store_true",
+        help=(
+            "Fetch every list in a batch first, enrich each distinct anime once "
+            "(most shared first), then write the users."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Users per fetch/enrich/write batch with --dedupe-enrichment (default: 100).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default="",
+        help=(
+            "Path to a JSONL checkpoint file recording finished users and committed pages. "
+            "An existing non-empty file is refused unless --resume or --overwrite-checkpoint is given."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from --checkpoint: skip finished users and retry failed ones.",
+    )
+    parser.add_argument(
+        "--overwrite-checkpoint",
+        action="store_true",
+        help="Discard the records already in --checkpoint and start a fresh run.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=3,
+        help="Retries per user for transient failures, counted across resumed runs (default: 3).",
+    )
+    parser.add_argument(
+        "--retry-backoff-seconds",
+        type=float,
+        default=30.0,
+        help="Base delay before a retry round; doubles each round (default: 30).",
+    )
     parser.add_argument(
         "--enrichment-mode",
         type=str,
@@ -156,10 +479,23 @@ def main() -> None:
         default=None,
         help="Skip per-anime enrichment when MAL provider rating is <= this value (e.g. 7.5).",
     )
+    parser.add_argument(
+        "--chunked-commits",
+        action="store_true",
+        help="Commit catalog upserts per list page (sets MAL_IMPORT_CHUNKED_COMMITS=1 for this run).",
+    )
+    parser.add_argument(
+        "--rebuild-tag-similarity",
+        action="store_true",
+        help=(
+            "Fully rebuild tag counts and tag_similarity after the batch. Imports keep them "
+            "current incrementally, so this is only needed to repair drift."
+        ),
+    )
     parser.add_argument(
         "--skip-tag-similarity-refresh",
         action="store_true",
-        help="Skip rebuilding tag_similarity after the import batch finishes.",
+        help="No-op, kept for existing invocations; tag_similarity is no longer rebuilt by default.",
     )
     args = parser.parse_args()
 
@@ -170,61 +506,103 @@ def main() -> None:
     if args.max_users > 0:
         usernames = usernames[: args.max_users]
 
+    if args.resume and not args.checkpoint:
+        raise SystemExit("--resume requires --checkpoint.")
+    if args.overwrite_checkpoint and not args.checkpoint:
+        raise SystemExit("--overwrite-checkpoint requires --checkpoint.")
+    if args.resume and args.overwrite_checkpoint:
+        raise SystemExit("--resume and --overwrite-checkpoint cannot be combined.")
+    checkpoint = ImportCheckpoint(args.checkpoint) if args.checkpoint else None
+    checkpoint_path = checkpoint.path if checkpoint is not None else None
+    failure_counts: dict[str, int] = {}
+    pages_committed: dict[str, int] = {}
+    if checkpoint is not None and args.resume:
+        checkpoint_state = checkpoint.load()
+        pending: list[str] = []
+        for username in usernames:
+            user_state = checkpoint_state.get(username)
+            if user_state is None:
+                pending.append(username)
+                continue
+            if user_state["done"]:
+                continue
+            failures = int(user_state["failures"])
+            if failures > 0 and (not user_state["retryable"] or failures > args.max_retries):
+                log(f"Skipping {username}: failed {failures} time(s) and will not be retried")
+                continue
+            failure_counts[username] = failures
+            pages_committed[username] = int(user_state["pages_committed"])
+            pending.append(username)
+        log(
+            f"Resuming from {args.checkpoint}: {len(usernames) - len(pending)} users skipped, "
+            f"{len(pending)} pending ({sum(1 for count in failure_counts.values() if count)} retries)"
+        )
+        usernames = pending
+    elif checkpoint is not None:
+        if checkpoint.has_records() and not args.overwrite_checkpoint:
+            raise SystemExit(
+                f"Checkpoint {args.checkpoint} already has records. Pass --resume to continue that run "
+                "or --overwrite-checkpoint to discard it."
+            )
+        checkpoint.reset()
+
     previous_enrichment_mode = os.environ.get("MAL_IMPORT_ENRICHMENT_MODE")
     previous_enrichment_min_rating = os.environ.get("MAL_IMPORT_ENRICHMENT_MIN_RATING")
+    previous_chunked_commits = os.environ.get("MAL_IMPORT_CHUNKED_COMMITS")
     if args.enrichment_mode:
         os.environ["MAL_IMPORT_ENRICHMENT_MODE"] = args.enrichment_mode
         log(f"Set MAL_IMPORT_ENRICHMENT_MODE={args.enrichment_mode} for this run")
     if args.enrichment_min_rating is not None:
         os.environ["MAL_IMPORT_ENRICHMENT_MIN_RATING"] = str(args.enrichment_min_rating)
         log(f"Set MAL_IMPORT_ENRICHMENT_MIN_RATING={args.enrichment_min_rating} for this run")
+    if args.workers > 1 and not args.chunked_commits:
+        # Parallel imports touch the same popular anime rows; short per-page
+        # catalog transactions keep them from blocking each other for a whole list.
+        args.chunked_commits = True
+        log("Enabling --chunked-commits because --workers > 1")
+    if args.chunked_commits:
+        os.environ["MAL_IMPORT_CHUNKED_COMMITS"] = "1"
+        log("Set MAL_IMPORT_CHUNKED_COMMITS=1 for this run")
 
     total = len(usernames)
-    ok = 0
-    failed = 0
-    batch_started = time.perf_counter()
-
-    log(f"Starting import for {total} MAL users.")
-    for index, username in enumerate(usernames, start=1):
-        user_started = time.perf_counter()
-        log(f"[{index}/{total}] START {username}")
-        db = SessionLocal()
-        try:
-            log(f"[{index}/{total}] Building request payload for {username}")
-            payload = UserImportMALRequest(
-                mal_list_url=f"https://myanimelist.net/animelist/{username}"
-            )
-            log(f"[{index}/{total}] Calling import_mal_list for {username}")
-            result = import_mal_list(payload=payload, db=db)
-            ok += 1
-            elapsed = time.perf_counter() - user_started
-            log(
-                f"[{index}/{total}] OK {username} "
-                f"(items={result.items_seen}, anime+={result.anime_created}, "
-                f"entries+={result.entries_created}, mean={result.mean_score:.2f}, "
-                f"stddev={result.stddev_score:.2f}, count={result.rating_count}, "
-                f"elapsed={elapsed:.2f}s)"
-            )
-        except HTTPException as exc:
-            failed += 1
-            elapsed = time.perf_counter() - user_started
-            log(
-                f"[{index}/{total}] FAIL {username} "
-                f"(status={exc.status_code} detail={exc.detail}, elapsed={elapsed:.2f}s)"
-            )
-        except Exception as exc:
-            failed += 1
-            elapsed = time.perf_counter() - user_started
-            log(f"[{index}/{total}] FAIL {username} (error={exc}, elapsed={elapsed:.2f}s)")
-        finally:
-            log(f"[{index}/{total}] Closing DB session for {username}")
-            db.close()
-
-    total_elapsed = time.perf_counter() - batch_started
-    log(f"Done. total={total} ok={ok} failed={failed} elapsed={total_elapsed:.2f}s")
-
-    if not args.skip_tag_similarity_refresh:
-        rebuild_tag_similarity()
+    reporter = ImportProgressReporter(total)
+    log(f"Starting import for {total} MAL users (workers={max(args.workers, 1)}).")
+
+    retry_round = 0
+    while usernames:
+        retryable: list[str] = []
+
+        def _record(outcome: dict[str, object]) -> None:
+            reporter.record(outcome)
+            if outcome["ok"] or not _is_retryable_status(outcome.get("status")):
+                return
+            username = str(outcome["username"])
+            failure_counts[username] = failure_counts.get(username, 0) + 1
+            if failure_counts[username] <= args.max_retries:
+                retryable.append(username)
+
+        import_round(usernames, args, _record, checkpoint_path, pages_committed)
+        if checkpoint is not None:
+            # Pick up pages committed by users that failed part-way through.
+            checkpoint_state = checkpoint.load()
+            pages_committed = {
+                username: int(checkpoint_state[username]["pages_committed"])
+                for username in retryable
+                if username in checkpoint_state
+            }
+
+        usernames = retryable
+        if usernames:
+            delay = max(args.retry_backoff_seconds, 0.0) * (2 ** retry_round)
+            retry_round += 1
+            reporter.total += len(usernames)
+            log(f"Retrying {len(usernames)} failed users in {delay:.1f}s (round {retry_round})")
+            time.sleep(delay)
+
+    reporter.summary()
+
+    if args.rebuild_tag_similarity:
+        refresh_tag_similarity()
 
     if args.enrichment_mode:
         if previous_enrichment_mode is None:
@@ -236,6 +614,11 @@ def main() -> None:
             os.environ.pop("MAL_IMPORT_ENRICHMENT_MIN_RATING", None)
         else:
             os.environ["MAL_IMPORT_ENRICHMENT_MIN_RATING"] = previous_enrichment_min_rating
+    if args.chunked_commits:
+        if previous_chunked_commits is None:
+            os.environ.pop("MAL_IMPORT_CHUNKED_COMMITS", None)
+        else:
+            os.environ["MAL_IMPORT_CHUNKED_COMMITS"] = previous_chunked_commits
 
 
 if __name__ == "__main__":
@@ -0,0 +1,293 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from collections.abc import Iterator
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from app.api.v1.routes.user import (
+    _extract_jikan_anime_tags,
+    _extract_prequel_sequel_mal_ids_from_relations_payload,
+)
+from app.db.enums import Provider
+from app.db.repositories.tag_similarity import apply_anime_tag_changes
+from app.db.repositories.tags import get_or_create_tag_ids, tag_ids_for_names
+from app.db.session import SessionLocal
+from scripts.load_high_rated_anime import map_anime_status, map_anime_type, pick_title
+
+
+# Staging/COPY column order. provider and provider_anime_id form the merge key.
+_DUMP_COLUMNS = (
+    "title",
+    "provider",
+    "provider_anime_id",
+    "provider_rating",
+    "provider_popularity_rank",
+    "provider_member_count",
+    "anime_type",
+    "status",
+    "episode_count",
+    "start_year",
+    "tags",
+    "tag_ids",
+    "related_prequel_sequel_mal_ids",
+)
+
+# Values missing from a dump object never blank out what is already stored.
+_MERGE_SCALAR_COLUMNS = (
+    "provider_rating",
+    "provider_popularity_rank",
+    "provider_member_count",
+    "anime_type",
+    "status",
+    "episode_count",
+    "start_year",
+)
+_MERGE_ARRAY_COLUMNS = ("related_prequel_sequel_mal_ids",)
+
+_CREATE_STAGING_SQL = f"""
+CREATE TEMP TABLE anime_dump_staging ON COMMIT DROP AS
+SELECT {", ".join(_DUMP_COLUMNS)} FROM anime WITH NO DATA
+"""
+
+_LOCK_EXISTING_SQL = """
+SELECT a.provider_anime_id, a.tag_ids
+FROM anime AS a
+JOIN anime_dump_staging AS s
+    ON s.provider = a.provider
+   AND s.provider_anime_id = a.provider_anime_id
+ORDER BY a.id
+FOR UPDATE OF a
+"""
+
+
+def _merge_sql() -> str:
+    merged_values = {"title": "EXCLUDED.title"}
+    merged_values.update(
+        (column, f"COALESCE(EXCLUDED.{column}, anime.{column})") for column in _MERGE_SCALAR_COLUMNS
+    )
+    # tags and tag_ids move together so they stay index-aligned.
+    for column in ("tags", "tag_ids"):
+        merged_values[column] = (
+            f"CASE WHEN cardinality(EXCLUDED.tags) > 0 THEN EXCLUDED.{column} ELSE anime.{column} END"
+        )
+    merged_values.update(
+        (column, f"CASE WHEN cardinality(EXCLUDED.{column}) > 0 THEN EXCLUDED.{column} ELSE anime.{column} END")
+        for column in _MERGE_ARRAY_COLUMNS
+    )
+    return f"""
+INSERT INTO anime ({", ".join(_DUMP_COLUMNS)})
+SELECT {", ".join(_DUMP_COLUMNS)}
+FROM anime_dump_staging
+ORDER BY provider_anime_id
+ON CONFLICT ON CONSTRAINT uq_anime_provider_provider_anime_id DO UPDATE
+SET {", ".join(f"{column} = {value}" for column, value in merged_values.items())}
+WHERE ({", ".join(f"anime.{column}" for column in merged_values)})
+    IS DISTINCT FROM ({", ".join(merged_values.values())})
+RETURNING provider_anime_id, (xmax = 0) AS inserted, tag_ids
+"""
+
+
+def log(message: str) -> None:
+    ts = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] {message}", flush=True)
+
+
+def open_dump(path: str):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_dump_objects(handle) -> Iterator[dict | None]:
+    """Yield one anime object per non-blank line; None for lines that are not one."""
+    for raw in handle:
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        # Accept both raw Jikan responses ({"data": {...}}) and bare objects.
+        if isinstance(payload, dict) and isinstance(payload.get("data"), dict):
+            payload = payload["data"]
+        yield payload if isinstance(payload, dict) else None
+
+
+def anime_row_from_dump_object(data: dict) -> dict[str, object] | None:
+    mal_id = data.get("mal_id")
+    title = pick_title(data)
+    if not isinstance(mal_id, int) or mal_id <= 0 or title is None:
+        return None
+
+    score = data.get("score")
+    popularity = data.get("popularity")
+    members = data.get("members")
+    episodes = data.get("episodes")
+    year = data.get("year")
+    anime_type = map_anime_type(data.get("type"))
+    status = map_anime_status(data.get("status"))
+    if anime_type is None or status is None:
+        # Both are NOT NULL on anime; a Jikan object without them is truncated.
+        return None
+
+    return {
+        "title": title,
+        "provider": Provider.MAL.name,
+        "provider_anime_id": mal_id,
+        "provider_rating": Decimal(str(score)) if isinstance(score, (int, float)) else None,
+        "provider_popularity_rank": popularity if isinstance(popularity, int) and popularity > 0 else None,
+        "provider_member_count": members if isinstance(members, int) and members > 0 else None,
+        "anime_type": anime_type.name,
+        "status": status.name,
+        "episode_count": episodes if isinstance(episodes, int) and episodes > 0 else None,
+        "start_year": year if isinstance(year, int) else None,
+        "tags": _extract_jikan_anime_tags(data),
+        "tag_ids": [],
+        "related_prequel_sequel_mal_ids": _extract_prequel_sequel_mal_ids_from_relations_payload(
+            data.get("relations")
+        ),
+    }
+
+
+def _pg_array_literal(values: list) -> str:
+    items = []
+    for value in values:
+        if isinstance(value, str):
+            escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+            items.append(f'"{escaped}"')
+        else:
+            items.append(str(value))
+    return "{" + ",".join(items) + "}"
+
+
+def _copy_rows_csv(rows: list[dict[str, object]]) -> io.StringIO:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                _pg_array_literal(value) if isinstance(value, list) else ("" if value is None else value)
+                for value in (row[column] for column in _DUMP_COLUMNS)
+            ]
+        )
+    buffer.seek(0)
+    return buffer
+
+
+def load_batch(
+    db,
+    rows: list[dict[str, object]],
+    anime_tag_changes: list[tuple[list[int], list[int]]],
+) -> tuple[int, int]:
+    """COPY one batch into a staging table and merge it into anime; returns (created, updated).
+
+    The (old_tag_ids, new_tag_ids) of every anime whose tags changed are
+    appended to anime_tag_changes for the caller to apply once at the end.
+    """
+    tag_ids_by_name = get_or_create_tag_ids(db, [tag for row in rows for tag in row["tags"]])
+    for row in rows:
+        row["tag_ids"] = tag_ids_for_names(row["tags"], tag_ids_by_name)
+
+    db.execute(text(_CREATE_STAGING_SQL))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY anime_dump_staging ({', '.join(_DUMP_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            _copy_rows_csv(rows),
+        )
+    finally:
+        cursor.close()
+
+    old_tag_ids_by_mal_id = dict(db.execute(text(_LOCK_EXISTING_SQL)).all())
+    merged = db.execute(text(_merge_sql())).all()
+
+    created = 0
+    for mal_id, inserted, tag_ids in merged:
+        if inserted:
+            created += 1
+        old_tag_ids = [] if inserted else list(old_tag_ids_by_mal_id.get(mal_id) or [])
+        if old_tag_ids != list(tag_ids or []):
+            anime_tag_changes.append((old_tag_ids, list(tag_ids or [])))
+    return created, len(merged) - created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Load anime from a local newline-delimited JSON dump of Jikan /anime/{id} objects "
+            "(relations included) without network access."
+        )
+    )
+    parser.add_argument("path", help="Dump file (.jsonl or .jsonl.gz), or - for stdin.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Anime per COPY + merge; each batch is committed on its own.",
+    )
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be >= 1")
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    lines = 0
+    skipped = 0
+    created = 0
+    updated = 0
+    batch_by_mal_id: dict[int, dict[str, object]] = {}
+    anime_tag_changes: list[tuple[list[int], list[int]]] = []
+
+    def flush() -> None:
+        nonlocal created, updated
+        if not batch_by_mal_id:
+            return
+        batch_created, batch_updated = load_batch(db, list(batch_by_mal_id.values()), anime_tag_changes)
+        db.commit()
+        created += batch_created
+        updated += batch_updated
+        batch_by_mal_id.clear()
+        log(f"Loaded {lines} objects (created={created}, updated={updated}, skipped={skipped})")
+
+    try:
+        with open_dump(args.path) as handle:
+            for data in iter_dump_objects(handle):
+                lines += 1
+                row = anime_row_from_dump_object(data) if data is not None else None
+                if row is None:
+                    skipped += 1
+                    continue
+                # A staged merge cannot touch the same anime twice; the later line wins.
+                batch_by_mal_id[row["provider_anime_id"]] = row
+                if len(batch_by_mal_id) >= args.batch_size:
+                    flush()
+        flush()
+        # Tag counts and tag_similarity move once for the whole dump rather
+        # than once per batch.
+        apply_anime_tag_changes(db, anime_tag_changes)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    log(
+        f"Done. objects={lines} created={created} updated={updated} skipped={skipped} "
+        f"elapsed={elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,33 @@
 import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
 import time
 from decimal import Decimal
 from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from urllib.request import Request
 
-from sqlalchemy import select
+from sqlalchemy import literal_column, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.db.enums import AnimeStatus, AnimeType, Provider
 from app.db.models.anime import Anime
 from app.db.session import SessionLocal
+from app.services.jikan_rate_limiter import report_jikan_rate_limited, wait_for_jikan_slot
+from app.services.upstream_http import jikan_url, upstream_urlopen
 
 
 def fetch_json(url: str, retries: int = 4) -> object:
     req = Request(url, headers={"User-Agent": "AnimeRecommendations/1.0"})
     attempt = 0
     while True:
+        wait_for_jikan_slot()
         try:
-            with urlopen(req, timeout=20) as response:
+            with upstream_urlopen(req, timeout=20) as response:
                 return json.loads(response.read().decode("utf-8"))
         except HTTPError as exc:
             if exc.code == 429 and attempt < retries:
                 attempt += 1
-                time.sleep(1.5 * attempt)
+                report_jikan_rate_limited(1.5 * attempt)
                 continue
             body = ""
             try:
@@ -77,6 +82,79 @@ def pick_title(item: dict) -> str | None:
     return None
 
 
+def anime_values_from_item(item: dict) -> dict[str, object] | None:
+    mal_id = item.get("mal_id")
+    title = pick_title(item)
+    if not isinstance(mal_id, int) or title is None:
+        return None
+
+    year = item.get("year")
+    if not isinstance(year, int):
+        year = None
+
+    episodes = item.get("episodes")
+    if not isinstance(episodes, int) or episodes <= 0:
+        episodes = None
+
+    return {
+        "title": title,
+        "provider": Provider.MAL,
+        "provider_anime_id": mal_id,
+        "provider_rating": Decimal(str(item["score"])),
+        "provider_popularity_rank": (
+            item.get("popularity")
+            if isinstance(item.get("popularity"), int) and item.get("popularity") > 0
+            else None
+        ),
+        "provider_member_count": (
+            item.get("members")
+            if isinstance(item.get("members"), int) and item.get("members") > 0
+            else None
+        ),
+        "anime_type": map_anime_type(item.get("type")),
+        "status": map_anime_status(item.get("status")),
+        "episode_count": episodes,
+        "start_year": year,
+    }
+
+
+_UPSERT_COLUMNS = (
+    "title",
+    "provider_rating",
+    "provider_popularity_rank",
+    "provider_member_count",
+    "anime_type",
+    "status",
+    "episode_count",
+    "start_year",
+)
+
+
+def upsert_anime_page(db, rows: list[dict[str, object]]) -> tuple[int, int]:
+    """Insert or update one page of anime in a single statement; returns (created, updated)."""
+    if not rows:
+        return 0, 0
+
+    statement = pg_insert(Anime).values(rows)
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        constraint="uq_anime_provider_provider_anime_id",
+        set_={column: excluded[column] for column in _UPSERT_COLUMNS},
+        # Skip rows that would not change so "updated" means changed, and
+        # unchanged rows are not rewritten.
+        where=or_(*(getattr(Anime, column).is_distinct_from(excluded[column]) for column in _UPSERT_COLUMNS)),
+    ).returning(literal_column("xmax = 0"))
+    inserted_flags = db.execute(statement).scalars().all()
+    created = sum(1 for inserted in inserted_flags if inserted)
+    return created, len(inserted_flags) - created
+
+
+def fetch_top_anime_page(page: int, sleep_seconds: float) -> object:
+    if sleep_seconds > 0:
+        time.sleep(sleep_seconds)
+    return fetch_json(jikan_url(f"/top/anime?page={page}"))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Load top-rated MAL anime (via Jikan) into local anime table."
@@ -91,22 +169,52 @@ def main() -> None:
     parser.add_argument(
         "--sleep-seconds",
         type=float,
-        default=0.45,
-        help="Delay between page requests to avoid rate limiting.",
+        default=0.0,
+        help="Extra delay before each page request on top of the shared Jikan rate limiter.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=3,
+        help="Pages fetched concurrently. Requests still go through the shared Jikan rate limiter.",
+    )
+    parser.add_argument(
+        "--commit-every-pages",
+        type=int,
+        default=10,
+        help="Commit after this many upserted pages.",
     )
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.commit_every_pages < 1:
+        parser.error("--commit-every-pages must be >= 1")
 
     db = SessionLocal()
     pages_fetched = 0
     seen = 0
     created = 0
     updated = 0
-    anime_cache: dict[int, Anime] = {}
+    uncommitted_pages = 0
+    started = time.perf_counter()
+
+    # Pages are fetched up to --workers ahead but applied strictly in page
+    # order, so the stop conditions below behave exactly as a serial scan.
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    pending: dict[int, Future] = {}
+    next_page = 1
+
+    def submit_until_full() -> None:
+        nonlocal next_page
+        while len(pending) < args.workers and next_page <= args.max_pages:
+            pending[next_page] = pool.submit(fetch_top_anime_page, next_page, args.sleep_seconds)
+            next_page += 1
 
     try:
+        submit_until_full()
         for page in range(1, args.max_pages + 1):
-            url = f"https://api.jikan.moe/v4/top/anime?page={page}"
-            payload = fetch_json(url)
+            payload = pending.pop(page).result()
+            submit_until_full()
             if not isinstance(payload, dict):
                 raise RuntimeError(f"Unexpected response shape at page {page}")
 
@@ -116,6 +224,7 @@ def main() -> None:
 
             pages_fetched += 1
             all_below_threshold = True
+            rows_by_mal_id: dict[int, dict[str, object]] = {}
 
             for item in data:
                 if not isinstance(item, dict):
@@ -130,66 +239,21 @@ def main() -> None:
                 all_below_threshold = False
                 seen += 1
 
-                mal_id = item.get("mal_id")
-                title = pick_title(item)
-                if not isinstance(mal_id, int) or title is None:
-                    continue
+                values = anime_values_from_item(item)
+                if values is not None:
+                    # One statement cannot upsert the same row twice.
+                    rows_by_mal_id[values["provider_anime_id"]] = values
 
-                year = item.get("year")
-                if not isinstance(year, int):
-                    year = None
-
-                episodes = item.get("episodes")
-                if not isinstance(episodes, int) or episodes <= 0:
-                    episodes = None
-
-                values = {
-                    "title": title,
-                    "provider": Provider.MAL,
-                    "provider_anime_id": mal_id,
-                    "provider_rating": Decimal(str(score)),
-                    "provider_popularity_rank": (
-                        item.get("popularity")
-                        if isinstance(item.get("popularity"), int) and item.get("popularity") > 0
-                        else None
-                    ),
-                    "provider_member_count": (
-                        item.get("members")
-                        if isinstance(item.get("members"), int) and item.get("members") > 0
-                        else None
-                    ),
-                    "anime_type": map_anime_type(item.get("type")),
-                    "status": map_anime_status(item.get("status")),
-                    "episode_count": episodes,
-                    "start_year": year,
-                }
-
-                existing = anime_cache.get(mal_id)
-                if existing is None:
-                    existing = db.execute(
-                        select(Anime).where(
-                            Anime.provider == Provider.MAL,
-                            Anime.provider_anime_id == mal_id,
-                        )
-                    ).scalar_one_or_none()
-                    if existing is not None:
-                        anime_cache[mal_id] = existing
-
-                if existing is None:
-                    existing = Anime(**values)
-                    db.add(existing)
-                    anime_cache[mal_id] = existing
-                    created += 1
-                else:
-                    changed = False
-                    for key, value in values.items():
-                        if key in {"provider", "provider_anime_id"}:
-                            continue
-                        if getattr(existing, key) != value:
-                            setattr(existing, key, value)
-                            changed = True
-                    if changed:
-                        updated += 1
+            page_created, page_updated = upsert_anime_page(
+                db,
+                [rows_by_mal_id[mal_id] for mal_id in sorted(rows_by_mal_id)],
+            )
+            created += page_created
+            updated += page_updated
+            uncommitted_pages += 1
+            if uncommitted_pages >= args.commit_every_pages:
+                db.commit()
+                uncommitted_pages = 0
 
             has_next_page = (
                 isinstance(payload.get("pagination"), dict)
@@ -200,17 +264,19 @@ def main() -> None:
             if all_below_threshold or not has_next_page:
                 break
 
-            time.sleep(args.sleep_seconds)
-
         db.commit()
+        elapsed = time.perf_counter() - started
         print(
             f"Done. pages_fetched={pages_fetched} seen_above_threshold={seen} "
-            f"created={created} updated={updated} min_score={args.min_score}"
+            f"created={created} updated={updated} min_score={args.min_score} elapsed={elapsed:.1f}s"
         )
     except Exception:
         db.rollback()
         raise
     finally:
+        for future in pending.values():
+            future.cancel()
+        pool.shutdown(wait=True)
         db.close()
 
 
@@ -0,0 +1,89 @@
+import argparse
+import cProfile
+import io
+import pstats
+import threading
+from collections import Counter
+
+from app.db.session import SessionLocal
+from app.services.recommend_for_user import recommend_for_user
+from app.services.sampling_profiler import SamplingProfiler
+from app.services.stage_timing import collect_stage_timings
+from scripts._common import log
+
+
+def run_once(user_id: int, z_score: float):
+    db = SessionLocal()
+    try:
+        with collect_stage_timings() as timings:
+            recommend_for_user(db, user_id, z_score)
+    finally:
+        db.close()
+    return timings
+
+
+def top_leaf_frames(stacks: Counter[str], limit: int) -> list[tuple[str, int]]:
+    """Frames by self samples: how often each was the innermost frame of a stack."""
+    leaves: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return leaves.most_common(limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Profile recommend_for_user for one user outside the API. The sample mode writes "
+            "folded stacks (flamegraph.pl, speedscope); the cprofile mode writes a pstats file "
+            "(snakeviz, python -m pstats). Stage timings are printed either way."
+        )
+    )
+    parser.add_argument("user_id", type=int, help="User to profile.")
+    parser.add_argument("--z-score", type=float, default=0.25, help="z_score passed to recommend_for_user.")
+    parser.add_argument("--mode", choices=("sample", "cprofile"), default="sample", help="Profiler (default: sample).")
+    parser.add_argument("--interval-ms", type=float, default=1.0, help="Sampling interval (default: 1 ms).")
+    parser.add_argument("--repeat", type=int, default=1, help="Profiled runs, aggregated (default: 1).")
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help="Unprofiled runs first (default: 0, so the first, cold run is the one profiled).",
+    )
+    parser.add_argument("--top", type=int, default=20, help="Hot frames to print (default: 20).")
+    parser.add_argument("--output", type=str, default="", help="Profile file (default: recommend-<user_id>.folded/.pstats).")
+    args = parser.parse_args()
+    if args.repeat < 1 or args.warmup < 0 or args.interval_ms <= 0:
+        parser.error("need --repeat >= 1, --warmup >= 0 and --interval-ms > 0")
+
+    for _ in range(args.warmup):
+        run_once(args.user_id, args.z_score)
+
+    output = args.output or f"recommend-{args.user_id}.{'folded' if args.mode == 'sample' else 'pstats'}"
+    runs = []
+    if args.mode == "sample":
+        with SamplingProfiler(args.interval_ms / 1000, thread_ids={threading.get_ident()}) as profiler:
+            for _ in range(args.repeat):
+                runs.append(run_once(args.user_id, args.z_score))
+        profiler.write_folded(output)
+        log(f"{profiler.sample_count} samples over {profiler.duration_seconds:.2f}s written to {output}")
+        for frame, count in top_leaf_frames(profiler.stacks, args.top):
+            print(f"{count:8d}  {count / max(profiler.sample_count, 1):6.1%}  {frame}")
+    else:
+        profile = cProfile.Profile()
+        for _ in range(args.repeat):
+            runs.append(profile.runcall(run_once, args.user_id, args.z_score))
+        profile.dump_stats(output)
+        log(f"cProfile stats written to {output}")
+        report = io.StringIO()
+        pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(args.top)
+        print(report.getvalue())
+
+    for index, timings in enumerate(runs, start=1):
+        log(f"run {index}: {timings.total_ms:.1f} ms, {timings.query_count} queries")
+        for stage in timings.stages:
+            details = ", ".join(f"{name}={value:g}" for name, value in stage["details"].items())
+            print(f"    {stage['name']:<22} {stage['duration_ms']:9.1f} ms  {stage['queries']:4d} queries  {details}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from collections import Counter, deque
+from functools import lru_cache
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# A local stand-in for Jikan and MAL's load.json, serving a synthetic catalog
+# with Jikan-like quotas, Retry-After, random 5xx and latency. Point the app at
+# it with JIKAN_BASE_URL=http://HOST:PORT/v4 and MAL_BASE_URL=http://HOST:PORT.
+# The catalog is deterministic for a given --seed and size, so two runs
+# against the same arguments see identical upstream data.
+
+_TOP_PAGE_SIZE = 25
+_LOAD_JSON_PAGE_SIZE = 300
+
+_GENRES = (
+    "Action", "Adventure", "Comedy", "Drama", "Fantasy", "Horror", "Mystery", "Romance",
+    "Sci-Fi", "Slice of Life", "Sports", "Supernatural", "Suspense", "Award Winning",
+)
+_THEMES = (
+    "School", "Mecha", "Music", "Isekai", "Military", "Historical", "Psychological",
+    "Time Travel", "Mythology", "Space", "Gore", "Martial Arts", "Idols (Female)", "Workplace",
+)
+_DEMOGRAPHICS = ("Shounen", "Seinen", "Shoujo", "Josei", "Kids")
+_TYPES = ("TV", "TV", "TV", "Movie", "OVA", "ONA", "Special")
+_STATUSES = ("Finished Airing",) * 8 + ("Currently Airing", "Not yet aired")
+# load.json's anime_airing_status codes for the statuses above.
+_AIRING_STATUS_CODES = {"Currently Airing": 1, "Finished Airing": 2, "Not yet aired": 3}
+# load.json list status codes, weighted roughly like real lists.
+_LIST_STATUSES = (2, 2, 2, 2, 2, 1, 3, 4, 6, 6)
+
+
+class SyntheticCatalog:
+    def __init__(self, seed: int, anime_count: int, user_count: int, min_list: int, max_list: int) -> None:
+        self.seed = seed
+        self.anime_count = anime_count
+        self.user_count = user_count
+        self.min_list = min_list
+        self.max_list = max_list
+        self.anime_by_id: dict[int, dict] = {}
+        self.relations_by_id: dict[int, list[dict]] = {}
+
+        rng = random.Random(seed)
+        for mal_id in range(1, anime_count + 1):
+            status = rng.choice(_STATUSES)
+            self.anime_by_id[mal_id] = {
+                "mal_id": mal_id,
+                "title": f"Synthetic Anime {mal_id}",
+                "title_english": f"Synthetic Anime {mal_id} (EN)" if mal_id % 3 else None,
+                "type": rng.choice(_TYPES),
+                "episodes": rng.randint(1, 64) if status != "Not yet aired" else None,
+                "status": status,
+                "score": round(min(9.3, max(4.5, rng.gauss(7.1, 0.8))), 2) if status != "Not yet aired" else None,
+                # mal_id doubles as popularity rank so list sampling can skew
+                # towards popular titles the way real lists do.
+                "popularity": mal_id,
+                "members": max(100, int(2_000_000 / (mal_id ** 0.8))),
+                "year": 1985 + rng.randint(0, 40),
+                "genres": [{"name": name} for name in rng.sample(_GENRES, rng.randint(1, 4))],
+                "themes": [{"name": name} for name in rng.sample(_THEMES, rng.randint(0, 2))],
+                "demographics": [{"name": rng.choice(_DEMOGRAPHICS)}] if rng.random() < 0.6 else [],
+            }
+
+        # Short prequel/sequel chains, like franchises with a few seasons.
+        mal_id = 1
+        while mal_id < anime_count:
+            chain_length = rng.choice((1, 1, 1, 2, 3, 4))
+            chain = list(range(mal_id, min(anime_count, mal_id + chain_length - 1) + 1))
+            for index, chain_id in enumerate(chain):
+                relations = []
+                if index > 0:
+                    relations.append({"relation": "Prequel", "entry": [{"type": "anime", "mal_id": chain[index - 1]}]})
+                if index < len(chain) - 1:
+                    relations.append({"relation": "Sequel", "entry": [{"type": "anime", "mal_id": chain[index + 1]}]})
+                self.relations_by_id[chain_id] = relations
+            mal_id += chain_length
+
+        ranked = sorted(
+            (anime for anime in self.anime_by_id.values() if anime["score"] is not None),
+            key=lambda anime: (-anime["score"], anime["mal_id"]),
+        )
+        self.top_ids = [anime["mal_id"] for anime in ranked]
+        self.list_for_user = lru_cache(maxsize=4096)(self._build_user_list)
+
+    def user_mal_id(self, username: str) -> int | None:
+        """Users are user0 .. user{N-1}; anything else does not exist."""
+        name = username.lower()
+        if not name.startswith("user") or not name[4:].isdigit():
+            return None
+        index = int(name[4:])
+        return 1_000_000 + index if index < self.user_count else None
+
+    def _build_user_list(self, username: str) -> list[dict]:
+        rng = random.Random(zlib.crc32(f"{self.seed}:{username.lower()}".encode("utf-8")))
+        size = min(self.anime_count, rng.randint(self.min_list, self.max_list))
+        picked: dict[int, None] = {}
+        while len(picked) < size:
+            # Squaring skews picks towards low mal_ids, i.e. popular anime.
+            picked[1 + int(self.anime_count * rng.random() ** 2)] = None
+
+        items = []
+        for mal_id in picked:
+            anime = self.anime_by_id[mal_id]
+            status = rng.choice(_LIST_STATUSES)
+            items.append(
+                {
+                    "status": status,
+                    "score": 0 if status == 6 else max(0, min(10, round((anime["score"] or 7) + rng.gauss(0, 1.3)))),
+                    "num_watched_episodes": 0 if status == 6 else (anime["episodes"] or 0),
+                    "anime_id": mal_id,
+                    "anime_title": anime["title"],
+                    "anime_title_eng": anime["title_english"] or "",
+                    "anime_num_episodes": anime["episodes"] or 0,
+                    "anime_airing_status": _AIRING_STATUS_CODES[anime["status"]],
+                    "anime_score_val": anime["score"] or 0,
+                    "anime_media_type_string": anime["type"],
+                    "anime_start_date_string": f"01-01-{anime['year'] % 100:02d}",
+                    "genres": [{"id": index, "name": genre["name"]} for index, genre in enumerate(anime["genres"])],
+                }
+            )
+        return items
+
+
+class SlidingWindowQuota:
+    """At most `limit` requests per `window_seconds`, tracked per client."""
+
+    def __init__(self, limit: int, window_seconds: float) -> None:
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._hits: dict[str, deque[float]] = {}
+
+    def acquire(self, client: str, now: float) -> float:
+        """Record a request and return 0, or the seconds to wait if over quota."""
+        if self.limit <= 0:
+            return 0.0
+        hits = self._hits.setdefault(client, deque())
+        while hits and hits[0] <= now - self.window_seconds:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return hits[0] + self.window_seconds - now
+        hits.append(now)
+        return 0.0
+
+
+def _jikan_error(status: int, error_type: str, message: str, retry_after: float | None = None) -> JSONResponse:
+    headers = {"Retry-After": str(max(1, int(retry_after + 0.999)))} if retry_after is not None else None
+    return JSONResponse(
+        {"status": status, "type": error_type, "message": message, "error": None},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def create_app(
+    catalog: SyntheticCatalog,
+    jikan_per_second: int = 3,
+    jikan_per_minute: int = 60,
+    mal_per_minute: int = 0,
+    error_rate: float = 0.0,
+    latency_ms: float = 0.0,
+    latency_jitter_ms: float = 0.0,
+    seed: int = 0,
+) -> FastAPI:
+    app = FastAPI(title="Jikan/MAL stand-in")
+    rng = random.Random(seed)
+    jikan_quotas = (SlidingWindowQuota(jikan_per_second, 1.0), SlidingWindowQuota(jikan_per_minute, 60.0))
+    mal_quotas = (SlidingWindowQuota(mal_per_minute, 60.0),)
+    responses = Counter()
+
+    @app.middleware("http")
+    async def upstream_behaviour(request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/_standin"):
+            return await call_next(request)
+
+        if latency_ms > 0 or latency_jitter_ms > 0:
+            await asyncio.sleep(max(0.0, rng.gauss(latency_ms, latency_jitter_ms)) / 1000)
+
+        client = request.client.host if request.client else "unknown"
+        now = time.monotonic()
+        quotas = jikan_quotas if path.startswith("/v4/") else mal_quotas
+        # Check every window (no short-circuit) so each sees the request.
+        retry_after = max(quota.acquire(client, now) for quota in quotas)
+        if retry_after > 0:
+            response = _jikan_error(429, "RateLimitException", "You are being rate limited.", retry_after)
+        elif error_rate > 0 and rng.random() < error_rate:
+            if rng.random() < 0.5:
+                response = _jikan_error(503, "UpstreamException", "MyAnimeList is down or unavailable.", 5)
+            else:
+                response = _jikan_error(500, "InternalException", "Internal server error.")
+        else:
+            response = await call_next(request)
+        responses[response.status_code] += 1
+        return response
+
+    @app.get("/_standin/stats")
+    def stats() -> dict[str, object]:
+        return {"responses": {str(status): count for status, count in sorted(responses.items())}}
+
+    @app.get("/v4/users/{username}")
+    def jikan_user(username: str):
+        mal_id = catalog.user_mal_id(username)
+        if mal_id is None:
+            return _jikan_error(404, "BadResponseException", "Resource does not exist")
+        return {"data": {"mal_id": mal_id, "username": username}}
+
+    @app.get("/v4/anime/{mal_id}")
+    def jikan_anime(mal_id: int):
+        anime = catalog.anime_by_id.get(mal_id)
+        if anime is None:
+            return _jikan_error(404, "BadResponseException", "Resource does not exist")
+        return {"data": anime}
+
+    @app.get("/v4/anime/{mal_id}/relations")
+    def jikan_anime_relations(mal_id: int):
+        if mal_id not in catalog.anime_by_id:
+            return _jikan_error(404, "BadResponseException", "Resource does not exist")
+        return {"data": catalog.relations_by_id.get(mal_id, [])}
+
+    @app.get("/v4/top/anime")
+    def jikan_top_anime(page: int = 1):
+        page = max(page, 1)
+        last_page = max(1, -(-len(catalog.top_ids) // _TOP_PAGE_SIZE))
+        page_ids = catalog.top_ids[(page - 1) * _TOP_PAGE_SIZE : page * _TOP_PAGE_SIZE]
+        return {
+            "pagination": {
+                "last_visible_page": last_page,
+                "has_next_page": page < last_page,
+                "current_page": page,
+                "items": {"count": len(page_ids), "total": len(catalog.top_ids), "per_page": _TOP_PAGE_SIZE},
+            },
+            "data": [catalog.anime_by_id[mal_id] for mal_id in page_ids],
+        }
+
+    @app.get("/animelist/{username}/load.json")
+    def mal_load_json(username: str, offset: int = 0, status: int = 7):
+        if catalog.user_mal_id(username) is None:
+            return JSONResponse({"errors": [{"message": "invalid request"}]}, status_code=400)
+        items = catalog.list_for_user(username)
+        if status != 7:
+            items = [item for item in items if item["status"] == status]
+        offset = max(offset, 0)
+        return items[offset : offset + _LOAD_JSON_PAGE_SIZE]
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve a synthetic Jikan v4 / MAL load.json stand-in for load tests. Run the app with "
+            "JIKAN_BASE_URL=http://HOST:PORT/v4 and MAL_BASE_URL=http://HOST:PORT. "
+            "Users are named user0 .. user{N-1}."
+        )
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--seed", type=int, default=1, help="Catalog and failure-injection seed (default: 1).")
+    parser.add_argument("--anime", type=int, default=5000, help="Anime in the synthetic catalog (default: 5000).")
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users (default: 1000).")
+    parser.add_argument("--min-list", type=int, default=50, help="Smallest list size (default: 50).")
+    parser.add_argument("--max-list", type=int, default=1500, help="Largest list size (default: 1500).")
+    parser.add_argument(
+        "--jikan-per-second",
+        type=int,
+        default=3,
+        help="Jikan requests per second per client before 429s (default: 3, 0 = unlimited).",
+    )
+    parser.add_argument(
+        "--jikan-per-minute",
+        type=int,
+        default=60,
+        help="Jikan requests per minute per client before 429s (default: 60, 0 = unlimited).",
+    )
+    parser.add_argument(
+        "--mal-per-minute",
+        type=int,
+        default=0,
+        help="load.json requests per minute per client before 429s (default: 0, unlimited).",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of admitted requests answered with a random 500/503 (default: 0).",
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency per request.")
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0, help="Standard deviation of that latency.")
+    args = parser.parse_args()
+    if args.anime < 1 or args.users < 0:
+        parser.error("--anime must be >= 1 and --users >= 0")
+    if not 1 <= args.min_list <= args.max_list:
+        parser.error("need 1 <= --min-list <= --max-list")
+    if not 0.0 <= args.error_rate <= 1.0:
+        parser.error("--error-rate must be between 0 and 1")
+
+    catalog = SyntheticCatalog(args.seed, args.anime, args.users, args.min_list, args.max_list)
+    app = create_app(
+        catalog,
+        jikan_per_second=args.jikan_per_second,
+        jikan_per_minute=args.jikan_per_minute,
+        mal_per_minute=args.mal_per_minute,
+        error_rate=args.error_rate,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
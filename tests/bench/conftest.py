@@ -0,0 +1,36 @@
+import uuid
+from collections.abc import Callable, Iterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+from app.db.session import engine
+
+# Import models so SQLAlchemy metadata includes all mapped tables.
+from app.db.models import anime, mal_relation_cache, tag, tag_count, tag_pair_count, tag_similarity, tag_similarity_version, user, user_anime_entry, user_stats, user_tag_stat  # noqa: F401
+
+
+@pytest.fixture
+def empty_schema_sessions() -> Iterator[Callable[[], Session]]:
+    """Session factory for an empty schema that only lives in a rolled-back transaction.
+
+    Benchmarks see the same tables whatever the database at DATABASE_URL
+    already holds, so replayed imports request exactly what was recorded.
+    """
+    try:
+        connection = engine.connect()
+    except OperationalError as exc:
+        pytest.skip(f"database unavailable: {exc.orig}")
+    outer = connection.begin()
+    schema = f"bench_{uuid.uuid4().hex[:12]}"
+    try:
+        connection.execute(text(f'CREATE SCHEMA "{schema}"'))
+        connection.execute(text(f'SET LOCAL search_path TO "{schema}"'))
+        Base.metadata.create_all(connection)
+        yield lambda: Session(bind=connection, join_transaction_mode="create_savepoint")
+    finally:
+        outer.rollback()
+        connection.close()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from app.config.settings import get_settings
+from app.services.jikan_rate_limiter import get_jikan_rate_limiter
+from app.services.upstream_http import load_cassette
+from scripts.bench_mal_import import run_round
+
+# Deselected by default (pytest.ini); run with pytest -m bench.
+pytestmark = pytest.mark.bench
+
+# Recorded by running import_mal_users.py with UPSTREAM_HTTP_MODE=record and
+# MAL_IMPORT_ENRICHMENT_MODE=full against an empty database and
+#   scripts/upstream_standin.py --anime 400 --users 4 --min-list 120 --max-list 350
+#       --jikan-per-second 0 --jikan-per-minute 0
+# then recompressed as a single gzip stream. Replay matches on the full URL,
+# so the base URLs must stay those of the recording.
+CASSETTE_PATH = os.path.join(os.path.dirname(__file__), "data", "mal_import_cassette.jsonl.gz")
+JIKAN_BASE_URL = "http://127.0.0.1:8100/v4"
+MAL_BASE_URL = "http://127.0.0.1:8100"
+USERNAMES = ["user0", "user1", "user2", "user3"]
+LIST_ITEMS = 817
+
+# Replay runs at about 1000 items/s here; the floor only catches regressions
+# of an order of magnitude, such as a per-item request or query creeping in.
+MIN_ITEMS_PER_S = 200.0
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    for name, value in {
+        "UPSTREAM_HTTP_MODE": "replay",
+        "UPSTREAM_CASSETTE_PATH": CASSETTE_PATH,
+        "UPSTREAM_REPLAY_LATENCY_MS": "0",
+        "UPSTREAM_REPLAY_429_EVERY": "0",
+        "JIKAN_BASE_URL": JIKAN_BASE_URL,
+        "MAL_BASE_URL": MAL_BASE_URL,
+        "JIKAN_MIN_INTERVAL_SECONDS": "0",
+        "MAL_IMPORT_ENRICHMENT_MODE": "full",
+        "MAL_IMPORT_FULL_REFRESH": "1",
+        "MAL_IMPORT_CHUNKED_COMMITS": "0",
+    }.items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+    get_jikan_rate_limiter.cache_clear()
+    yield
+    get_settings.cache_clear()
+    get_jikan_rate_limiter.cache_clear()
+
+
+def test_replayed_import_throughput(empty_schema_sessions, replay):
+    summary = run_round(USERNAMES, session_factory=empty_schema_sessions)
+
+    assert summary["failed"] == 0
+    assert summary["items"] == LIST_ITEMS
+    upstream = summary["upstream"]
+    assert upstream["recorded"] == 0
+    assert upstream["injected_429"] == 0
+    assert upstream["replayed"] == upstream["requests"]
+    # The schema starts empty, so the import asks for exactly what the
+    # recording did: every response in the cassette, some of them again for
+    # later users whose anime still lack relations.
+    assert upstream["requests"] >= len(load_cassette(CASSETTE_PATH))
+    assert summary["items_per_s"] >= MIN_ITEMS_PER_S
+
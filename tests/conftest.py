@@ -0,0 +1,28 @@
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """A session inside a transaction that is rolled back after the test.
+
+    Needs a migrated database at DATABASE_URL; tests using it are skipped
+    when that database cannot be reached.
+    """
+    try:
+        connection = engine.connect()
+    except OperationalError as exc:
+        pytest.skip(f"database unavailable: {exc.orig}")
+    outer = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        outer.rollback()
+        connection.close()
@@ -0,0 +1,38 @@
+import sys
+
+import pytest
+
+from scripts import import_mal_users
+
+
+def _run_main(monkeypatch, *args: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["import_mal_users.py", *args])
+    import_mal_users.main()
+
+
+def test_existing_checkpoint_is_not_overwritten(tmp_path, monkeypatch):
+    users = tmp_path / "users.txt"
+    users.write_text("someone\n", encoding="utf-8")
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    checkpoint.write_text('{"ts":1,"event":"done","username":"someone"}\n', encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="already has records"):
+        _run_main(monkeypatch, "--file", str(users), "--checkpoint", str(checkpoint))
+
+    assert import_mal_users.ImportCheckpoint(str(checkpoint)).load()["someone"]["done"] is True
+
+
+def test_overwrite_checkpoint_cannot_be_combined_with_resume(tmp_path, monkeypatch):
+    users = tmp_path / "users.txt"
+    users.write_text("someone\n", encoding="utf-8")
+
+    with pytest.raises(SystemExit, match="cannot be combined"):
+        _run_main(
+            monkeypatch,
+            "--file",
+            str(users),
+            "--checkpoint",
+            str(tmp_path / "checkpoint.jsonl"),
+            "--resume",
+            "--overwrite-checkpoint",
+        )
@@ -0,0 +1,110 @@
+import gzip
+import io
+
+import pytest
+
+from app.services.mal_export import MAL_EXPORT_PAGE_SIZE, parse_mal_export
+
+
+def export_xml(entries: list[str], username: str = "exporter", user_id: int = 42) -> bytes:
+    return (
+        "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n<myanimelist>"
+        f"<myinfo><user_id>{user_id}</user_id><user_name>{username}</user_name></myinfo>"
+        + "".join(entries)
+        + "</myanimelist>"
+    ).encode("utf-8")
+
+
+def anime_xml(anime_id: int, title: str = "Some Anime", status: str = "Completed", **fields: object) -> str:
+    children = {
+        "series_animedb_id": anime_id,
+        "series_title": title,
+        "my_status": status,
+        "my_score": 8,
+        "my_watched_episodes": 12,
+        **fields,
+    }
+    return "<anime>" + "".join(f"<{tag}>{value}</{tag}>" for tag, value in children.items()) + "</anime>"
+
+
+def test_parses_user_and_entries():
+    body = export_xml([anime_xml(1, series_type="TV", series_episodes=12)])
+
+    username, user_id, list_pages = parse_mal_export(io.BytesIO(body))
+
+    assert (username, user_id) == ("exporter", 42)
+    assert list_pages == [
+        [
+            {
+                "anime_id": 1,
+                "anime_title": "Some Anime",
+                "status": 2,
+                "score": 8,
+                "num_watched_episodes": 12,
+                "anime_media_type_string": "TV",
+                "anime_num_episodes": 12,
+            }
+        ]
+    ]
+
+
+def test_reads_gzipped_exports():
+    body = gzip.compress(export_xml([anime_xml(1)]))
+
+    assert parse_mal_export(io.BytesIO(body))[2][0][0]["anime_id"] == 1
+
+
+@pytest.mark.parametrize(
+    ("status", "code"),
+    [("Watching", 1), ("Completed", 2), ("On-Hold", 3), ("Dropped", 4), ("Plan to Watch", 6), ("3", 3), ("bogus", None)],
+)
+def test_maps_labels_and_numeric_statuses(status, code):
+    list_pages = parse_mal_export(io.BytesIO(export_xml([anime_xml(1, status=status)])))[2]
+
+    assert list_pages[0][0]["status"] == code
+
+
+def test_leaves_out_catalog_keys_the_export_lacks():
+    item = parse_mal_export(io.BytesIO(export_xml([anime_xml(1)])))[2][0][0]
+
+    assert "anime_media_type_string" not in item
+    assert "anime_num_episodes" not in item
+    assert "anime_airing_status" not in item
+
+
+def test_skips_entries_without_id_or_title():
+    entries = [
+        "<anime><series_title>No Id</series_title></anime>",
+        "<anime><series_animedb_id>2</series_animedb_id><series_title> </series_title></anime>",
+        anime_xml(3),
+    ]
+
+    list_pages = parse_mal_export(io.BytesIO(export_xml(entries)))[2]
+
+    assert [item["anime_id"] for page in list_pages for item in page] == [3]
+
+
+def test_cuts_pages_at_load_json_size():
+    entries = [anime_xml(anime_id) for anime_id in range(1, MAL_EXPORT_PAGE_SIZE + 2)]
+
+    list_pages = parse_mal_export(io.BytesIO(export_xml(entries)))[2]
+
+    assert [len(page) for page in list_pages] == [MAL_EXPORT_PAGE_SIZE, 1]
+
+
+def test_empty_list_has_no_pages():
+    assert parse_mal_export(io.BytesIO(export_xml([])))[2] == []
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"<myanimelist><anime>",
+        b"<myanimelist></myanimelist>",
+        b"<myanimelist><myinfo><user_name>nobody</user_name></myinfo></myanimelist>",
+        gzip.compress(b"<myanimelist>")[:-4],
+    ],
+)
+def test_rejects_invalid_exports(body):
+    with pytest.raises(ValueError, match="Invalid MAL export"):
+        parse_mal_export(io.BytesIO(body))
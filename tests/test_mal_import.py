@@ -0,0 +1,183 @@
+import asyncio
+import io
+import json
+from email.message import Message
+from urllib.error import HTTPError
+
+import pytest
+from fastapi import HTTPException
+from fastapi import Request as HTTPRequest
+
+from app.api.v1.routes import user as user_routes
+from app.api.v1.routes.user import fetch_mal_user_list, import_mal_export, plan_mal_enrichment, run_mal_import
+from tests.test_mal_export import anime_xml, export_xml
+
+_USERNAME = "prefetched-user"
+_PROVIDER_USER_ID = 70_000_000
+# Far past real MAL ids so the rolled-back import creates every anime.
+_FIRST_ANIME_ID = 70_000_000
+
+
+def _list_item(anime_id: int) -> dict:
+    return {
+        "status": 2,
+        "score": 7,
+        "num_watched_episodes": 12,
+        "anime_id": anime_id,
+        "anime_title": f"Test Anime {anime_id}",
+        "anime_num_episodes": 12,
+        "anime_airing_status": 2,
+        "anime_media_type_string": "TV",
+        "anime_start_date_string": "01-01-15",
+        "genres": [{"id": 1, "name": "Action"}],
+    }
+
+
+class FakeUpstream:
+    """Serve a MAL profile and load.json pages by URL and record every request."""
+
+    def __init__(self, list_size: int) -> None:
+        self.items = [_list_item(_FIRST_ANIME_ID + index) for index in range(list_size)]
+        self.urls: list[str] = []
+
+    def urlopen(self, req, timeout=None, caller="other"):
+        url = req.full_url
+        self.urls.append(url)
+        if url.endswith(f"/users/{_USERNAME}"):
+            payload: object = {"data": {"mal_id": _PROVIDER_USER_ID}}
+        elif f"/animelist/{_USERNAME}/load.json" in url:
+            offset = int(url.split("offset=", 1)[1].split("&", 1)[0])
+            payload = self.items[offset : offset + user_routes._MAL_LOAD_PAGE_SIZE]
+        elif "/anime/" in url:
+            raise HTTPError(url, 500, "HTTP 500", Message(), io.BytesIO(b"{}"))
+        else:
+            raise AssertionError(f"unexpected upstream request: {url}")
+        return io.BytesIO(json.dumps(payload).encode("utf-8"))
+
+    def load_json_urls(self) -> list[str]:
+        return [url for url in self.urls if "/load.json" in url]
+
+
+@pytest.fixture
+def upstream(monkeypatch) -> FakeUpstream:
+    fake = FakeUpstream(list_size=650)
+    monkeypatch.setattr(user_routes, "upstream_urlopen", fake.urlopen)
+    monkeypatch.setattr(user_routes, "wait_for_jikan_slot", lambda: 0.0)
+    return fake
+
+
+@pytest.mark.parametrize("prefetch_pages", ["0", "2"])
+def test_fetch_mal_user_list_returns_fetched_pages(upstream, monkeypatch, prefetch_pages):
+    monkeypatch.setenv("MAL_IMPORT_PREFETCH_PAGES", prefetch_pages)
+
+    provider_user_id, list_pages = fetch_mal_user_list(_USERNAME)
+
+    assert provider_user_id == _PROVIDER_USER_ID
+    assert [len(page) for page in list_pages] == [300, 300, 50]
+    assert [item["anime_id"] for page in list_pages for item in page] == [item["anime_id"] for item in upstream.items]
+    # Three full or partial pages and the empty one that ends pagination.
+    assert len(upstream.load_json_urls()) == 4
+
+
+def test_run_mal_import_uses_prefetched_pages(upstream, db):
+    provider_user_id, list_pages = fetch_mal_user_list(_USERNAME)
+    upstream.urls.clear()
+
+    result = run_mal_import(
+        db,
+        _USERNAME,
+        provider_user_id=provider_user_id,
+        list_pages=list_pages,
+        enrichment_mode="none",
+    )
+
+    assert upstream.urls == []
+    assert result.provider_user_id == _PROVIDER_USER_ID
+    assert result.pages_fetched == 3
+    assert result.entries_created == len(upstream.items)
+    assert result.anime_created == len(upstream.items)
+
+
+def _import(db, list_pages: list[list], enrichment_mode: str = "none"):
+    return run_mal_import(
+        db,
+        _USERNAME,
+        provider_user_id=_PROVIDER_USER_ID,
+        list_pages=list_pages,
+        enrichment_mode=enrichment_mode,
+    )
+
+
+def test_unchanged_complete_page_is_skipped(upstream, db, monkeypatch):
+    monkeypatch.delenv("MAL_IMPORT_FULL_REFRESH", raising=False)
+    list_pages = [[_list_item(_FIRST_ANIME_ID), _list_item(_FIRST_ANIME_ID + 1)]]
+
+    _import(db, list_pages)
+    result = _import(db, list_pages)
+
+    assert result.pages_skipped == 1
+
+
+def test_page_with_dropped_item_is_not_skipped(upstream, db, monkeypatch):
+    monkeypatch.delenv("MAL_IMPORT_FULL_REFRESH", raising=False)
+    # Not in the catalog and no airing status, so the import cannot create it.
+    unknown_status_item = _list_item(_FIRST_ANIME_ID + 1)
+    del unknown_status_item["anime_airing_status"]
+    list_pages = [[_list_item(_FIRST_ANIME_ID), unknown_status_item]]
+
+    first = _import(db, list_pages)
+    second = _import(db, list_pages)
+
+    assert first.entries_created == 1
+    assert second.pages_skipped == 0
+
+
+def test_page_with_defaulted_enrichment_is_not_skipped(upstream, db, monkeypatch):
+    monkeypatch.delenv("MAL_IMPORT_FULL_REFRESH", raising=False)
+    list_pages = [[_list_item(_FIRST_ANIME_ID)]]
+
+    _import(db, list_pages, enrichment_mode="full")
+    upstream.urls.clear()
+    result = _import(db, list_pages, enrichment_mode="full")
+
+    assert result.pages_skipped == 0
+    assert any("/anime/" in url for url in upstream.urls)
+
+
+@pytest.mark.parametrize("chunked_commits, expected_pages", [("1", [1, 2]), ("0", [0, 1, 2])])
+def test_plan_mal_enrichment_skips_resumed_pages(db, monkeypatch, chunked_commits, expected_pages):
+    monkeypatch.setenv("MAL_IMPORT_ENRICHMENT_MODE", "full")
+    monkeypatch.setenv("MAL_IMPORT_CHUNKED_COMMITS", chunked_commits)
+    list_pages = [[_list_item(_FIRST_ANIME_ID + page_index)] for page_index in range(3)]
+
+    queue = plan_mal_enrichment(db, {_USERNAME: list_pages}, resume_after_pages={_USERNAME: 1})
+
+    assert sorted(queue) == [_FIRST_ANIME_ID + page_index for page_index in expected_pages]
+
+
+def _upload_request(body: bytes) -> HTTPRequest:
+    async def receive() -> dict:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return HTTPRequest({"type": "http", "method": "POST", "path": "/", "headers": []}, receive)
+
+
+def test_export_upload_for_another_user_is_rejected():
+    body = export_xml([anime_xml(_FIRST_ANIME_ID)], username="someone-else", user_id=_PROVIDER_USER_ID)
+
+    with pytest.raises(HTTPException) as exc_info:
+        # Rejected before the session is touched.
+        asyncio.run(import_mal_export(_upload_request(body), _USERNAME, db=None))
+
+    assert exc_info.value.status_code == 400
+
+
+def test_export_upload_imports_into_the_named_user(db):
+    body = export_xml([anime_xml(_FIRST_ANIME_ID)], username=_USERNAME, user_id=_PROVIDER_USER_ID)
+
+    result = asyncio.run(
+        import_mal_export(_upload_request(body), f"https://myanimelist.net/animelist/{_USERNAME.upper()}", db=db)
+    )
+
+    assert result.provider_username == _USERNAME
+    assert result.provider_user_id == _PROVIDER_USER_ID
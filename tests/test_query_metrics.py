@@ -0,0 +1,48 @@
+import pytest
+
+from app.db.query_metrics import fingerprint_statement
+
+
+@pytest.mark.parametrize(
+    "statements",
+    [
+        [
+            "SELECT anime.id FROM anime WHERE anime.id IN (%(id_1_1)s)",
+            "SELECT anime.id FROM anime WHERE anime.id IN (%(id_1_1)s, %(id_1_2)s)",
+            "SELECT anime.id FROM anime WHERE anime.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)",
+        ],
+        [
+            "INSERT INTO tags (name) VALUES (%(name_m0)s)",
+            "INSERT INTO tags (name) VALUES (%(name_m0)s), (%(name_m1)s), (%(name_m2)s)",
+        ],
+        [
+            "INSERT INTO tag_counts (tag_id, anime_count) VALUES (%(tag_id_m0)s, %(anime_count_m0)s)",
+            "INSERT INTO tag_counts (tag_id, anime_count) VALUES (%(tag_id_m0)s, %(anime_count_m0)s), "
+            "(%(tag_id_m1)s, %(anime_count_m1)s)",
+        ],
+        [
+            "SELECT * FROM users WHERE provider_username = 'alice' AND id > 10",
+            "SELECT  *  FROM users\n WHERE provider_username = 'o''brien' AND id > 2500",
+        ],
+    ],
+)
+def test_variants_of_one_query_share_a_fingerprint(statements):
+    assert len({fingerprint_statement(statement) for statement in statements}) == 1
+
+
+def test_fingerprint_replaces_literals_and_lists():
+    statement = "SELECT a.id FROM anime AS a WHERE a.title = 'x' AND a.start_year >= 2001 AND a.id IN ($1, $2)"
+
+    assert fingerprint_statement(statement) == (
+        "SELECT a.id FROM anime AS a WHERE a.title = ? AND a.start_year >= ? AND a.id IN (...)"
+    )
+
+
+def test_values_lists_collapse_to_one_tuple():
+    assert fingerprint_statement("INSERT INTO t (a) VALUES (?), (?), (?)") == "INSERT INTO t (a) VALUES (...)"
+
+
+def test_different_queries_keep_different_fingerprints():
+    assert fingerprint_statement("SELECT id FROM anime WHERE id = 1") != fingerprint_statement(
+        "SELECT id FROM users WHERE id = 1"
+    )
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.middleware import RequestProfilingMiddleware, _profiling_requested
+from app.config.settings import Settings, get_settings
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setenv("REQUEST_PROFILING_ENABLED", "1")
+    monkeypatch.setenv("REQUEST_PROFILING_TOKEN", "secret")
+    monkeypatch.setenv("REQUEST_PROFILING_DIR", str(tmp_path))
+    get_settings.cache_clear()
+    yield tmp_path
+    get_settings.cache_clear()
+
+
+def _scope(headers: dict[str, str]) -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/health",
+        "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+    }
+
+
+def test_enabling_profiling_requires_a_token(monkeypatch):
+    monkeypatch.setenv("REQUEST_PROFILING_ENABLED", "1")
+    monkeypatch.delenv("REQUEST_PROFILING_TOKEN", raising=False)
+
+    with pytest.raises(ValidationError, match="REQUEST_PROFILING_TOKEN"):
+        Settings(_env_file=None)
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [({}, False), ({"x-profile": "guess"}, False), ({"x-profile": "secret"}, True)],
+)
+def test_only_the_token_requests_a_profile(profiling, headers, expected):
+    assert _profiling_requested(_scope(headers)) is expected
+
+
+def test_profile_is_written_and_named_in_the_response(profiling):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    sent: list[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    asyncio.run(RequestProfilingMiddleware(app)(_scope({"x-profile": "secret"}), receive, send))
+
+    headers = dict(sent[0]["headers"])
+    path = headers[b"x-profile-path"].decode("utf-8")
+    assert os.path.dirname(path) == str(profiling)
+    assert os.path.exists(path)
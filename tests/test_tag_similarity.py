@@ -0,0 +1,100 @@
+import random
+
+import pytest
+from sqlalchemy import func, select
+
+from app.config.settings import get_settings
+from app.db.enums import AnimeStatus, AnimeType, Provider
+from app.db.models.anime import Anime
+from app.db.models.tag_count import TagCount
+from app.db.models.tag_pair_count import TagPairCount
+from app.db.models.tag_similarity import TagSimilarity
+from app.db.models.tag_similarity_version import TagSimilarityVersion
+from app.db.repositories.tag_similarity import (
+    apply_anime_tag_changes,
+    get_tag_similarity_version,
+    rebuild_tag_similarity,
+)
+from app.db.repositories.tags import get_or_create_tag_ids
+
+# Far past real MAL ids; every row is rolled back with the test transaction.
+_FIRST_ANIME_ID = 80_000_000
+
+
+@pytest.fixture
+def small_top_k(monkeypatch):
+    # A short top-K list and low floors so updates keep crossing the cutoff.
+    monkeypatch.setenv("TAG_SIMILARITY_TOP_K", "3")
+    monkeypatch.setenv("TAG_SIMILARITY_MIN_JACCARD", "0.05")
+    monkeypatch.setenv("TAG_SIMILARITY_MIN_COOCCURRENCE", "1")
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+def _tag_tables(db) -> tuple[list, list, list]:
+    return (
+        db.execute(select(TagCount.tag_id, TagCount.anime_count).order_by(TagCount.tag_id)).all(),
+        db.execute(
+            select(TagPairCount.tag_a_id, TagPairCount.tag_b_id, TagPairCount.cooccurrence_count)
+            .order_by(TagPairCount.tag_a_id, TagPairCount.tag_b_id)
+        ).all(),
+        db.execute(
+            select(
+                TagSimilarity.source_tag_id,
+                TagSimilarity.related_tag_id,
+                TagSimilarity.cooccurrence_count,
+                TagSimilarity.jaccard_score,
+            ).order_by(TagSimilarity.source_tag_id, TagSimilarity.related_tag_id)
+        ).all(),
+    )
+
+
+def test_incremental_updates_match_a_full_rebuild(db, small_top_k):
+    rng = random.Random(7)
+    tag_ids = list(get_or_create_tag_ids(db, [f"similarity-test-{index}" for index in range(12)]).values())
+    anime: list[Anime] = []
+    rebuild_tag_similarity(db)
+
+    for round_number in range(30):
+        changes: list[tuple[list[int], list[int]]] = []
+        for _ in range(rng.randint(1, 3)):
+            new_tag_ids = sorted(rng.sample(tag_ids, rng.randint(0, 5)))
+            if anime and rng.random() < 0.5:
+                row = rng.choice(anime)
+                changes.append((list(row.tag_ids), new_tag_ids))
+                row.tag_ids = new_tag_ids
+            else:
+                row = Anime(
+                    title=f"Similarity Test {len(anime)}",
+                    provider=Provider.MAL,
+                    provider_anime_id=_FIRST_ANIME_ID + len(anime),
+                    status=AnimeStatus.COMPLETED,
+                    anime_type=AnimeType.TV,
+                    tag_ids=new_tag_ids,
+                )
+                db.add(row)
+                anime.append(row)
+                changes.append(([], new_tag_ids))
+        db.flush()
+
+        version_before = get_tag_similarity_version(db)
+        apply_anime_tag_changes(db, changes)
+        incremental = _tag_tables(db)
+        latest_row_count = db.execute(
+            select(TagSimilarityVersion.row_count).order_by(TagSimilarityVersion.id.desc()).limit(1)
+        ).scalar_one()
+        assert get_tag_similarity_version(db) in {version_before, version_before + 1}
+        assert latest_row_count == db.execute(select(func.count()).select_from(TagSimilarity)).scalar_one()
+
+        rebuild_tag_similarity(db)
+        assert incremental == _tag_tables(db), f"round {round_number}"
+
+
+def test_unchanged_tags_do_not_move_the_version(db):
+    tag_ids = list(get_or_create_tag_ids(db, ["similarity-test-a", "similarity-test-b"]).values())
+    rebuild_tag_similarity(db)
+    version = get_tag_similarity_version(db)
+
+    assert apply_anime_tag_changes(db, [(tag_ids, list(reversed(tag_ids)))]) == 0
+    assert get_tag_similarity_version(db) == version